@@ -11,6 +11,8 @@ import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
 
+from om_bench.results import read_results
+
 #matplotlib.use('Agg')
 
 filename = 'brach_state_nl_ln_drv_detail.dat'
@@ -22,34 +24,20 @@ equal_axis = True
 
 title = "Brachistocrone"
 
-outfile = open(filename, 'r')
-data = outfile.readlines()
-
-name = data[0].strip()
-mode = data[1].strip()
-ops = data[2].strip().split(',')
-nl = 'True' in ops[0]
-ln = 'True' in ops[1]
-drv = 'True' in ops[2]
-
-data = data[3:]
-npt = len(data)
-
-t1u = np.empty((npt, ))
-t3u = np.empty((npt, ))
-t5u = np.empty((npt, ))
-t3au = np.empty((npt, ))
-t3bu = np.empty((npt, ))
-t3cu = np.empty((npt, ))
-t3du = np.empty((npt, ))
-t3eu = np.empty((npt, ))
-flag = np.empty((npt, ), dtype=np.bool)
-x_dv = np.empty((npt, ))
-x_state = np.empty((npt, ))
-x_proc = np.empty((npt, ))
-
-for j, line in enumerate(data):
-    x_dv[j], x_state[j], x_proc[j], flag[j], t1u[j], t3u[j], t5u[j], t3au[j], t3bu[j], t3cu[j], t3du[j], t3eu[j] = line.strip().split(',')
+name, mode, (nl, ln, drv), cols = read_results(filename)
+
+t1u = cols['t1']
+t3u = cols['t3']
+t5u = cols['t5']
+t3au = cols['t3a']
+t3bu = cols['t3b']
+t3cu = cols['t3c']
+t3du = cols['t3d']
+t3eu = cols['t3e']
+flag = cols['flag']
+x_dv = cols['ndv']
+x_state = cols['nstate']
+x_proc = cols['nproc']
 
 if np.any(flag):
     use_flag = True
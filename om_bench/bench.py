@@ -1,20 +1,37 @@
 """
 Class that assists with generating scaling benchmarking data for OpenMDAO models.
 """
-from six import iteritems
 from six.moves import range
-from collections import Iterable
+from collections import Iterable, OrderedDict
+import json
 import os
-import subprocess
-import sys
+import shutil
 from time import time
 
-import numpy as np
-
+from openmdao.core.component import Component
 from openmdao.core.problem import Problem
-
-from om_bench.templates import qsub_template, run_template, qsub_template_single_file, \
-     qsub_template_amd, run_sub_timing_template
+from openmdao.utils.mpi import MPI
+
+from om_bench.coloring import COLORING_COLUMNS, ColoringCache
+from om_bench.cost import DEFAULT_WALLTIME, CostModel, campaign_report, walltime_hours
+from om_bench.comm_timing import CommLedger, TimedIntracomm, TransferTimer, comm_columns
+from om_bench.executor import IsolatedExecutor
+from om_bench.manifest import FAILED, WRITTEN, Manifest, manifest_filename, result_name
+from om_bench.memory import MemoryProbe, memory_columns
+from om_bench.placement import AFFINITY_COLUMNS, affinity_values, binding_options
+from om_bench.profiling import PhaseProfiler, clear_profiles, write_profile_tables
+from om_bench.results import write_job_results, write_rank_results
+from om_bench.runner import write_job_spec
+from om_bench.scheduler import PBSScheduler
+from om_bench.setup_timing import SetupStageTimer, SETUP_STAGES
+from om_bench.startup import STARTUP_COLUMNS, startup_times
+from om_bench.store import INFO_ENV_KEYS, RESUME_ENV_KEYS, STORE_EXT, env_fingerprint, read_meta, \
+     read_store, recover_store, write_store
+from om_bench.stats import repeat, summarize_samples, summary_columns, summarize_ranks, \
+     rank_columns
+from om_bench.sweep import SweepPoint, plan_sweep, sweep_mode, coordinate_key
+from om_bench.threads import THREAD_COLUMNS, blas_threads, can_limit_loaded, export_line, \
+     thread_limits
 
 
 class Bench(object):
@@ -24,30 +41,157 @@ class Bench(object):
     ln_of : bool
         Allows override of 'of' list during compute_totals. Default is None, which uses driver vars.
     ln_wrt : bool
-        Allows override of 'wrt' list during compute_totals. Default is None, which uses driver vars.
+        Allows override of 'wrt' list during compute_totals. Default is None, which uses driver
+        vars.
+    adaptive : bool(False)
+        If True, run_benchmark repeats each point beyond num_averages until the confidence
+        interval on every timed phase is narrower than ci_target, the time_budget is used up, or
+        max_averages samples have been taken. Can't be combined with isolate.
+    affinity : bool(False)
+        If True, record the cores that each rank may run on: the first of them, how many there
+        are, and the socket and NUMA node of the first, along with the number of sockets and NUMA
+        nodes used by all ranks together. Under MPI, every rank's affinity is saved in the ranks
+        table. Always on when placement is set.
+    batch_points : bool(False)
+        If True, run_benchmark_mpi runs all points and repetitions that share a processor count in
+        a single mpiexec launch, so that interpreter startup, imports and MPI initialization are
+        paid once. Their cost is saved once per launch, in the launches table.
+    ci_target : float(0.05)
+        Target half width of the confidence interval on the mean, relative to the mean.
+    coloring_cache : bool(False)
+        If True and the driver asks for dynamic simultaneous derivatives, compute the coloring
+        once per model structure and size, cache it in coloring_dir, and give it to the driver
+        before the timed phases. The time it took to compute the coloring and whether it came
+        from the cache are saved in the t_coloring and coloring_hit columns.
+    coloring_dir : str or None
+        Directory where colorings are cached. Default is None, which uses '_coloring_cache' in
+        base_dir.
+    comm_timing : bool(False)
+        If True, record the time, bytes and number of mpi point-to-point calls, collectives and
+        OpenMDAO vector transfers made during the timed phases, and the fraction of the time spent
+        in them. The time and bytes of each call type are saved as well.
+    concurrent_cost_limit : float or None
+        When isolate is True, points whose estimated cost is above this limit run alone on the
+        node. Default is None, which lets every point run concurrently.
+    confidence : float(0.95)
+        Confidence level used for the confidence interval on each mean.
+    cost_results : str or None
+        Result store of an earlier run of this benchmark, used to predict the runtime of each mpi
+        job when run_benchmark_mpi is called with walltime='auto'. Default is None, which uses
+        the store that run_benchmark or assemble_mpi_results writes for the same sweep in base_dir,
+        e.g., '<name>_<mode>_<op>.bench'.
+    fixture_dir : str or None
+        Directory where fixtures declared with persist=True are cached. Default is None, which
+        uses '_fixture_cache' in base_dir.
+    isolate : bool(False)
+        If True, run_benchmark runs every repetition of every point in a fresh worker process.
+        Exactly num_averages repetitions are run, so adaptive must be False.
+    max_averages : int(100)
+        In adaptive mode, the largest number of samples taken for a single point.
+    max_workers : int(1)
+        When isolate is True, maximum number of worker processes that run at the same time.
+    mem_margin : float(1.25)
+        Factor applied to the memory estimate of a rank when run_benchmark_mpi decides how many
+        ranks fit on a node.
+    memory : bool(False)
+        If True, record the peak resident set size and its change over setup, run_model,
+        run_driver and compute_totals. Under MPI, both the largest value on any rank and the
+        total over all ranks are saved.
     mode : str
         Derivatives mode string passed into openmdao setup. Can be ('fwd', 'rev')
     num_averages : int
-        Number of time to repeat each calculation and save the average time.
+        Number of time to repeat each calculation and save the average time. All samples are
+        also saved, along with their median, standard deviation and confidence interval.
+    num_warmup : int(0)
+        Number of discarded runs made before the timed runs of each point (or of each job, or
+        each isolated worker).
+    per_rank : bool(False)
+        If True, mpi jobs also save the values recorded on every rank. The minimum, maximum, mean
+        and imbalance ratio over ranks are always saved.
+    placement : str or None
+        Placement of the ranks of mpi jobs on the cores of each node: 'compact' fills the cores
+        in order, 'scatter' deals ranks round robin over the sockets, each bound to its own
+        cores, and 'socket' deals them over the sockets, each free to run on its whole socket.
+        The matching binding options are added to every launch, for the launcher family given
+        by the scheduler's mpi attribute. Default is None, which leaves placement to the
+        launcher.
+    pin_workers : bool(True)
+        When isolate is True, pin each worker process to its own core.
+    profile : bool(False)
+        If True, profile setup, run_model, run_driver and compute_totals with cProfile at every
+        point, and write a table of the hottest functions at each size. Profiling slows the
+        phases down, so timings taken with it on should not be compared with timings taken
+        without it.
+    profile_dir : str or None
+        Directory where the profiles are saved. Default is None, which uses
+        '<name>_<mode>_profile' in base_dir.
+    profile_growth : float(1.5)
+        Functions whose share of a phase grows by at least this factor from the smallest to the
+        largest point are marked in the profile tables.
+    profile_top : int(20)
+        Number of functions taken from each point for the profile tables.
+    resume : bool(True)
+        If True, run_benchmark saves every point as soon as it finishes, and skips the points
+        that an earlier run with the same settings and environment already saved. Results taken
+        with different settings are moved aside and the sweep starts over. run_benchmark_mpi
+        skips jobs whose output file already exists. Set to False to always rerun every point.
+    scheduler : <Scheduler> or None
+        Backend that writes and submits the jobs of run_benchmark_mpi, e.g., a PBSScheduler,
+        SlurmScheduler, or a LocalScheduler that runs them on this machine. Default is None,
+        which uses a PBSScheduler with its default settings. Jobs are only submitted when
+        auto_queue_submit is True.
+    setup_stages : bool(False)
+        If True, also save the time spent in each internal stage of OpenMDAO setup and
+        final_setup (system tree, variables, connections, vectors, solvers).
     single_file : bool
         If True, then mpi submissions are placed in a single qsub file and submitted as one job;
         if False, then they are submitted separately.
+    threads : list or None
+        Numbers of BLAS and OpenMP threads per rank to sweep. Each is run as its own sweep,
+        saved under the name '<name>-t<nthread>', with the thread count set in the environment
+        of every run and the count that BLAS reports saved in the nthread and nthread_blas
+        columns. nthread_blas is -1 unless threadpoolctl is installed to read it back. Sweeping
+        more than one count with run_benchmark needs threadpoolctl, or isolate, because BLAS is
+        already loaded in this process. With mpi, fewer ranks are placed on a node so that every
+        thread has a core. Default is None, which leaves the thread count to the environment.
+    startup_timing : bool(False)
+        If True, record the cost of starting the process that ran each point: the time from
+        interpreter start to the runner starting (t_interp), spent importing the Bench's module
+        (t_import), and from interpreter start to Problem ready (t_ready). Every run in a process
+        reports the startup of that process. The split is only known for mpi jobs started by
+        om_bench.runner. Under MPI, every rank's startup is summarized like the other timings.
+    time_budget : float or None
+        In adaptive mode, stop repeating a point once its timed runs have taken this many seconds.
     time_driver : bool(False)
         If True, run the driver (i.e., optimizer) and save timings.
     time_linear : bool(True)
         If True, run the linear solve and save timings.
     time_nonlinear : bool(True)
         If True, save timings from the nonlinear solve. Nonlinear solve always runs regardless.
+    walltime_margin : float(2.0)
+        With walltime='auto', the walltime of each mpi job is its predicted runtime times this
+        factor, rounded up to whole hours.
     _desvars : list
         List of ascending integers that are individually passed in to the problem to request the
         number of design variables.
+    _cost : tuple or None
+        Name and modification time of the result store that the cached cost model was fitted to,
+        and the model.
+    _env : dict or None
+        Environment fingerprint of the sweep being run, taken once so that checkpoints don't
+        repeat it.
+    _fixture_time : float
+        Time spent computing or loading fixtures during the current run.
     _name : string
         Name for this problem. Should be unix-safe but not contain underscores.
+    _nthread : int or None
+        Number of threads per rank of the sweep being run, or None if threads aren't swept.
     _procs : list
         List of ascending integers that are individually passed in to the problem to request the
         number of processors during mpi execution.
     _run_mode : str
-        Determination of which quantity (state, dv, proc) we are varying.
+        Determination of which quantities (state, desvar, proc) we are varying. When more than one
+        is varied, the names are joined with '-', e.g., 'state-proc'.
     _states : list
         List of ascending integers that are individually passed in to the problem to request the
         number of states. States should be independent of design variables.
@@ -83,20 +227,7 @@ class Bench(object):
         if not isinstance(procs, Iterable):
             procs = [procs]
 
-        ndv = len(desvars)
-        nstate = len(states)
-        nproc = len(procs)
-        if ndv + nstate + nproc > np.max([ndv, nstate, nproc]) + 2:
-            raise ValueError("For now, please only vary one of [states, procs, desvars]")
-
-        if ndv > 1:
-            self._run_mode = 'desvar'
-        elif nstate > 1:
-            self._run_mode = 'state'
-        elif nproc > 1:
-            self._run_mode = 'proc'
-        else:
-            self._run_mode = 'state'
+        self._run_mode = sweep_mode(desvars, states, procs)
 
         self._name = name
         #self.basedir = basedir
@@ -105,15 +236,34 @@ class Bench(object):
         self._states = states
         self._procs = procs
         self._use_flag = use_flag
+        self._fixture_time = 0.0
+        self._cost = None
+        self._env = None
+        self._nthread = None
 
         # Options
         self.num_averages = 5
+        self.num_warmup = 0
+        self.adaptive = False
+        self.ci_target = 0.05
+        self.time_budget = None
+        self.max_averages = 100
+        self.confidence = 0.95
         self.time_nonlinear = True
         self.time_linear = True
         self.time_driver = False
         self.single_batch = False
+        self.batch_points = False
         self.mode = mode
         self.auto_queue_submit = True
+        self.scheduler = None
+
+        # Size the walltime of mpi jobs from the results of an earlier run.
+        self.cost_results = None
+        self.walltime_margin = 2.0
+
+        # Place fewer ranks on a node when they wouldn't fit in its memory.
+        self.mem_margin = 1.25
 
         # Custom specification of of/wrt for linear solution.
         self.ln_of = None
@@ -123,6 +273,48 @@ class Bench(object):
 
         # Special mode for gathering even more detailed timing info.
         self.sub_timing = False
+        self.setup_stages = False
+
+        # Record peak memory use of each phase.
+        self.memory = False
+
+        # Save every rank's timings from mpi jobs, not just their statistics.
+        self.per_rank = False
+
+        # Separate communication from computation in the timed phases.
+        self.comm_timing = False
+
+        # Profile every phase, and tabulate the hottest functions at each size.
+        self.profile = False
+        self.profile_dir = None
+        self.profile_top = 20
+        self.profile_growth = 1.5
+
+        # Skip points that an earlier run of the same configuration already saved.
+        self.resume = True
+
+        # Cache for expensive fixtures that are saved to disk.
+        self.fixture_dir = None
+
+        # Compute simultaneous derivative colorings once and reuse them.
+        self.coloring_cache = False
+        self.coloring_dir = None
+
+        # Record the cost of starting each process, up to Problem ready.
+        self.startup_timing = False
+
+        # Sweep the number of BLAS and OpenMP threads per rank.
+        self.threads = None
+
+        # Bind mpi ranks to cores, and record where they ran.
+        self.placement = None
+        self.affinity = False
+
+        # Run each repetition in a fresh worker process.
+        self.isolate = False
+        self.max_workers = 1
+        self.pin_workers = True
+        self.concurrent_cost_limit = None
 
     def setup(self, problem, ndv, nstate, nproc, flag):
         """
@@ -166,7 +358,7 @@ class Bench(object):
         """
         pass
 
-    def post_run(self, problem):
+    def post_run(self, problem, ndv, nstate, nproc, flag):
         """
         Perform any post benchmark activities, like testing the result.
 
@@ -182,15 +374,149 @@ class Bench(object):
             Number of states requested.
         nproc : int
             Number of processors requested.
+        flag : bool
+            User assignable flag that will be False or True.
         """
         pass
 
+    def estimate_cost(self, ndv, nstate, nproc, flag):
+        """
+        Return the expected relative cost of a single point.
+
+        This method may be overriden by the user. It is only used to order the sweep so that the
+        cheapest points run first, so only the relative magnitude matters.
+
+        Parameters
+        ----------
+        ndv : int
+            Number of design variables requested.
+        nstate : int
+            Number of states requested.
+        nproc : int
+            Number of processors requested.
+        flag : bool
+            User assignable flag that will be False or True.
+
+        Returns
+        -------
+        float
+            Expected relative cost.
+        """
+        return float(ndv * nstate)
+
+    def estimate_memory(self, ndv, nstate, nproc, flag):
+        """
+        Return the expected peak memory of one rank at a single point, in MB.
+
+        This method may be overriden by the user. run_benchmark_mpi places no more ranks on a node
+        than fit in the memory of the scheduler's hardware profile. By default, the estimate comes
+        from the memory recorded in cost_results, if any.
+
+        Parameters
+        ----------
+        ndv : int
+            Number of design variables requested.
+        nstate : int
+            Number of states requested.
+        nproc : int
+            Number of processors requested.
+        flag : bool
+            User assignable flag that will be False or True.
+
+        Returns
+        -------
+        float or None
+            Expected memory, or None if it is unknown.
+        """
+        model = self._cost_model()
+        if model is None:
+            return None
+
+        return model.predict_memory(ndv, nstate, nproc, flag)
+
+    def _ranks_per_node(self, hardware, points):
+        """
+        Return the largest number of ranks per node that keeps every point within node memory.
+
+        When threads are swept, every thread of every rank also gets a core of its own.
+
+        Parameters
+        ----------
+        hardware : <HardwareProfile> or None
+            Node type that the job runs on.
+        points : list of tuple
+            (ndv, nstate, nproc, flag, ...) of every point the job runs.
+
+        Returns
+        -------
+        int or None
+            Number of ranks, or None if the nodes can be filled.
+        """
+        if hardware is None:
+            return None
+
+        ranks = hardware.cores_per_node
+        if self._nthread is not None:
+            ranks = max(1, ranks // self._nthread)
+
+        mems = [self.estimate_memory(*point[:4]) for point in points]
+        mems = [mem for mem in mems if mem is not None]
+        if mems:
+            mem = max(mems) * self.mem_margin
+            fit = hardware.ranks_per_node(mem)
+            if fit == 0:
+                print('Warning: ranks are expected to need %.0f MB, more than a %s node has. '
+                      'Placing one rank per node.' % (mem, hardware.name))
+                fit = 1
+            ranks = min(ranks, fit)
+
+        if ranks >= hardware.cores_per_node:
+            return None
+
+        return ranks
+
+    def _plan(self):
+        """
+        Return all points in this benchmark, ordered from cheapest to most expensive.
+
+        Returns
+        -------
+        list of SweepPoint
+            Points to run.
+        """
+        flags = [False]
+        if self._use_flag:
+            flags.append(True)
+
+        return plan_sweep(self._desvars, self._states, self._procs, flags,
+                          cost=lambda point: self.estimate_cost(*point))
+
     def run_benchmark(self):
         """
         Run benchmarks and save data.
         """
-        desvars = self._desvars
-        states = self._states
+        if self.isolate and self.adaptive:
+            msg = 'Adaptive sampling is not supported with isolate. Set num_averages instead.'
+            raise ValueError(msg)
+
+        counts = self._thread_counts()
+        if len(counts) > 1 and not self.isolate and not can_limit_loaded():
+            msg = 'Sweeping threads in this process needs threadpoolctl, because BLAS is already ' \
+                  'loaded. Install threadpoolctl, or set isolate to run every point in a fresh ' \
+                  'process.'
+            raise RuntimeError(msg)
+
+        for nthread in counts:
+            self._nthread = nthread
+            with thread_limits(nthread):
+                self._run_sweep()
+
+        self._nthread = None
+
+    def _run_sweep(self):
+        """
+        Run the benchmarks of one thread count and save data.
+        """
         procs = self._procs
 
         # This method only supports single proc.
@@ -198,67 +524,105 @@ class Bench(object):
             msg = 'This method only supports a single proc. Use run_benchmark_mpi instead.'
             raise RuntimeError(msg)
 
-        data = []
+        points = self._plan()
 
-        flags = [False]
-        if self._use_flag:
-            flags.append(True)
+        filename = os.path.join(self.base_dir, '%s_%s_%s%s' % (self._sweep_name(),
+                                                               self._run_mode, self._op_name(),
+                                                               STORE_EXT))
+
+        self._env = env_fingerprint()
+
+        samples = OrderedDict()
+        if self.resume:
+            samples = self._load_completed(filename)
+            for point in samples:
+                print('Already complete: dv=%d, state=%d, proc=%d, flag=%s' % point)
+
+        todo = [point for point in points if point not in samples]
+
+        if self.profile and not samples:
+            clear_profiles(self._profile_dir())
+
+        if self.isolate:
+            tasks = [(point, j, self.estimate_cost(*point))
+                     for point in todo for j in range(self.num_averages)]
+
+            pending = dict((point, []) for point in todo)
 
-        nproc = 1
-        for nstate in states:
-            for ndv in desvars:
-                for flag in flags:
-
-                    print("\n")
-                    print('Running: dv=%d, state=%d, proc=%d, flag=%s' % (ndv, nstate, nproc,
-                                                                          flag))
-                    print("\n")
-
-                    t1_sum = 0.0
-                    t3_sum = 0.0
-                    t5_sum = 0.0
-                    if self.sub_timing:
-                        t3a_sum = t3b_sum = t3c_sum = t3d_sum = t3e_sum = 0.0
-
-                    for j in range(self.num_averages):
-                        if self.sub_timing:
-                            t1, t3, t5, t3a, t3b, t3c, t3d, t3e = self._run_nl_ln_drv(ndv, nstate, nproc, flag)
-                            t1_sum += t1
-                            t3_sum += t3
-                            t5_sum += t5
-                            t3a_sum += t3a
-                            t3b_sum += t3b
-                            t3c_sum += t3c
-                            t3d_sum += t3d
-                            t3e_sum += t3e
-
-                        else:
-                            t1, t3, t5 = self._run_nl_ln_drv(ndv, nstate, nproc, flag)
-                            t1_sum += t1
-                            t3_sum += t3
-                            t5_sum += t5
-
-                    t1_av = t1_sum / (j + 1)
-                    t3_av = t3_sum / (j + 1)
-                    t5_av = t5_sum / (j + 1)
-
-                    if self.sub_timing:
-                        t3a_av = t3a_sum / (j + 1)
-                        t3b_av = t3b_sum / (j + 1)
-                        t3c_av = t3c_sum / (j + 1)
-                        t3d_av = t3d_sum / (j + 1)
-                        t3e_av = t3e_sum / (j + 1)
-
-                        data.append((ndv, nstate, nproc, flag, t1_av, t3_av, t5_av, t3a_av,
-                                     t3b_av, t3c_av, t3d_av, t3e_av))
-
-                    else:
-                        data.append((ndv, nstate, nproc, flag, t1_av, t3_av, t5_av))
+            def finished(i, result):
+                point = tasks[i][0]
+                pending[point].append(result)
+                if len(pending[point]) == self.num_averages:
+                    samples[point] = pending.pop(point)
+                    self._save_results(filename, samples)
+
+            executor = IsolatedExecutor(max_workers=self.max_workers, pin=self.pin_workers,
+                                        cost_limit=self.concurrent_cost_limit)
+            executor.run(self, tasks, callback=finished)
+
+        else:
+            for point in todo:
+                print("\n")
+                print('Running: dv=%d, state=%d, proc=%d, flag=%s' % point)
+                print("\n")
+
+                samples[point] = self._sample(ndv=point.ndv, nstate=point.nstate,
+                                              nproc=point.nproc, flag=point.flag,
+                                              num_averages=self.num_averages,
+                                              adaptive=self.adaptive)
+
+                # Checkpoint, so that an interrupted sweep can pick up from here.
+                self._save_results(filename, samples)
 
         os.chdir(self.base_dir)
 
-        name = self._name
-        mode = self._run_mode
+        self._save_results(filename, samples)
+        self._env = None
+        print('Results saved in', filename)
+
+        if self.profile:
+            write_profile_tables(self._profile_dir(), self._sweep_name(), self._run_mode,
+                                 top=self.profile_top, growth=self.profile_growth)
+
+    def _thread_counts(self):
+        """
+        Return the thread counts to sweep.
+
+        Returns
+        -------
+        list
+            Numbers of threads per rank, or [None] if threads aren't swept.
+        """
+        if self.threads is None:
+            return [None]
+        if not isinstance(self.threads, Iterable):
+            return [self.threads]
+
+        return list(self.threads)
+
+    def _sweep_name(self):
+        """
+        Return the name that the results of the sweep being run are saved under.
+
+        Returns
+        -------
+        str
+            The name, with the thread count appended when threads are swept.
+        """
+        if self._nthread is None:
+            return self._name
+
+        return '%s-t%d' % (self._name, self._nthread)
+
+    def _op_name(self):
+        """
+        Return the part of the result filenames that names the timed operations.
+
+        Returns
+        -------
+        str
+            E.g., 'nl_ln'.
+        """
         op = []
         if self.time_nonlinear:
             op.append('nl')
@@ -266,96 +630,392 @@ class Bench(object):
             op.append('ln')
         if self.time_driver:
             op.append('drv')
-        op = '_'.join(op)
-
-        filename = '%s_%s_%s.dat' % (name, mode, op)
-
-        outfile = open(filename, 'w')
-        outfile.write(name)
-        outfile.write('\n')
-        outfile.write(mode)
-        outfile.write('\n')
-        outfile.write('%s, %s, %s' % (self.time_nonlinear, self.time_linear, self.time_driver))
-        outfile.write('\n')
-
-        if self.sub_timing:
-            for ndv, nstate, nproc, flag, t1, t3, t5, t3a, t3b, t3c, t3d, t3e in data:
-                outfile.write('%d, %d, %d, %s, %f, %f, %f, %f, %f, %f, %f, %f' % (ndv, nstate, nproc, str(flag), t1, t3, t5, t3a, t3b, t3c, t3d, t3e))
-                outfile.write('\n')
-        else:
-            for ndv, nstate, nproc, flag, t1, t3, t5 in data:
-                outfile.write('%d, %d, %d, %s, %f, %f, %f' % (ndv, nstate, nproc, str(flag), t1, t3, t5))
-                outfile.write('\n')
 
-        outfile.close()
+        return '_'.join(op)
 
-    def run_benchmark_mpi(self, walltime=4):
+    def _config(self):
         """
-        Create and submit jobs that run benchmarks and save data.
+        Return the settings that must match for saved results to be resumed.
+
+        Returns
+        -------
+        OrderedDict
+            Settings that affect the saved values.
+        """
+        config = OrderedDict()
+        config['class'] = self.__class__.__name__
+        config['columns'] = self._columns()
+        for key in ('mode', 'num_averages', 'num_warmup', 'adaptive', 'ci_target',
+                    'time_budget', 'max_averages', 'ln_of', 'ln_wrt', 'isolate'):
+            config[key] = getattr(self, key)
+
+        return config
+
+    def _save_results(self, filename, samples):
+        """
+        Write the result store for all points completed so far.
 
         Parameters
         ----------
-        walltime : int
-            Amount of walltime for the mpi jobs in hours.
+        filename : str
+            Directory of the result store.
+        samples : dict
+            Raw samples of each completed point, keyed by SweepPoint.
         """
-        self.walltime = walltime
+        columns = self._columns()
+        coords = ['ndv', 'nstate', 'nproc', 'flag']
 
-        desvars = self._desvars
-        states = self._states
-        procs = self._procs
+        # Results are saved in sweep order, regardless of the order they ran in.
+        data = []
+        raw = []
+        for point in sorted(samples, key=coordinate_key):
+            data.append(tuple(point) + summarize_samples(columns, samples[point],
+                                                         self.confidence))
+            for j, values in enumerate(samples[point]):
+                raw.append(tuple(point) + (j, ) + tuple(values))
+
+        tables = OrderedDict()
+        tables['points'] = (coords + summary_columns(columns), data)
+        tables['samples'] = (coords + ['rep'] + columns, raw)
+
+        ops = (self.time_nonlinear, self.time_linear, self.time_driver)
+        write_store(filename, self._sweep_name(), self._run_mode, ops, tables, env=self._env,
+                    config=self._config())
+
+    def _load_completed(self, filename):
+        """
+        Return the samples of the points already saved in a result store by this configuration.
 
-        mode = self._run_mode
-        op = []
-        if self.time_nonlinear:
-            op.append('nl')
-        if self.time_linear:
-            op.append('ln')
-        if self.time_driver:
-            op.append('drv')
-        op = '_'.join(op)
+        Saved results are only resumed when they were taken with the same settings, and with the
+        same versions of python, OpenMDAO and the benchmark code. Otherwise, the old store is moved
+        to '<filename>.prev' and the sweep starts over. A different host or working directory is
+        only reported.
 
-        flags = [False]
-        if self._use_flag:
-            flags.append(True)
+        Parameters
+        ----------
+        filename : str
+            Directory of the result store.
 
-        data = []
-        commands = []
-        for nproc in procs:
-            for nstate in states:
-                for ndv in desvars:
-                    for flag in flags:
+        Returns
+        -------
+        OrderedDict
+            Raw samples of each completed point, keyed by SweepPoint.
+        """
+        samples = OrderedDict()
+        if not recover_store(filename):
+            return samples
+
+        meta = read_meta(filename)
+        config = json.loads(json.dumps(self._config()))
+        env = self._env
+        if env is None:
+            env = env_fingerprint()
+
+        if meta.get('config') != config or \
+           any(meta['env'].get(key) != env[key] for key in RESUME_ENV_KEYS if key in env):
+            print('Saved results in %s were taken with different settings and will not be '
+                  'resumed. Moving them to %s.prev' % (filename, filename))
+            if os.path.exists(filename + '.prev'):
+                shutil.rmtree(filename + '.prev')
+            os.rename(filename, filename + '.prev')
+            return samples
+
+        for key in INFO_ENV_KEYS:
+            if meta['env'].get(key) != env.get(key):
+                print("Resuming results in %s that were taken with %s '%s' (now '%s')." %
+                      (filename, key, meta['env'].get(key), env.get(key)))
+
+        columns = self._columns()
+        _, raw = read_store(filename, 'samples', mmap=False)
+        for row in raw:
+            point = SweepPoint(int(row['ndv']), int(row['nstate']), int(row['nproc']),
+                               bool(row['flag']))
+            samples.setdefault(point, []).append(tuple(row[name].item() for name in columns))
+
+        return samples
+
+    def _scheduler(self):
+        """
+        Return the scheduler that writes and submits mpi jobs.
+
+        Returns
+        -------
+        <Scheduler>
+            The scheduler option, or a PBSScheduler if it is None.
+        """
+        if self.scheduler is None:
+            return PBSScheduler()
+
+        return self.scheduler
+
+    def _cost_model(self):
+        """
+        Return the cost model fitted to the results of an earlier run, if there are any.
+
+        Returns
+        -------
+        <CostModel> or None
+            Fitted model, or None if the result store doesn't exist.
+        """
+        filename = self.cost_results
+        if filename is None:
+            filename = os.path.join(self.base_dir, '%s_%s_%s%s' % (self._sweep_name(),
+                                                                   self._run_mode,
+                                                                   self._op_name(), STORE_EXT))
+
+        if not recover_store(filename):
+            return None
+
+        # The model is fitted again only when the store has been rewritten.
+        key = (filename, os.path.getmtime(os.path.join(filename, 'meta.json')))
+        if self._cost is None or self._cost[0] != key:
+            self._cost = (key, CostModel.from_store(filename))
+
+        return self._cost[1]
+
+    def _coloring_dir(self):
+        """
+        Return the directory where colorings are cached.
+
+        Returns
+        -------
+        str
+            Absolute path of the directory.
+        """
+        if self.coloring_dir is not None:
+            return os.path.abspath(self.coloring_dir)
+
+        return os.path.join(self.base_dir, '_coloring_cache')
+
+    def _fixture_dir(self):
+        """
+        Return the directory where persistent fixtures are cached.
 
-                        for j in range(self.num_averages):
+        Returns
+        -------
+        str
+            Absolute path of the directory.
+        """
+        if self.fixture_dir is not None:
+            return os.path.abspath(self.fixture_dir)
+
+        return os.path.join(self.base_dir, '_fixture_cache')
+
+    def _profile_dir(self):
+        """
+        Return the directory where the profiles are saved.
 
-                            name = '_%s_%s_%s_%d_%d_%d_%s_%d' % (self._name, mode, op, ndv,
-                                                                 nstate, nproc, str(flag), j)
+        Returns
+        -------
+        str
+            Absolute path of the directory.
+        """
+        if self.profile_dir is not None:
+            return os.path.abspath(self.profile_dir)
+
+        return os.path.join(self.base_dir, '%s_%s_profile' % (self._sweep_name(), self._run_mode))
+
+    def _sample(self, ndv, nstate, nproc, flag, num_averages, adaptive):
+        """
+        Run the warm-up and timed repetitions of a single point in this process.
 
-                            # Prepare python code
-                            self._prepare_run_script(ndv, nstate, nproc, flag, j, name)
+        Parameters
+        ----------
+        ndv : int
+            Number of design variables requested.
+        nstate : int
+            Number of states requested.
+        nproc : int
+            Number of processors requested.
+        flag : bool
+            User assignable flag that will be False or True.
+        num_averages : int
+            Number of timed repetitions. In adaptive mode, this is the minimum.
+        adaptive : bool
+            If True, keep repeating until the confidence interval target or time budget is met.
+
+        Returns
+        -------
+        list of tuple
+            Raw samples from each timed repetition.
+        """
+        columns = self._columns()
+        watch = [columns.index(name) for name in ('t1', 't3', 't5')]
+
+        def run():
+            return self._run_nl_ln_drv(ndv, nstate, nproc, flag)
+
+        return repeat(run, num_averages, num_warmup=self.num_warmup, adaptive=adaptive,
+                      ci_target=self.ci_target, time_budget=self.time_budget,
+                      max_averages=self.max_averages, confidence=self.confidence, watch=watch)
+
+    def run_benchmark_mpi(self, walltime=DEFAULT_WALLTIME, dry_run=False):
+        """
+        Create and submit jobs that run benchmarks and save data.
+
+        Every batch job, the points it runs, and the ID the scheduler gave it are recorded in the
+        campaign manifest, '_<name>_<mode>_<op>_manifest.json'. When threads are swept, each
+        thread count is a campaign of its own.
+
+        Parameters
+        ----------
+        walltime : int or str
+            Amount of walltime for the mpi jobs in hours. If 'auto', the walltime of each job is
+            its runtime predicted from the results in cost_results, times walltime_margin. Jobs
+            whose runtime can't be predicted get DEFAULT_WALLTIME.
+        dry_run : bool
+            If True, print the jobs and the core-hours they would be charged for, and write or
+            submit nothing.
+        """
+        for nthread in self._thread_counts():
+            self._nthread = nthread
+            self._run_sweep_mpi(walltime, dry_run)
 
-                            if self.single_batch is True:
-                                command = "mpiexec -n %d python -u %s.py" % (nproc, name)
-                                commands.append(command)
+        self._nthread = None
 
-                            else:
-                                # Prepare job submission file
-                                self._prepare_pbs_job(ndv, nstate, nproc, j, name)
+    def _run_sweep_mpi(self, walltime, dry_run):
+        """
+        Create and submit the jobs of one thread count.
 
-                                # Submit job
-                                if self.auto_queue_submit:
-                                    p = subprocess.Popen(["qsub", '%s.sh' % name])
+        Parameters
+        ----------
+        walltime : int or str
+            Amount of walltime for the mpi jobs in hours. If 'auto', the walltime of each job is
+            its runtime predicted from the results in cost_results, times walltime_margin. Jobs
+            whose runtime can't be predicted get DEFAULT_WALLTIME.
+        dry_run : bool
+            If True, print the jobs and the core-hours they would be charged for, and write or
+            submit nothing.
+        """
+        self.walltime = walltime
 
-        if self.single_batch is True:
-            name = '_%s_%s_%s_all' % (self._name, mode, op)
+        mode = self._run_mode
+        op = self._op_name()
 
-            # Prepare job submission file
-            self._prepare_pbs_job_single_file(procs, name, commands)
+        model = self._cost_model()
+        if walltime == 'auto' and model is None:
+            msg = "walltime='auto' needs the results of an earlier run of this benchmark. " \
+                  "Set cost_results, or give the walltime in hours."
+            raise RuntimeError(msg)
 
-            # Submit job
-            if self.auto_queue_submit:
-                p = subprocess.Popen(["qsub", '%s.sh' % name])
+        if self.profile and not self.resume and not dry_run:
+            clear_profiles(self._profile_dir())
+
+        stem = '_%s_%s_%s' % (self._sweep_name(), mode, op)
+
+        jobs = []
+        for ndv, nstate, nproc, flag in self._plan():
+            for j in range(self.num_averages):
+                name = result_name(stem, (ndv, nstate, nproc, flag, j))
+                jobs.append((ndv, nstate, nproc, flag, j, name))
+
+        # Every job runs from one spec, so no code is generated per job.
+        spec_file = '%s.json' % stem
+
+        scheduler = self._scheduler()
+        if self.placement is not None:
+            # Fail before anything is written if the launcher can't do this placement.
+            binding_options(scheduler.mpi, self.placement, self._nthread)
+
+        pending = []
+        for index, job in enumerate(jobs):
+            if self.resume and os.path.exists('%s.dat' % job[5]):
+                print('Already complete:', job[5])
+                continue
+            pending.append((index, job))
+
+        # Every launch is (name, nproc, command, points).
+        launches = []
+        if self.batch_points:
+            # One launch runs every unfinished job with this proc count.
+            for nproc in sorted(set(job[2] for _, job in pending)):
+                name = '%s_%d' % (stem, nproc)
+                command = scheduler.command(nproc, "python -u -m om_bench.runner %s --nproc %d" %
+                                            (spec_file, nproc), placement=self.placement,
+                                            nthread=self._nthread)
+                points = [job[:5] for _, job in pending if job[2] == nproc]
+                launches.append((name, nproc, command, points))
 
-        print("All jobs submitted.")
+        else:
+            for index, job in pending:
+                command = scheduler.command(job[2], "python -u -m om_bench.runner %s %d" %
+                                            (spec_file, index), placement=self.placement,
+                                            nthread=self._nthread)
+                launches.append((job[5], job[2], command, [job[:5]]))
+
+        # Every batch job is (name, nproc, launches).
+        if self.single_batch is True and launches:
+            batches = [('%s_all' % stem, max(launch[1] for launch in launches), launches)]
+        else:
+            batches = [(launch[0], launch[1], [launch]) for launch in launches]
+
+        # Every job gets (expected seconds or None, walltime in hours, ranks per node or None).
+        hardware = getattr(scheduler, 'hardware', None)
+        sizes = {}
+        for name, nproc, batch_launches in batches:
+            ranks_per_node = self._ranks_per_node(hardware, [point for launch in batch_launches
+                                                             for point in launch[3]])
+            seconds = None
+            if model is not None:
+                times = [model.launch_time(launch[3], self.num_warmup)
+                         for launch in batch_launches]
+                if None not in times:
+                    seconds = sum(times)
+            if walltime == 'auto' and seconds is None:
+                print('The runtime of %s cannot be predicted. Requesting %d hours.' %
+                      (name, DEFAULT_WALLTIME))
+                hours = DEFAULT_WALLTIME
+            elif walltime == 'auto':
+                hours = walltime_hours(seconds, self.walltime_margin)
+            else:
+                hours = walltime
+            sizes[name] = (seconds, hours, ranks_per_node)
+
+        rows = []
+        for name, nproc, batch_launches in batches:
+            seconds, hours, ranks_per_node = sizes[name]
+            rows.append((name, scheduler.charged_cores(nproc, ranks_per_node),
+                         sum(len(launch[3]) for launch in batch_launches), seconds, hours))
+
+        report, core_hours = campaign_report(rows)
+        if dry_run:
+            print(report)
+            return
+
+        print('Requesting %.1f core-hours.' % core_hours)
+
+        write_job_spec(self, spec_file, jobs)
+
+        # Prepare job submission files
+        for name, nproc, batch_launches in batches:
+            commands = [launch[2] for launch in batch_launches]
+            if self._nthread is not None:
+                commands.insert(0, export_line(self._nthread))
+
+            seconds, hours, ranks_per_node = sizes[name]
+            scheduler.write_job(name, nproc, commands, hours, ranks_per_node=ranks_per_node,
+                                nthread=self._nthread)
+
+        # Submit jobs
+        if self.auto_queue_submit and batches:
+            results = scheduler.submit([(name, nproc) for name, nproc, _ in batches])
+        else:
+            results = dict((batch[0], (None, WRITTEN, 0, None)) for batch in batches)
+
+        # Record every job and its points, for later tooling.
+        manifest = Manifest(manifest_filename(stem))
+        for name, nproc, batch_launches in batches:
+            points = [point for launch in batch_launches for point in launch[3]]
+            job_id, status, attempts, message = results[name]
+            manifest.record(name, nproc, points, type(scheduler).__name__, job_id, status,
+                            attempts=attempts, message=message)
+        manifest.save()
+
+        nfailed = len([result for result in results.values() if result[1] == FAILED])
+        if nfailed:
+            print("%d jobs failed. See %s." % (nfailed, manifest.filename))
+        else:
+            print("All jobs submitted.")
 
     def _run_nl_ln_drv(self, ndv, nstate, nproc, flag):
         """
@@ -373,30 +1033,102 @@ class Bench(object):
             Number of processors requested.
         flag : bool
             User assignable flag that will be False or True.
+
+        Returns
+        -------
+        tuple
+            Timings and model size for this run, in the order given by _columns.
         """
-        prob = Problem()
+        if self.comm_timing:
+            ledger = CommLedger()
+            transfer_timer = TransferTimer(ledger)
+            if MPI:
+                prob = Problem(comm=TimedIntracomm(MPI.COMM_WORLD, ledger))
+            else:
+                prob = Problem()
+        else:
+            prob = Problem()
+
+        self._fixture_time = 0.0
 
         # User hook pre setup
         self.setup(prob, ndv, nstate, nproc, flag)
 
+        if self.setup_stages:
+            stage_timer = SetupStageTimer()
+            stage_timer.install(prob.model)
+
+        if self.memory:
+            probe = MemoryProbe()
+            probe.start('setup')
+        if self.profile:
+            profiler = PhaseProfiler()
+            profiler.start('setup')
+
+        # Time Setup
+        t6 = time()
         prob.setup(mode=self.mode)
+        t7 = time() - t6
+        print("Setup complete:", t7, 'sec')
 
         # User hook post setup
         self.post_setup(prob, ndv, nstate, nproc, flag)
 
+        t8 = time()
         prob.final_setup()
+        t_ready = time()
+        t9 = t_ready - t8
+        print("Final Setup complete:", t9, 'sec')
+
+        if self.memory:
+            probe.stop()
+        if self.profile:
+            profiler.stop()
+
+        if self.setup_stages:
+            stage_timer.remove()
+
+        ncomp = len(list(prob.model.system_iter(recurse=True, typ=Component)))
+
+        t_coloring = 0.0
+        coloring_hit = False
+        if self.coloring_cache and 'dynamic_simul_derivs' in prob.driver.options and \
+           prob.driver.options['dynamic_simul_derivs']:
+            cache = ColoringCache(self._coloring_dir())
+            t_coloring, coloring_hit = cache.color(prob)
+            print("Coloring complete:", t_coloring, 'sec', '(cached)' if coloring_hit else '')
+
+        if self.comm_timing:
+            transfer_timer.install()
+            ledger.active = True
 
         # Time Execution
+        if self.memory:
+            probe.start('run_model')
+        if self.profile:
+            profiler.start('run_model')
         t0 = time()
         prob.run_model()
         t1 = time() - t0
         print("Nonlinear Execution complete:", t1, 'sec')
+        if self.memory:
+            probe.stop()
+        if self.profile:
+            profiler.stop()
 
         if self.time_driver:
+            if self.memory:
+                probe.start('run_driver')
+            if self.profile:
+                profiler.start('run_driver')
             t4 = time()
             prob.run_driver()
             t5 = time() - t4
             print("Driver Execution complete:", t5, 'sec')
+            if self.memory:
+                probe.stop()
+            if self.profile:
+                profiler.stop()
         else:
             t5 = 0.0
 
@@ -404,10 +1136,18 @@ class Bench(object):
             if self.sub_timing:
                 prob.model.linear_solver.time_lu_fact = 0
                 prob.model.linear_solver.time_lu_solve = 0
+            if self.memory:
+                probe.start('compute_totals')
+            if self.profile:
+                profiler.start('compute_totals')
             t2 = time()
             prob.compute_totals(of=self.ln_of, wrt=self.ln_wrt, return_format='dict')
             t3 = time() - t2
             print("Linear Execution complete:", t3, 'sec')
+            if self.memory:
+                probe.stop()
+            if self.profile:
+                profiler.stop()
             if self.sub_timing:
                 t3a = prob.model.linear_solver.time_lu_fact
                 t3b = prob.model.linear_solver.time_lu_solve
@@ -417,125 +1157,111 @@ class Bench(object):
         else:
             t3 = 0.0
 
+        if self.comm_timing:
+            ledger.active = False
+            transfer_timer.remove()
+
         self.post_run(prob, ndv, nstate, nproc, flag)
 
-        if self.sub_timing and self.time_linear:
-            return t1, t3, t5, t3a, t3b, t3c, t3d, t3e
-        else:
-            return t1, t3, t5
+        if self.profile:
+            profiler.dump(self._profile_dir(), SweepPoint(ndv, nstate, nproc, flag),
+                          rank=prob.comm.rank)
 
-    def _prepare_run_script(self, ndv, nstate, nproc, flag, average, name):
+        times = [t1, t3, t5]
+        if self.sub_timing and self.time_linear:
+            times.extend([t3a, t3b, t3c, t3d, t3e])
+        times.extend([t7, t9, self._fixture_time])
+        if self.setup_stages:
+            times.extend(stage_timer.times.values())
+        times.append(ncomp)
+        if self.memory:
+            times.extend(probe.values())
+        if self.comm_timing:
+            times.extend(ledger.values(t1 + t3 + t5))
+        if self.coloring_cache:
+            times.extend([t_coloring, coloring_hit])
+        if self.startup_timing:
+            times.extend(startup_times(t_ready))
+        if self.threads is not None:
+            times.extend([self._nthread, blas_threads()])
+        if self._record_affinity():
+            times.extend(affinity_values(prob.comm))
+
+        return tuple(times)
+
+    def _write_job_results(self, filename, times):
         """
-        Output run script for mpi submission using template.
+        Gather the timings from every rank and write the results of a single mpi job.
 
-        Parameters
-        ----------
-        ndv : int
-            Number of design variables requested.
-        nstate : int
-            Number of states requested.
-        nproc : int
-            Number of processors requested.
-        flag : bool
-            User assignable flag that will be False or True.
-        average : int
-            Which average we are on.
-        name : string
-            Unique filename for the output data.
-        """
-        if self.sub_timing:
-            tp = run_sub_timing_template
-        else:
-            tp = run_template
-
-        tp = tp.replace('<ndv>', str(ndv))
-        tp = tp.replace('<nstate>', str(nstate))
-        tp = tp.replace('<nproc>', str(nproc))
-        tp = tp.replace('<flag>', str(flag))
-        tp = tp.replace('<average>', str(average))
-
-        # We need to import from the file that is running.
-        module = sys.argv[0].split('/')[-1].strip('.py')
-        classname = self.__class__.__name__
-        tp = tp.replace('<module>', module)
-        tp = tp.replace('<classname>', classname)
-        tp = tp.replace('<name>', self._name)
-        tp = tp.replace('<filename>', name)
-        tp = tp.replace('<mode>', self.mode)
-        tp = tp.replace('<time_linear>', str(self.time_linear))
-        tp = tp.replace('<time_driver>', str(self.time_driver))
-        tp = tp.replace('<of_list>', str(self.ln_of))
-        tp = tp.replace('<wrt_list>', str(self.ln_wrt))
-
-        outname = '%s.py' % name
-        outfile = open(outname, 'w')
-        outfile.write(tp)
-        outfile.close()
-
-    def _prepare_pbs_job(self, ndv, nstate, nproc, flag, average, name):
-        """
-        Output PBS run submission file using template.
+        Every timing is saved as seen on rank 0, along with its minimum, maximum, mean, and
+        imbalance ratio over all ranks. If per_rank is True, or affinity is recorded, each rank's
+        values are also written to a separate '.ranks' file. The environment fingerprint of rank 0
+        is written to a '.env' file.
 
         Parameters
         ----------
-        ndv : int
-            Number of design variables requested.
-        nstate : int
-            Number of states requested.
-        nproc : int
-            Number of processors requested.
-        flag : bool
-            User assignable flag that will be False or True.
-        average : int
-            Which average we are on.
-        name : string
-            Unique filename for the output data.
+        filename : str
+            Unique filename for the output data, without extension.
+        times : tuple
+            Values returned by _run_nl_ln_drv on this rank.
         """
-        tp = qsub_template
-        proc_node = 24.0
-
-        tp = tp.replace('<name>', name)
-        tp = tp.replace('<walltime>', str(self.walltime))
+        columns = self._columns()
 
-        local = os.getcwd()
-        tp = tp.replace('<local>', local)
+        if MPI:
+            comm = MPI.COMM_WORLD
+            rank_values = comm.gather(times, root=0)
+            if comm.rank != 0:
+                return
+        else:
+            rank_values = [times]
 
-        # Figure out the number of nodes and procs
-        node = int(np.ceil(nproc/proc_node))
+        values = list(times) + summarize_ranks(columns, rank_values)
+        write_job_results('%s.dat' % filename, columns + rank_columns(columns), values)
 
-        tp = tp.replace('<node>', str(node))
-        tp = tp.replace('<nproc>', str(nproc))
-        tp = tp.replace('<flag>', str(flag))
+        if self.per_rank or self._record_affinity():
+            write_rank_results('%s.ranks' % filename, columns, rank_values)
 
-        outname = '%s.sh' % name
-        outfile = open(outname, 'w')
-        outfile.write(tp)
-        outfile.close()
+        with open('%s.env' % filename, 'w') as outfile:
+            json.dump(env_fingerprint(), outfile, indent=2)
 
-    def _prepare_pbs_job_single_file(self, procs, name, commands):
-        """
-        Output PBS run submission file using template, but running all python scripts in one file.
+    def _record_affinity(self):
         """
-        #tp = qsub_template_single_file
-        tp = qsub_template_amd
-        proc_node = 24.0
-
-        tp = tp.replace('<name>', name)
-        tp = tp.replace('<walltime>', str(self.walltime))
+        Return True if the affinity of every rank is recorded.
 
-        local = os.getcwd()
-        tp = tp.replace('<local>', local)
-
-        # Figure out the number of nodes and procs
-        node = int(np.ceil(np.max(procs)/proc_node))
-
-        tp = tp.replace('<node>', str(node))
-
-        cmd_txt = '\n'.join(commands)
-        tp = tp.replace('<commands>', cmd_txt)
+        Returns
+        -------
+        bool
+            True if affinity is on, or a placement is set.
+        """
+        return self.affinity or self.placement is not None
 
-        outname = '%s.sh' % name
-        outfile = open(outname, 'w')
-        outfile.write(tp)
-        outfile.close()
+    def _columns(self):
+        """
+        Return the names of the quantities returned by _run_nl_ln_drv, in order.
 
+        Returns
+        -------
+        list of str
+            Column names.
+        """
+        columns = ['t1', 't3', 't5']
+        if self.sub_timing and self.time_linear:
+            columns.extend(['t3a', 't3b', 't3c', 't3d', 't3e'])
+        columns.extend(['t_setup', 't_final_setup', 't_fixtures'])
+        if self.setup_stages:
+            columns.extend(['t_setup_%s' % stage for stage in SETUP_STAGES])
+        columns.append('ncomp')
+        if self.memory:
+            columns.extend(memory_columns())
+        if self.comm_timing:
+            columns.extend(comm_columns())
+        if self.coloring_cache:
+            columns.extend(COLORING_COLUMNS)
+        if self.startup_timing:
+            columns.extend(STARTUP_COLUMNS)
+        if self.threads is not None:
+            columns.extend(THREAD_COLUMNS)
+        if self._record_affinity():
+            columns.extend(AFFINITY_COLUMNS)
+
+        return columns
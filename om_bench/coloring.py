@@ -0,0 +1,168 @@
+"""
+Cache of simultaneous derivative colorings, keyed by model structure and size.
+"""
+from copy import deepcopy
+import hashlib
+import json
+import os
+from time import time
+
+import openmdao
+from openmdao.utils.coloring import get_simul_meta
+
+
+# Result columns added when the coloring cache is on.
+COLORING_COLUMNS = ('t_coloring', 'coloring_hit')
+
+
+def coloring_key(problem):
+    """
+    Return a key that identifies the structure and size of a problem's total jacobian.
+
+    The key covers the OpenMDAO version, the derivative modes, every system in the model and its
+    type, the size of every variable, and the design variables and responses of the driver.
+
+    Parameters
+    ----------
+    problem : <Problem>
+        Problem, after final_setup.
+
+    Returns
+    -------
+    str
+        Hex digest.
+    """
+    model = problem.model
+    driver = problem.driver
+
+    items = [openmdao.__version__, problem._orig_mode, problem._mode]
+    items.extend((system.pathname, type(system).__name__)
+                 for system in model.system_iter(recurse=True, include_self=True))
+    items.extend((name, meta.get('global_size', meta['size']))
+                 for name, meta in sorted(model._var_allprocs_abs2meta.items()))
+    items.extend(sorted((name, meta['size']) for name, meta in driver._designvars.items()))
+    items.extend(sorted((name, meta['size']) for name, meta in driver._responses.items()))
+
+    return hashlib.sha1(repr(items).encode('utf-8')).hexdigest()
+
+
+def _apply_coloring(driver, coloring):
+    """
+    Give a coloring to a driver, and stop it from computing its own.
+
+    Parameters
+    ----------
+    driver : <Driver>
+        Driver of the problem.
+    coloring : dict
+        Coloring, in the format returned by get_simul_meta.
+    """
+    driver._total_jac = None
+    coloring = deepcopy(coloring)
+
+    if 'fwd' in coloring or 'rev' in coloring:
+        driver.set_simul_deriv_color(coloring)
+        driver._setup_simul_coloring()
+
+    if driver.supports['total_jac_sparsity']:
+        if 'fwd' not in coloring and 'rev' not in coloring:
+            # No coloring beats solving for every column, so only the sparsity is useful.
+            driver.set_total_jac_sparsity(coloring['sparsity'])
+        driver._setup_tot_jac_sparsity()
+
+    if 'dynamic_simul_derivs' in driver.options:
+        driver.options['dynamic_simul_derivs'] = False
+
+
+class ColoringCache(object):
+    """
+    Compute the simultaneous derivative coloring of each distinct problem once.
+
+    Colorings are saved as json in a directory, along with the time it took to compute them, so
+    they are shared by all repetitions, processes, and later runs.
+
+    Attributes
+    ----------
+    directory : str
+        Directory that holds the cached colorings.
+    """
+
+    def __init__(self, directory):
+        """
+        Initialize the cache.
+
+        Parameters
+        ----------
+        directory : str
+            Directory that holds the cached colorings.
+        """
+        self.directory = directory
+
+    def color(self, problem):
+        """
+        Load or compute the coloring of a problem, and give it to the problem's driver.
+
+        Must be called after final_setup (and usually after run_model) on every rank.
+
+        Parameters
+        ----------
+        problem : <Problem>
+            Problem to color.
+
+        Returns
+        -------
+        float
+            Time it took to compute the coloring, when it was computed.
+        bool
+            True if the coloring came from the cache.
+        """
+        driver = problem.driver
+        filename = os.path.join(self.directory, 'coloring_%s.json' % coloring_key(problem))
+
+        if os.path.exists(filename):
+            with open(filename, 'r') as infile:
+                data = json.load(infile)
+            _apply_coloring(driver, data['coloring'])
+            return data['t_coloring'], True
+
+        repeats = 1
+        if 'dynamic_derivs_repeats' in driver.options:
+            repeats = driver.options['dynamic_derivs_repeats']
+
+        # A bidirectional coloring may do some reverse solves, which aren't allowed in 'fwd'.
+        bidirectional = problem._orig_mode != 'fwd'
+
+        t0 = time()
+        coloring = get_simul_meta(problem, repeats=repeats, tol=1.e-15, include_sparsity=True,
+                                  setup=False, run_model=False, bidirectional=bidirectional,
+                                  stream=None)
+        t_coloring = time() - t0
+
+        # The boolean jacobian is only needed for reporting.
+        coloring.pop('J', None)
+
+        if problem.comm.rank == 0:
+            self._save(filename, {'t_coloring': t_coloring, 'coloring': coloring})
+
+        _apply_coloring(driver, coloring)
+
+        return t_coloring, False
+
+    def _save(self, filename, data):
+        """
+        Write a coloring to the cache.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the cache file.
+        data : dict
+            Coloring and the time it took to compute.
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        tmp_name = '%s.%d.tmp' % (filename, os.getpid())
+        with open(tmp_name, 'w') as outfile:
+            json.dump(data, outfile, default=lambda value: value.tolist())
+        os.rename(tmp_name, filename)
@@ -0,0 +1,383 @@
+"""
+Instrumentation that separates communication time from computation during timed phases.
+"""
+from collections import OrderedDict
+from time import time
+
+import numpy as np
+
+from openmdao.core.group import Group
+from openmdao.utils.mpi import MPI
+
+
+# mpi4py communicator methods that are timed, by category.
+COMM_CALLS = OrderedDict([
+    ('p2p', ('send', 'recv', 'sendrecv', 'isend', 'irecv', 'Send', 'Recv', 'Sendrecv', 'Isend',
+             'Irecv')),
+    ('collective', ('allreduce', 'bcast', 'gather', 'allgather', 'scatter', 'alltoall', 'reduce',
+                    'barrier', 'Allreduce', 'Bcast', 'Gather', 'Gatherv', 'Allgather',
+                    'Allgatherv', 'Scatter', 'Scatterv', 'Alltoall', 'Alltoallv', 'Reduce',
+                    'Barrier')),
+])
+
+# Categories reported for each point. Vector transfers are timed at the Group level.
+COMM_CATEGORIES = tuple(COMM_CALLS.keys()) + ('transfer', )
+
+# Call types recorded in the ledger, as '<category>.<name>'. Vector transfers are recorded by mode.
+COMM_CALL_TYPES = tuple('%s.%s' % (category, name) for category, names in COMM_CALLS.items()
+                        for name in names) + ('transfer.fwd', 'transfer.rev')
+
+# Unwrapped Group._transfer, so that a timer left installed by a failed run can't be nested.
+_GROUP_TRANSFER = Group._transfer
+
+
+def _nbytes(args):
+    """
+    Return the size of the data in the first argument of a communicator call.
+
+    Only numpy arrays and mpi4py buffer specifications ([array, ...]) are sized. Other python
+    objects are pickled by mpi4py, and their size isn't counted.
+
+    Parameters
+    ----------
+    args : tuple
+        Positional arguments of the call.
+
+    Returns
+    -------
+    int
+        Number of bytes.
+    """
+    if not args:
+        return 0
+
+    buf = args[0]
+    if isinstance(buf, (list, tuple)) and buf:
+        buf = buf[0]
+
+    if isinstance(buf, np.ndarray):
+        return buf.nbytes
+
+    return 0
+
+
+class CommLedger(object):
+    """
+    Accumulate time, bytes, and number of calls for every communication call type.
+
+    Attributes
+    ----------
+    active : bool
+        Calls are only recorded while this is True.
+    calls : OrderedDict
+        [time, bytes, count] for each call type.
+    _depth : int
+        Depth of nested recorded calls. Only the outermost one is counted.
+    """
+
+    def __init__(self):
+        """
+        Initialize the ledger.
+        """
+        self.active = False
+        self.calls = OrderedDict()
+        self._depth = 0
+
+    def record(self, call, func, args, kwargs, nbytes):
+        """
+        Run a communication call, and record it if the ledger is active.
+
+        Parameters
+        ----------
+        call : str
+            Call type.
+        func : callable
+            Function that makes the call.
+        args : tuple
+            Positional arguments.
+        kwargs : dict
+            Keyword arguments.
+        nbytes : int
+            Size of the data moved by the call.
+
+        Returns
+        -------
+        object
+            Return value of the call.
+        """
+        if not self.active or self._depth > 0:
+            return func(*args, **kwargs)
+
+        self._depth += 1
+        t0 = time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time() - t0
+            self._depth -= 1
+
+            entry = self.calls.setdefault(call, [0.0, 0, 0])
+            entry[0] += elapsed
+            entry[1] += nbytes
+            entry[2] += 1
+
+    def totals(self):
+        """
+        Return the accumulated time, bytes and calls for each category.
+
+        Returns
+        -------
+        OrderedDict
+            (time, bytes, count) for each name in COMM_CATEGORIES.
+        """
+        totals = OrderedDict((category, [0.0, 0, 0]) for category in COMM_CATEGORIES)
+
+        for call, (elapsed, nbytes, count) in self.calls.items():
+            category = call.split('.')[0]
+            totals[category][0] += elapsed
+            totals[category][1] += nbytes
+            totals[category][2] += count
+
+        return totals
+
+    def values(self, compute_time):
+        """
+        Return the recorded totals, the fraction of time spent communicating, and the time and
+        bytes of each call type.
+
+        Parameters
+        ----------
+        compute_time : float
+            Total time of the timed phases on this rank.
+
+        Returns
+        -------
+        list
+            Values in the order given by comm_columns.
+        """
+        values = []
+        total = 0.0
+        for elapsed, nbytes, count in self.totals().values():
+            values.extend([elapsed, nbytes, count])
+            total += elapsed
+
+        if compute_time > 0.0:
+            values.append(total / compute_time)
+        else:
+            values.append(0.0)
+
+        for call in COMM_CALL_TYPES:
+            elapsed, nbytes, _ = self.calls.get(call, (0.0, 0, 0))
+            values.extend([elapsed, nbytes])
+
+        return values
+
+
+def comm_columns():
+    """
+    Return the names of the communication columns written for each point.
+
+    The totals of each category are followed by the time and bytes of each call type, e.g.,
+    comm_Allreduce_t and comm_Allreduce_bytes, or comm_transfer_fwd_t for forward transfers.
+
+    Returns
+    -------
+    list of str
+        Column names.
+    """
+    columns = []
+    for category in COMM_CATEGORIES:
+        columns.extend(['t_comm_%s' % category, 'comm_%s_bytes' % category,
+                        'comm_%s_calls' % category])
+    columns.append('comm_frac')
+
+    for call in COMM_CALL_TYPES:
+        category, name = call.split('.')
+        if category == 'transfer':
+            name = 'transfer_' + name
+        columns.extend(['comm_%s_t' % name, 'comm_%s_bytes' % name])
+
+    return columns
+
+
+def _timed_call(category, name):
+    """
+    Return a communicator method that records itself in the communicator's ledger.
+
+    Parameters
+    ----------
+    category : str
+        Category of the call.
+    name : str
+        Name of the mpi4py method.
+
+    Returns
+    -------
+    callable
+        Method for TimedIntracomm.
+    """
+    call = '%s.%s' % (category, name)
+
+    def method(self, *args, **kwargs):
+        func = getattr(super(TimedIntracomm, self), name)
+        return self._ledger.record(call, func, args, kwargs, _nbytes(args))
+
+    method.__name__ = name
+    return method
+
+
+if MPI:
+    class TimedIntracomm(MPI.Intracomm):
+        """
+        Intracommunicator that records the time and bytes of every communication call.
+
+        It shares the handle of the communicator it wraps, so it can be handed to anything that
+        expects an mpi4py communicator (including PETSc). Communicators split from it are wrapped
+        too.
+
+        Attributes
+        ----------
+        _ledger : <CommLedger>
+            Ledger that collects the calls.
+        """
+
+        def __new__(cls, comm, ledger):
+            """
+            Wrap a communicator.
+
+            Parameters
+            ----------
+            comm : MPI.Intracomm
+                Communicator to wrap.
+            ledger : <CommLedger>
+                Ledger that collects the calls.
+
+            Returns
+            -------
+            <TimedIntracomm>
+                Wrapped communicator.
+            """
+            self = super(TimedIntracomm, cls).__new__(cls, comm)
+            self._ledger = ledger
+            return self
+
+        def Split(self, *args, **kwargs):
+            """
+            Split the communicator, and wrap the result.
+
+            Parameters
+            ----------
+            *args : list
+                Positional arguments passed to MPI.Intracomm.Split.
+            **kwargs : dict
+                Keyword arguments passed to MPI.Intracomm.Split.
+
+            Returns
+            -------
+            <TimedIntracomm>
+                Wrapped sub-communicator.
+            """
+            comm = super(TimedIntracomm, self).Split(*args, **kwargs)
+            return TimedIntracomm(comm, self._ledger)
+
+        def Dup(self, *args, **kwargs):
+            """
+            Duplicate the communicator, and wrap the result.
+
+            Parameters
+            ----------
+            *args : list
+                Positional arguments passed to MPI.Intracomm.Dup.
+            **kwargs : dict
+                Keyword arguments passed to MPI.Intracomm.Dup.
+
+            Returns
+            -------
+            <TimedIntracomm>
+                Wrapped communicator.
+            """
+            comm = super(TimedIntracomm, self).Dup(*args, **kwargs)
+            return TimedIntracomm(comm, self._ledger)
+
+    for _category, _names in COMM_CALLS.items():
+        for _name in _names:
+            setattr(TimedIntracomm, _name, _timed_call(_category, _name))
+
+else:
+    TimedIntracomm = None
+
+
+class TransferTimer(object):
+    """
+    Record OpenMDAO vector transfers in a ledger while installed.
+
+    Group._transfer is replaced on the class, so every group in the model is covered. The number
+    of bytes assumes one float64 per transferred entry.
+
+    Attributes
+    ----------
+    _ledger : <CommLedger>
+        Ledger that collects the transfers.
+    """
+
+    def __init__(self, ledger):
+        """
+        Initialize the timer.
+
+        Parameters
+        ----------
+        ledger : <CommLedger>
+            Ledger that collects the transfers.
+        """
+        self._ledger = ledger
+
+    def install(self):
+        """
+        Start recording vector transfers.
+        """
+        original = _GROUP_TRANSFER
+        ledger = self._ledger
+
+        def _transfer(group, vec_name, mode, isub=None):
+            nbytes = _transfer_bytes(group, vec_name, mode, isub)
+            return ledger.record('transfer.%s' % mode, original, (group, vec_name, mode, isub),
+                                 {}, nbytes)
+
+        Group._transfer = _transfer
+
+    def remove(self):
+        """
+        Stop recording vector transfers.
+        """
+        Group._transfer = _GROUP_TRANSFER
+
+
+def _transfer_bytes(group, vec_name, mode, isub):
+    """
+    Return the approximate size of a vector transfer.
+
+    Parameters
+    ----------
+    group : <Group>
+        Group that owns the transfer.
+    vec_name : str
+        Name of the vector.
+    mode : str
+        Either 'fwd' or 'rev'.
+    isub : None or int
+        Subsystem index for partial transfers.
+
+    Returns
+    -------
+    int
+        Number of bytes, or 0 if the transfer indices can't be found.
+    """
+    try:
+        in_inds = group._transfers[vec_name][mode, isub]._in_inds
+    except (AttributeError, KeyError, TypeError):
+        return 0
+
+    if isinstance(in_inds, dict):
+        return 8 * sum(np.size(inds) for inds in in_inds.values())
+
+    return 8 * np.size(in_inds)
@@ -0,0 +1,273 @@
+"""
+Comparison of benchmark results against a baseline, for catching performance regressions.
+
+Usage:
+
+    python -m om_bench.compare baseline.bench new.bench [--threshold 0.1] [--alpha 0.05]
+                               [--phases t1 t3 t_fixtures ...]
+
+Older .dat results files can be compared too. By default, only the timings of the model are
+compared; fixture, coloring and startup times can be added with --phases.
+
+The exit status is 1 if any phase at any point is significantly slower than the baseline by more
+than the threshold.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from scipy.stats import ttest_ind, ttest_ind_from_stats
+
+from om_bench.results import read_results
+from om_bench.setup_timing import SETUP_STAGES
+from om_bench.store import read_meta
+
+
+# Timing columns of the model that are compared by default. Fixture, coloring and startup times
+# depend on caches and process startup rather than on OpenMDAO, and are only compared when asked
+# for.
+MODEL_PHASES = ('t1', 't3', 't5', 't3a', 't3b', 't3c', 't3d', 't3e', 't_setup',
+                't_final_setup') + tuple('t_setup_%s' % stage for stage in SETUP_STAGES)
+
+
+def _phases(cols):
+    """
+    Return the model timing columns found in a results file.
+
+    Parameters
+    ----------
+    cols : dict
+        Result columns keyed by name.
+
+    Returns
+    -------
+    list of str
+        Column names.
+    """
+    return [name for name in MODEL_PHASES if name in cols]
+
+
+def _points(cols):
+    """
+    Return the coordinates of every row in a results file.
+
+    Parameters
+    ----------
+    cols : dict
+        Result columns keyed by name.
+
+    Returns
+    -------
+    list of tuple
+        (ndv, nstate, nproc, flag) for each row.
+    """
+    return [(int(ndv), int(nstate), int(nproc), bool(flag))
+            for ndv, nstate, nproc, flag in zip(cols['ndv'], cols['nstate'], cols['nproc'],
+                                                cols['flag'])]
+
+
+def _read_samples(filename):
+    """
+    Read the raw samples that belong to a summary results file, if they exist.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the result store, or of an older summary results file.
+
+    Returns
+    -------
+    dict or None
+        Sample arrays for each column, keyed by point and then by column name. None if there are
+        no samples.
+    """
+    if os.path.isdir(filename):
+        if 'samples' not in read_meta(filename)['tables']:
+            return None
+        _, _, _, cols = read_results(filename, table='samples')
+
+    else:
+        samples_file = filename[:-4] + '_samples.dat'
+        if not os.path.exists(samples_file):
+            return None
+        _, _, _, cols = read_results(samples_file)
+
+    samples = {}
+    for j, point in enumerate(_points(cols)):
+        point_samples = samples.setdefault(point, {})
+        for name, values in cols.items():
+            point_samples.setdefault(name, []).append(values[j])
+
+    return samples
+
+
+def _slowdown_pvalue(base, new, base_samples, new_samples, phase):
+    """
+    Return the one-sided p-value for the new time being larger than the baseline time.
+
+    Welch's t-test is run on the raw samples when both files have them, and otherwise on the
+    saved standard deviations. If neither is available, nan is returned.
+
+    Parameters
+    ----------
+    base : dict
+        Baseline summary values for the point, keyed by column name.
+    new : dict
+        New summary values for the point, keyed by column name.
+    base_samples : dict or None
+        Baseline samples for the point, keyed by column name.
+    new_samples : dict or None
+        New samples for the point, keyed by column name.
+    phase : str
+        Name of the timing column.
+
+    Returns
+    -------
+    float
+        p-value.
+    """
+    if base_samples is not None and new_samples is not None and \
+       len(base_samples[phase]) > 1 and len(new_samples[phase]) > 1:
+        stat, pvalue = ttest_ind(new_samples[phase], base_samples[phase], equal_var=False)
+
+    elif '%s_std' % phase in base and '%s_std' % phase in new and \
+         base['nsample'] > 1 and new['nsample'] > 1:
+        stat, pvalue = ttest_ind_from_stats(new[phase], new['%s_std' % phase], new['nsample'],
+                                            base[phase], base['%s_std' % phase],
+                                            base['nsample'], equal_var=False)
+
+    else:
+        return np.nan
+
+    if np.isnan(stat):
+        # Identical constant samples.
+        return 1.0
+
+    # Two-sided to one-sided.
+    return pvalue / 2.0 if stat > 0.0 else 1.0 - pvalue / 2.0
+
+
+def compare_results(baseline, new, threshold=0.1, alpha=0.05, phases=None):
+    """
+    Compare the timings in two results files point by point.
+
+    Points are matched by their coordinates. A phase at a point is a regression when its mean time
+    grew by more than threshold and the slowdown is significant at level alpha. Results without
+    any record of their spread (e.g., older files) are judged by the threshold alone.
+
+    Parameters
+    ----------
+    baseline : str
+        Name of the baseline result store or summary results file.
+    new : str
+        Name of the new result store or summary results file.
+    threshold : float
+        Largest allowed relative slowdown.
+    alpha : float
+        Significance level for the slowdown.
+    phases : list of str or None
+        Timing columns to compare. Default is every column of MODEL_PHASES found in both files.
+
+    Returns
+    -------
+    list of tuple
+        (point, phase, baseline time, new time, relative change, p-value, regression) for every
+        compared phase at every matched point.
+    """
+    _, _, _, base_cols = read_results(baseline)
+    _, _, _, new_cols = read_results(new)
+
+    base_samples = _read_samples(baseline)
+    new_samples = _read_samples(new)
+
+    if phases is None:
+        phases = [phase for phase in _phases(base_cols) if phase in new_cols]
+
+    new_rows = dict((point, j) for j, point in enumerate(_points(new_cols)))
+
+    rows = []
+    for i, point in enumerate(_points(base_cols)):
+        if point not in new_rows:
+            continue
+        j = new_rows[point]
+
+        base = dict((name, values[i]) for name, values in base_cols.items())
+        cur = dict((name, values[j]) for name, values in new_cols.items())
+
+        for phase in phases:
+            t_base = base[phase]
+            t_new = cur[phase]
+
+            # Phase wasn't run.
+            if t_base <= 0.0 or t_new <= 0.0:
+                continue
+
+            change = t_new / t_base - 1.0
+            pvalue = _slowdown_pvalue(base, cur,
+                                      base_samples.get(point) if base_samples else None,
+                                      new_samples.get(point) if new_samples else None,
+                                      phase)
+
+            significant = np.isnan(pvalue) or pvalue < alpha
+            regression = bool(change > threshold and significant)
+
+            rows.append((point, phase, t_base, t_new, change, pvalue, regression))
+
+    return rows
+
+
+def main(argv=None):
+    """
+    Compare two results files from the command line.
+
+    Parameters
+    ----------
+    argv : list of str or None
+        Command line arguments. Default is sys.argv[1:].
+
+    Returns
+    -------
+    int
+        Exit status: 1 if any regression was found, 2 if no points matched, otherwise 0.
+    """
+    parser = argparse.ArgumentParser(description='Compare benchmark results against a '
+                                                 'baseline and detect regressions.')
+    parser.add_argument('baseline', help='Baseline result store or results file.')
+    parser.add_argument('new', help='New result store or results file.')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Largest allowed relative slowdown (default 0.1).')
+    parser.add_argument('--alpha', type=float, default=0.05,
+                        help='Significance level for a slowdown (default 0.05).')
+    parser.add_argument('--phases', nargs='+', default=None,
+                        help='Timing columns to compare, e.g., t_fixtures or t_import '
+                             '(default: the model phases t1, t3, t5, t3a-t3e, t_setup, '
+                             't_final_setup and the setup stages).')
+    args = parser.parse_args(argv)
+
+    rows = compare_results(args.baseline, args.new, threshold=args.threshold, alpha=args.alpha,
+                           phases=args.phases)
+
+    if not rows:
+        print('No matching points found.')
+        return 2
+
+    print('%-28s %-16s %12s %12s %9s %9s' % ('Point (dv, state, proc, flag)', 'Phase',
+                                             'Baseline', 'New', 'Change', 'p'))
+
+    nreg = 0
+    for point, phase, t_base, t_new, change, pvalue, regression in rows:
+        mark = ' REGRESSION' if regression else ''
+        nreg += regression
+        print('%-28s %-16s %12.6g %12.6g %+8.1f%% %9.3g%s' % (str(point), phase, t_base, t_new,
+                                                              100.0 * change, pvalue, mark))
+
+    print('')
+    print('%d regressions beyond %g%% found.' % (nreg, 100.0 * args.threshold))
+
+    return 1 if nreg else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
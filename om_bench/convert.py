@@ -0,0 +1,116 @@
+"""
+Conversion of older .dat results files into result stores.
+
+Usage:
+
+    python -m om_bench.convert data/*.dat
+
+Each file is converted to a store of the same name with the '.bench' extension. The matching
+'_samples.dat' and '_ranks.dat' files, if any, become the samples and ranks tables.
+"""
+from collections import OrderedDict
+import os
+import sys
+
+from om_bench.results import read_results
+from om_bench.store import STORE_EXT, write_store
+
+
+# Columns that lead every table, when present.
+LEAD_COLUMNS = ('ndv', 'nstate', 'nproc', 'flag', 'rep', 'rank')
+
+
+def _table(cols):
+    """
+    Return the columns and rows of a table read by read_results.
+
+    Parameters
+    ----------
+    cols : dict
+        Column arrays keyed by name.
+
+    Returns
+    -------
+    list of str
+        Column names, starting with the coordinates.
+    list of tuple
+        Rows.
+    """
+    columns = [name for name in LEAD_COLUMNS if name in cols]
+    columns.extend(name for name in cols if name not in LEAD_COLUMNS)
+
+    rows = list(zip(*[cols[name] for name in columns]))
+
+    return columns, rows
+
+
+def convert_legacy(filename, path=None):
+    """
+    Convert an older results file, and its samples and ranks files, into a result store.
+
+    The environment the results came from wasn't recorded, so the fingerprint only names the
+    converted file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the summary results file.
+    path : str or None
+        Directory of the new store. Default replaces '.dat' with '.bench'.
+
+    Returns
+    -------
+    str
+        Directory of the new store.
+    """
+    stem = filename[:-4] if filename.endswith('.dat') else filename
+    if path is None:
+        path = stem + STORE_EXT
+
+    name, mode, ops, cols = read_results(filename)
+
+    tables = OrderedDict()
+    tables['points'] = _table(cols)
+
+    for table in ('samples', 'ranks'):
+        table_file = '%s_%s.dat' % (stem, table)
+        if os.path.exists(table_file):
+            tables[table] = _table(read_results(table_file)[3])
+
+    env = OrderedDict([('converted_from', os.path.basename(filename))])
+    write_store(path, name, mode, ops, tables, env=env)
+
+    return path
+
+
+def main(argv=None):
+    """
+    Convert the results files named on the command line.
+
+    Parameters
+    ----------
+    argv : list of str or None
+        Command line arguments. Default is sys.argv[1:].
+
+    Returns
+    -------
+    int
+        Exit status.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if not argv:
+        print('Usage: python -m om_bench.convert results.dat [results.dat ...]')
+        return 2
+
+    for filename in argv:
+        if filename.endswith(('_samples.dat', '_ranks.dat')):
+            continue
+        print('%s -> %s' % (filename, convert_legacy(filename)))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
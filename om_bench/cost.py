@@ -0,0 +1,375 @@
+"""
+Cost model of a benchmark, fitted to the results of an earlier run, for sizing mpi jobs.
+
+The time of one repetition of a point is modeled as
+
+    t = c * ndv**a * nstate**b * nproc**g
+
+with one fit per flag value. An exponent is only fitted for a coordinate that varied in the earlier
+run; the others are 0. Points that were measured are predicted by their measured mean instead.
+When the earlier run recorded memory, the peak memory of one rank is modeled the same way.
+"""
+from collections import OrderedDict
+import math
+
+import numpy as np
+
+from om_bench.memory import MEMORY_PHASES
+from om_bench.store import read_meta, read_store
+from om_bench.sweep import SweepPoint
+
+
+# Columns that add up to the time of one repetition of a point, when they were recorded.
+RUN_COLUMNS = ('t_setup', 't_final_setup', 't_fixtures', 't_coloring', 't1', 't3', 't5')
+
+# Seconds assumed for starting a launch (interpreter, imports, MPI) when the results don't say.
+DEFAULT_STARTUP = 30.0
+
+# Hours of walltime requested for a job whose runtime can't be predicted.
+DEFAULT_WALLTIME = 4
+
+# Coordinates that can be fitted, in the order of SweepPoint.
+SIZE_COORDS = ('ndv', 'nstate', 'nproc')
+
+
+class CostModel(object):
+    """
+    Predict the runtime of the points of a benchmark from the results of an earlier run.
+
+    Attributes
+    ----------
+    fits : dict
+        (log c, exponents) of the fit for each flag value. The key None holds the fit to all points,
+        and is None itself if no point took any time.
+    measured : OrderedDict
+        Mean time of one repetition of each measured point, keyed by SweepPoint.
+    memory : OrderedDict
+        Largest peak memory of one rank at each measured point in MB, keyed by SweepPoint. Empty
+        if memory wasn't recorded.
+    memory_fits : dict
+        (log c, exponents) of the memory fit for each flag value, like fits.
+    startup : float
+        Seconds spent starting each launch, before the first point runs.
+    """
+
+    def __init__(self, measured, startup=DEFAULT_STARTUP, memory=None):
+        """
+        Fit the model to measured times.
+
+        Parameters
+        ----------
+        measured : dict
+            Mean time of one repetition in seconds, keyed by (ndv, nstate, nproc, flag).
+        startup : float
+            Seconds spent starting each launch.
+        memory : dict or None
+            Peak memory of one rank in MB, keyed by (ndv, nstate, nproc, flag).
+        """
+        self.measured = OrderedDict((SweepPoint(*point), float(t))
+                                    for point, t in measured.items())
+        self.startup = startup
+        self.fits = _fit_flags(self.measured)
+
+        self.memory = OrderedDict()
+        self.memory_fits = {}
+        if memory:
+            self.memory = OrderedDict((SweepPoint(*point), float(mb))
+                                      for point, mb in memory.items())
+            self.memory_fits = _fit_flags(self.memory)
+
+    @classmethod
+    def from_store(cls, filename):
+        """
+        Fit a model to the samples in a result store.
+
+        Parameters
+        ----------
+        filename : str
+            Directory of the result store.
+
+        Returns
+        -------
+        <CostModel>
+            Fitted model.
+        """
+        _, raw = read_store(filename, 'samples', mmap=False)
+        names = raw.dtype.names
+
+        run_time = np.zeros(len(raw))
+        for name in RUN_COLUMNS:
+            if name in names:
+                run_time += raw[name]
+
+        totals = OrderedDict()
+        for row, t in zip(raw, run_time):
+            point = (int(row['ndv']), int(row['nstate']), int(row['nproc']), bool(row['flag']))
+            totals.setdefault(point, []).append(t)
+
+        measured = OrderedDict((point, np.mean(times)) for point, times in totals.items())
+
+        memory = OrderedDict()
+        peaks = ['mem_%s_peak' % phase for phase in MEMORY_PHASES]
+        if all(name + '_rank_max' in names for name in peaks):
+            peaks = [name + '_rank_max' for name in peaks]
+        if all(name in names for name in peaks):
+            rank_peak = np.max([raw[name] for name in peaks], axis=0)
+            for row, mb in zip(raw, rank_peak):
+                point = (int(row['ndv']), int(row['nstate']), int(row['nproc']),
+                         bool(row['flag']))
+                memory[point] = max(memory.get(point, 0.0), mb)
+
+        # The launch records of batched campaigns are the best measure of startup; otherwise use
+        # what each process recorded.
+        startup = DEFAULT_STARTUP
+        if 'launches' in read_meta(filename)['tables']:
+            _, launches = read_store(filename, 'launches', mmap=False)
+            startup = float(np.max(launches['t_mpi_init'] + launches['t_import']))
+        elif 't_interp' in names and 't_import' in names:
+            startup = float(np.max(raw['t_interp'] + raw['t_import']))
+
+        return cls(measured, startup=startup, memory=memory)
+
+    def exponents(self, flag=None):
+        """
+        Return the fitted scaling exponent of each size coordinate.
+
+        Parameters
+        ----------
+        flag : bool or None
+            Flag value of the fit, or None for the fit to all points.
+
+        Returns
+        -------
+        OrderedDict or None
+            Exponent of ndv, nstate, and nproc, or None if there was nothing to fit.
+        """
+        fit = self.fits.get(flag, self.fits[None])
+        if fit is None:
+            return None
+
+        return OrderedDict(zip(SIZE_COORDS, fit[1]))
+
+    def predict(self, ndv, nstate, nproc, flag):
+        """
+        Return the expected time of one repetition of a point.
+
+        Parameters
+        ----------
+        ndv : int
+            Number of design variables.
+        nstate : int
+            Number of states.
+        nproc : int
+            Number of processors.
+        flag : bool
+            User flag.
+
+        Returns
+        -------
+        float or None
+            Time in seconds, or None if the point wasn't measured and there was nothing to fit.
+        """
+        return _predict(self.measured, self.fits, SweepPoint(ndv, nstate, nproc, bool(flag)))
+
+    def predict_memory(self, ndv, nstate, nproc, flag):
+        """
+        Return the expected peak memory of one rank at a point.
+
+        Parameters
+        ----------
+        ndv : int
+            Number of design variables.
+        nstate : int
+            Number of states.
+        nproc : int
+            Number of processors.
+        flag : bool
+            User flag.
+
+        Returns
+        -------
+        float or None
+            Memory in MB, or None if the earlier run didn't record memory or there was nothing to
+            fit.
+        """
+        if not self.memory:
+            return None
+
+        return _predict(self.memory, self.memory_fits,
+                        SweepPoint(ndv, nstate, nproc, bool(flag)))
+
+    def launch_time(self, points, num_warmup=0):
+        """
+        Return the expected time of a launch that runs the given points one after another.
+
+        Parameters
+        ----------
+        points : list of tuple
+            (ndv, nstate, nproc, flag, ...) of every point the launch runs.
+        num_warmup : int
+            Number of discarded runs made before each timed run.
+
+        Returns
+        -------
+        float or None
+            Time in seconds, or None if a point can't be predicted.
+        """
+        times = [self.predict(*point[:4]) for point in points]
+        if None in times:
+            return None
+
+        return self.startup + (1 + num_warmup) * sum(times)
+
+
+def _fit_flags(measured):
+    """
+    Fit the measured values of each flag, and of all points together.
+
+    Parameters
+    ----------
+    measured : dict
+        Measured values, keyed by SweepPoint.
+
+    Returns
+    -------
+    dict
+        (log c, exponents) for each flag value that has a fit, and for None. The fit for None is
+        None if no value is above 0.
+    """
+    fits = {None: _fit(measured)}
+    for flag in (False, True):
+        subset = dict((point, value) for point, value in measured.items() if point.flag == flag)
+        fit = _fit(subset)
+        if fit is not None:
+            fits[flag] = fit
+
+    return fits
+
+
+def _predict(measured, fits, point):
+    """
+    Return the measured value at a point, or the value of the fit for its flag.
+
+    Parameters
+    ----------
+    measured : dict
+        Measured values, keyed by SweepPoint.
+    fits : dict
+        Fits returned by _fit_flags.
+    point : SweepPoint
+        Point to predict.
+
+    Returns
+    -------
+    float or None
+        Predicted value, or None if the point wasn't measured and there is no fit.
+    """
+    if point in measured:
+        return measured[point]
+
+    fit = fits.get(point.flag, fits[None])
+    if fit is None:
+        return None
+
+    log_c, exps = fit
+    return math.exp(log_c + sum(e * math.log(x) for e, x in zip(exps, point[:3])))
+
+
+def _fit(measured):
+    """
+    Fit log t = log c + sum(e_i * log x_i) over the coordinates that vary.
+
+    Parameters
+    ----------
+    measured : dict
+        Measured values, e.g., mean times in seconds, keyed by SweepPoint.
+
+    Returns
+    -------
+    tuple or None
+        Log of the coefficient c, and the exponent of ndv, nstate, and nproc. Coordinates that
+        don't vary get 0. None if no value is above 0, so there is nothing to fit.
+    """
+    points = [point for point, t in measured.items() if t > 0.0]
+    if not points:
+        return None
+
+    logt = np.log([measured[point] for point in points])
+    logx = np.log(np.array([point[:3] for point in points], dtype=float))
+
+    varied = [i for i in range(len(SIZE_COORDS)) if len(set(logx[:, i])) > 1]
+
+    # Keep the system overdetermined by at least one point, dropping the coordinates that vary
+    # least.
+    varied.sort(key=lambda i: -np.ptp(logx[:, i]))
+    varied = sorted(varied[:max(0, len(points) - 2)])
+
+    exps = [0.0] * len(SIZE_COORDS)
+    if not varied:
+        return float(np.mean(logt)), exps
+
+    matrix = np.column_stack([np.ones(len(points))] + [logx[:, i] for i in varied])
+    coefs = np.linalg.lstsq(matrix, logt, rcond=None)[0]
+
+    for i, coef in zip(varied, coefs[1:]):
+        exps[i] = float(coef)
+
+    return float(coefs[0]), exps
+
+
+def walltime_hours(seconds, margin=2.0):
+    """
+    Return the walltime to request for a job, in whole hours.
+
+    Parameters
+    ----------
+    seconds : float
+        Expected runtime of the job.
+    margin : float
+        Factor applied to the expected runtime.
+
+    Returns
+    -------
+    int
+        Hours, at least 1.
+    """
+    return max(1, int(math.ceil(seconds * margin / 3600.0)))
+
+
+def campaign_report(rows):
+    """
+    Return a table of the jobs of a campaign and the core-hours they request.
+
+    Parameters
+    ----------
+    rows : list of tuple
+        (name, charged cores, npoints, expected seconds or None, walltime in hours) of every job.
+
+    Returns
+    -------
+    str
+        Report.
+    float
+        Total core-hours requested.
+    """
+    lines = ['%-40s %6s %7s %12s %9s %11s' % ('job', 'cores', 'points', 'expected [s]',
+                                              'walltime', 'core-hours')]
+
+    total = 0.0
+    expected = 0.0
+    for name, cores, npoints, seconds, hours in rows:
+        core_hours = cores * hours
+        total += core_hours
+        if seconds is None:
+            seconds_txt = '-'
+        else:
+            seconds_txt = '%.1f' % seconds
+            expected += cores * seconds / 3600.0
+        lines.append('%-40s %6d %7d %12s %8dh %11.1f' % (name, cores, npoints, seconds_txt, hours,
+                                                         core_hours))
+
+    lines.append('Total: %d jobs, %.1f core-hours requested' % (len(rows), total))
+    if any(row[3] is not None for row in rows):
+        lines.append('Expected use: %.2f core-hours' % expected)
+
+    return '\n'.join(lines), total
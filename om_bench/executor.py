@@ -0,0 +1,174 @@
+"""
+Executor that runs each benchmark repetition in its own fresh worker process.
+"""
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+import traceback
+
+
+def _available_cores():
+    """
+    Return the list of cores that this process is allowed to run on.
+
+    Returns
+    -------
+    list of int
+        Core ids.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+
+    return list(range(multiprocessing.cpu_count()))
+
+
+def _worker(bench, point, core, conn):
+    """
+    Run a single repetition of a point and send the timings back to the parent.
+
+    Parameters
+    ----------
+    bench : <Bench>
+        Benchmark instance, unpickled fresh in this process.
+    point : SweepPoint
+        Point to run.
+    core : int or None
+        Core to pin this process to, or None to leave placement to the OS.
+    conn : Connection
+        Pipe used to send the result (or the error) back to the parent.
+    """
+    try:
+        if core is not None and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, [core])
+
+        result = bench._sample(ndv=point.ndv, nstate=point.nstate, nproc=point.nproc,
+                               flag=point.flag, num_averages=1, adaptive=False)[0]
+        conn.send((True, result))
+
+    except Exception:
+        conn.send((False, traceback.format_exc()))
+
+    conn.close()
+
+
+class IsolatedExecutor(object):
+    """
+    Run benchmark repetitions in fresh worker processes.
+
+    Each (point, repetition) gets its own interpreter, so garbage left behind by earlier problems
+    can't leak into later timings. Points whose estimated cost is at or below a limit may share
+    the node with other cheap points; anything more expensive runs alone.
+
+    Attributes
+    ----------
+    cost_limit : float or None
+        Largest estimated cost that may run concurrently with other points. None means that all
+        points may run concurrently.
+    max_workers : int
+        Maximum number of worker processes that run at the same time.
+    pin : bool
+        If True, pin each worker to its own core.
+    _context : multiprocessing context
+        Context used to create the workers. The 'spawn' method is used so that every worker is a
+        brand new interpreter.
+    """
+
+    def __init__(self, max_workers=1, pin=True, cost_limit=None):
+        """
+        Initialize the executor.
+
+        Parameters
+        ----------
+        max_workers : int
+            Maximum number of worker processes that run at the same time.
+        pin : bool
+            If True, pin each worker to its own core.
+        cost_limit : float or None
+            Largest estimated cost that may run concurrently with other points.
+        """
+        self.max_workers = max_workers
+        self.pin = pin
+        self.cost_limit = cost_limit
+
+        if hasattr(multiprocessing, 'get_context'):
+            self._context = multiprocessing.get_context('spawn')
+        else:
+            self._context = multiprocessing
+
+    def run(self, bench, tasks, callback=None):
+        """
+        Run all tasks and return their results.
+
+        Parameters
+        ----------
+        bench : <Bench>
+            Benchmark instance. It is pickled into every worker.
+        tasks : list of tuple
+            List of (point, repetition, cost) in the order they should be started.
+        callback : callable or None
+            Function called with the index of each task and its result as soon as it finishes.
+
+        Returns
+        -------
+        list
+            Timed sample for each task, in the same order as tasks.
+        """
+        free_cores = _available_cores()
+        max_workers = max(1, min(self.max_workers, len(free_cores)))
+        if not self.pin:
+            free_cores = [None] * max_workers
+
+        results = [None] * len(tasks)
+        pending = list(enumerate(tasks))
+        running = {}
+        exclusive = False
+
+        while pending or running:
+
+            # Start as many tasks as we are allowed to.
+            while pending and len(running) < max_workers and not exclusive:
+                i, (point, rep, cost) = pending[0]
+
+                alone = self.cost_limit is not None and cost > self.cost_limit
+                if alone and running:
+                    break
+
+                pending.pop(0)
+                core = free_cores.pop(0)
+
+                print('Running: dv=%d, state=%d, proc=%d, flag=%s, av=%d' % (tuple(point[:4]) +
+                                                                           (rep, )))
+
+                parent_conn, child_conn = self._context.Pipe(duplex=False)
+                proc = self._context.Process(target=_worker,
+                                             args=(bench, point, core, child_conn))
+                proc.start()
+                child_conn.close()
+
+                running[parent_conn] = (i, proc, core)
+                exclusive = alone
+
+            # Wait for something to finish.
+            for conn in wait(list(running.keys())):
+                i, proc, core = running.pop(conn)
+                try:
+                    success, result = conn.recv()
+                except EOFError:
+                    success, result = False, 'Worker exited with code %s' % proc.exitcode
+
+                proc.join()
+                free_cores.append(core)
+                exclusive = False
+
+                if not success:
+                    for other_conn, (_, other, _) in running.items():
+                        other.terminate()
+                    point, rep, _ = tasks[i]
+                    msg = 'Benchmark point %s, repetition %d failed:\n%s' % (point, rep, result)
+                    raise RuntimeError(msg)
+
+                results[i] = result
+                if callback is not None:
+                    callback(i, result)
+
+        return results
@@ -0,0 +1,155 @@
+"""
+Expensive benchmark inputs that are computed once per process and optionally cached on disk.
+"""
+from functools import wraps
+import hashlib
+import inspect
+import marshal
+import os
+import pickle
+from time import time
+
+
+# Fixture values computed in this process, keyed by the hash of their arguments.
+_cache = {}
+
+
+def _fixture_key(func, args, kwargs):
+    """
+    Return a key that identifies a fixture call.
+
+    The key covers the function's qualified name, its source (so that editing a fixture, including
+    only a constant in it, invalidates the cache), and its arguments. If the source can't be read,
+    the compiled code with its constants is used instead.
+
+    Parameters
+    ----------
+    func : callable
+        Undecorated fixture method.
+    args : tuple
+        Positional arguments, not counting self.
+    kwargs : dict
+        Keyword arguments.
+
+    Returns
+    -------
+    str
+        Hex digest.
+    """
+    module = func.__module__
+    if module == '__mp_main__':
+        # Main script, as imported by a multiprocessing worker.
+        module = '__main__'
+    name = '%s.%s' % (module, getattr(func, '__qualname__', func.__name__))
+
+    try:
+        code = inspect.getsource(func)
+    except (IOError, OSError, TypeError):
+        code = marshal.dumps(func.__code__)
+
+    data = pickle.dumps((name, code, args, sorted(kwargs.items())), protocol=2)
+
+    return hashlib.sha1(data).hexdigest()
+
+
+def fixture(func=None, persist=False):
+    """
+    Decorate a Bench method that computes an expensive input to the model.
+
+    The first call with a given set of arguments computes the value. Later calls in the same
+    process return the same object, so it must not be modified by the model. With persist=True,
+    the value is also pickled to the Bench's fixture_dir, and later processes load it from there
+    instead of computing it. The time spent computing or loading fixtures is saved in the
+    t_fixtures column.
+
+    Can be used bare (@fixture) or with arguments (@fixture(persist=True)).
+
+    Parameters
+    ----------
+    func : callable or None
+        Method to decorate.
+    persist : bool
+        If True, cache the value on disk, keyed by the arguments. The arguments and the value
+        must be picklable.
+
+    Returns
+    -------
+    callable
+        Decorated method, or a decorator if func is None.
+    """
+    if func is None:
+        return lambda func: fixture(func, persist=persist)
+
+    @wraps(func)
+    def cached(self, *args, **kwargs):
+        key = _fixture_key(func, args, kwargs)
+        if key in _cache:
+            return _cache[key]
+
+        t0 = time()
+
+        filename = None
+        if persist:
+            filename = os.path.join(self._fixture_dir(), '%s_%s.pkl' % (func.__name__, key))
+
+        if filename is not None and os.path.exists(filename):
+            with open(filename, 'rb') as infile:
+                value = pickle.load(infile)
+
+        else:
+            value = func(self, *args, **kwargs)
+
+            if filename is not None:
+                _save_fixture(filename, value)
+
+        _cache[key] = value
+        self._fixture_time += time() - t0
+
+        return value
+
+    return cached
+
+
+def _save_fixture(filename, value):
+    """
+    Pickle a fixture value to disk.
+
+    The file is written under a temporary name and moved into place, so that other processes
+    (e.g., other mpi ranks) never read a partial file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the cache file.
+    value : object
+        Value to save.
+    """
+    directory = os.path.dirname(filename)
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            # Another process got there first.
+            pass
+
+    tmp_name = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmp_name, 'wb') as outfile:
+        pickle.dump(value, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+    os.rename(tmp_name, filename)
+
+
+def clear_fixtures(directory=None):
+    """
+    Forget the fixtures computed in this process, and optionally remove a disk cache.
+
+    Parameters
+    ----------
+    directory : str or None
+        Fixture cache directory to empty.
+    """
+    _cache.clear()
+
+    if directory is not None and os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            if filename.endswith('.pkl'):
+                os.remove(os.path.join(directory, filename))
@@ -0,0 +1,196 @@
+"""
+Registry of the node types that jobs run on, and the node layout of a job on each of them.
+
+A profile gives the number of cores and the memory of one node, and the model string that the
+scheduler knows the node type by. The profiles of the Pleiades node types are registered here;
+others can be added with register_profile.
+"""
+from collections import namedtuple
+
+
+class HardwareProfile(namedtuple('HardwareProfile', ['name', 'cores_per_node', 'mem_per_node',
+                                                     'model'])):
+    """
+    Description of one node type.
+
+    Attributes
+    ----------
+    name : str
+        Name of the profile.
+    cores_per_node : int
+        Number of cores on each node.
+    mem_per_node : float
+        Memory of each node that jobs can use, in GB.
+    model : str or None
+        Model string of the node type, as requested from the scheduler.
+    """
+
+    __slots__ = ()
+
+    def layout(self, nproc, ranks_per_node=None):
+        """
+        Return the nodes that a job of nproc ranks runs on.
+
+        The job gets as few nodes as its ranks fit on, and the ranks are spread evenly over them,
+        so that no node is left nearly empty.
+
+        Parameters
+        ----------
+        nproc : int
+            Number of ranks.
+        ranks_per_node : int or None
+            Largest number of ranks on one node. Default is None, which uses every core.
+
+        Returns
+        -------
+        list of (int, int)
+            Number of nodes and the ranks on each of them, for every group of identical nodes.
+        """
+        per_node = self.cores_per_node
+        if ranks_per_node is not None:
+            per_node = max(1, min(per_node, int(ranks_per_node)))
+
+        nodes = -(-int(nproc) // per_node)
+        ranks, extra = divmod(int(nproc), nodes)
+
+        chunks = []
+        if extra:
+            chunks.append((extra, ranks + 1))
+        if nodes > extra:
+            chunks.append((nodes - extra, ranks))
+
+        return chunks
+
+    def nodes(self, nproc, ranks_per_node=None):
+        """
+        Return the number of nodes that a job of nproc ranks runs on.
+
+        Parameters
+        ----------
+        nproc : int
+            Number of ranks.
+        ranks_per_node : int or None
+            Largest number of ranks on one node. Default is None, which uses every core.
+
+        Returns
+        -------
+        int
+            Number of nodes.
+        """
+        return sum(count for count, _ in self.layout(nproc, ranks_per_node))
+
+    def select(self, nproc, ranks_per_node=None, nthread=None):
+        """
+        Return the PBS node selection for a job of nproc ranks.
+
+        Every node is requested whole, with mpiprocs set to the ranks placed on it, and
+        ompthreads to the threads of each rank.
+
+        Parameters
+        ----------
+        nproc : int
+            Number of ranks.
+        ranks_per_node : int or None
+            Largest number of ranks on one node. Default is None, which uses every core.
+        nthread : int or None
+            Number of threads per rank. Default is None, which leaves it to the environment.
+
+        Returns
+        -------
+        str
+            Selection, as given to '-l select=', e.g., '5:ncpus=28:mpiprocs=28:model=bro'.
+        """
+        chunks = []
+        for count, ranks in self.layout(nproc, ranks_per_node):
+            chunk = '%d:ncpus=%d:mpiprocs=%d' % (count, self.cores_per_node, ranks)
+            if nthread is not None:
+                chunk += ':ompthreads=%d' % nthread
+            if self.model is not None:
+                chunk += ':model=%s' % self.model
+            chunks.append(chunk)
+
+        return '+'.join(chunks)
+
+    def ranks_per_node(self, mem_per_rank):
+        """
+        Return the largest number of ranks that fit in the memory of one node.
+
+        Parameters
+        ----------
+        mem_per_rank : float
+            Memory used by one rank, in MB.
+
+        Returns
+        -------
+        int
+            Number of ranks, at most cores_per_node. 0 if a single rank doesn't fit.
+        """
+        if mem_per_rank <= 0.0:
+            return self.cores_per_node
+
+        return min(self.cores_per_node, int(self.mem_per_node * 1024.0 // mem_per_rank))
+
+
+# Registered profiles, keyed by name.
+PROFILES = {}
+
+
+def register_profile(name, cores_per_node, mem_per_node, model=None):
+    """
+    Add a node type to the registry, replacing any profile with the same name.
+
+    Parameters
+    ----------
+    name : str
+        Name of the profile.
+    cores_per_node : int
+        Number of cores on each node.
+    mem_per_node : float
+        Memory of each node that jobs can use, in GB.
+    model : str or None
+        Model string of the node type, as requested from the scheduler.
+
+    Returns
+    -------
+    <HardwareProfile>
+        The new profile.
+    """
+    profile = HardwareProfile(name, int(cores_per_node), float(mem_per_node), model)
+    PROFILES[name] = profile
+
+    return profile
+
+
+def get_profile(hardware):
+    """
+    Return a hardware profile.
+
+    Parameters
+    ----------
+    hardware : str or <HardwareProfile>
+        Name of a registered profile, or a profile.
+
+    Returns
+    -------
+    <HardwareProfile>
+        The profile.
+    """
+    if isinstance(hardware, HardwareProfile):
+        return hardware
+
+    try:
+        return PROFILES[hardware]
+    except KeyError:
+        msg = "Unknown hardware profile '%s'. Known profiles are: %s." % \
+            (hardware, ', '.join(sorted(PROFILES)))
+        raise KeyError(msg)
+
+
+# Pleiades node types. Memory is what a job can use, a little under what the node has.
+register_profile('san', 16, 30.0, 'san')
+register_profile('ivy', 20, 62.0, 'ivy')
+register_profile('has', 24, 122.0, 'has')
+register_profile('bro', 28, 122.0, 'bro')
+register_profile('sky_ele', 40, 182.0, 'sky_ele')
+register_profile('cas_ait', 40, 182.0, 'cas_ait')
+register_profile('rom_ait', 128, 500.0, 'rom_ait')
@@ -0,0 +1,250 @@
+"""
+Campaign manifest: a record of every batch job of an mpi campaign, its points and its job ID.
+
+The manifest is a json file next to the job spec, e.g. '_beam_state_nl_ln_manifest.json':
+
+    {
+      "format": 1,
+      "jobs": {
+        "_beam_state_nl_ln_1_4_1_False_0": {
+          "nproc": 1,
+          "points": [[1, 4, 1, false, 0]],
+          "scheduler": "PBSScheduler",
+          "job_id": "1234567.pbspl1",
+          "status": "submitted",
+          ...
+        }
+      }
+    }
+
+Jobs keep their entry when they are submitted again; earlier job IDs are kept in 'history'.
+"""
+from collections import OrderedDict
+import json
+import os
+import time
+
+
+# Version of the manifest layout.
+MANIFEST_FORMAT = 1
+
+# Status of a job whose script was written but not submitted.
+WRITTEN = 'written'
+
+# Status of a job that the scheduler accepted.
+SUBMITTED = 'submitted'
+
+# Status of a job that is waiting in the queue.
+QUEUED = 'queued'
+
+# Status of a job that is running.
+RUNNING = 'running'
+
+# Status of a job that the scheduler refused, or that failed.
+FAILED = 'failed'
+
+# Status of a job that ran to the end.
+COMPLETED = 'completed'
+
+
+def manifest_filename(stem):
+    """
+    Return the name of the manifest of a campaign.
+
+    Parameters
+    ----------
+    stem : str
+        Stem of the campaign's files, e.g. '_beam_state_nl_ln'.
+
+    Returns
+    -------
+    str
+        Name of the manifest file.
+    """
+    return '%s_manifest.json' % stem
+
+
+def result_name(stem, point):
+    """
+    Return the name of the results of one point of a campaign, without extension.
+
+    Parameters
+    ----------
+    stem : str
+        Stem of the campaign's files, e.g. '_beam_state_nl_ln'.
+    point : list
+        (ndv, nstate, nproc, flag, average) of the point.
+
+    Returns
+    -------
+    str
+        Name of the results.
+    """
+    ndv, nstate, nproc, flag, average = point
+    return '%s_%d_%d_%d_%s_%d' % (stem, ndv, nstate, nproc, str(bool(flag)), average)
+
+
+class Manifest(object):
+    """
+    Record of the batch jobs of a campaign.
+
+    Attributes
+    ----------
+    filename : str
+        Name of the manifest file.
+    jobs : OrderedDict
+        Entry of every job, keyed by job name.
+    stem : str
+        Stem of the campaign's files.
+    """
+
+    def __init__(self, filename):
+        """
+        Load a manifest, or start an empty one if the file doesn't exist.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the manifest file.
+        """
+        self.filename = filename
+        self.stem = os.path.basename(filename)[:-len(manifest_filename(''))]
+        self.jobs = OrderedDict()
+
+        if os.path.exists(filename):
+            with open(filename, 'r') as infile:
+                data = json.load(infile, object_pairs_hook=OrderedDict)
+            self.jobs = data['jobs']
+
+    def save(self):
+        """
+        Write the manifest.
+
+        The file is written under a temporary name and moved into place, so that tools reading it
+        never see a partial file.
+        """
+        data = OrderedDict()
+        data['format'] = MANIFEST_FORMAT
+        data['jobs'] = self.jobs
+
+        tmp_name = '%s.%d.tmp' % (self.filename, os.getpid())
+        with open(tmp_name, 'w') as outfile:
+            json.dump(data, outfile, indent=2)
+        os.rename(tmp_name, self.filename)
+
+    def record(self, name, nproc, points, scheduler, job_id, status, attempts=0, message=None,
+               retries=0):
+        """
+        Record the submission of a job.
+
+        Parameters
+        ----------
+        name : str
+            Name of the job.
+        nproc : int
+            Largest number of processors the job uses.
+        points : list of tuple
+            (ndv, nstate, nproc, flag, average) of every point the job runs.
+        scheduler : str
+            Name of the scheduler class.
+        job_id : str or None
+            ID that the scheduler gave the job.
+        status : str
+            Status of the job.
+        attempts : int
+            Number of submit attempts.
+        message : str or None
+            Output of the scheduler, kept when the submission failed.
+        retries : int
+            Number of times the job has been submitted again after failing.
+        """
+        entry = self.jobs.get(name)
+        if entry is None:
+            entry = OrderedDict()
+            entry['history'] = []
+            self.jobs[name] = entry
+        elif entry.get('job_id') is not None:
+            entry['history'].append(entry['job_id'])
+
+        entry['nproc'] = int(nproc)
+        entry['points'] = [[int(ndv), int(nstate), int(procs), bool(flag), int(average)]
+                           for ndv, nstate, procs, flag, average in points]
+        entry['scheduler'] = scheduler
+        entry['job_id'] = job_id
+        entry['status'] = status
+        entry['time'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        entry['attempts'] = attempts
+        entry['message'] = message
+        entry['retries'] = retries
+
+        # Keep history last, for readability.
+        entry['history'] = entry.pop('history')
+
+    def find(self, ndv=None, nstate=None, nproc=None, flag=None, average=None):
+        """
+        Return the jobs that run the points matching the given coordinates.
+
+        Parameters
+        ----------
+        ndv : int or None
+            Number of design variables, or None to match any.
+        nstate : int or None
+            Number of states, or None to match any.
+        nproc : int or None
+            Number of processors, or None to match any.
+        flag : bool or None
+            User flag, or None to match any.
+        average : int or None
+            Repetition, or None to match any.
+
+        Returns
+        -------
+        list of (str, dict)
+            Name and entry of every matching job.
+        """
+        wanted = (ndv, nstate, nproc, flag, average)
+
+        found = []
+        for name, entry in self.jobs.items():
+            for point in entry['points']:
+                if all(value is None or value == coord for value, coord in zip(wanted, point)):
+                    found.append((name, entry))
+                    break
+
+        return found
+
+    def missing_points(self, name):
+        """
+        Return the points of a job whose results haven't been written.
+
+        Parameters
+        ----------
+        name : str
+            Name of the job.
+
+        Returns
+        -------
+        list of list
+            (ndv, nstate, nproc, flag, average) of every missing point.
+        """
+        directory = os.path.dirname(self.filename)
+        return [point for point in self.jobs[name]['points']
+                if not os.path.exists(os.path.join(directory,
+                                                   '%s.dat' % result_name(self.stem, point)))]
+
+    def with_status(self, *statuses):
+        """
+        Return the jobs that have one of the given statuses.
+
+        Parameters
+        ----------
+        *statuses : str
+            Statuses to match.
+
+        Returns
+        -------
+        list of (str, dict)
+            Name and entry of every matching job.
+        """
+        return [(name, entry) for name, entry in self.jobs.items()
+                if entry['status'] in statuses]
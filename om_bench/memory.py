@@ -0,0 +1,146 @@
+"""
+Measurement of process memory (resident set size) around benchmark phases.
+"""
+from collections import OrderedDict
+import resource
+import sys
+
+
+# Phases that are probed, in the order they run.
+MEMORY_PHASES = ('setup', 'run_model', 'run_driver', 'compute_totals')
+
+
+def _read_status():
+    """
+    Return the current and peak resident set size of this process in MB.
+
+    On Linux these come from /proc/self/status. Elsewhere, only the peak is available, and it is
+    returned for both.
+
+    Returns
+    -------
+    float
+        Current resident set size.
+    float
+        Peak resident set size.
+    """
+    try:
+        with open('/proc/self/status') as infile:
+            status = infile.read()
+    except (IOError, OSError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            # Reported in bytes instead of kB.
+            peak /= 1024.0
+        return peak / 1024.0, peak / 1024.0
+
+    values = {}
+    for line in status.splitlines():
+        key, _, value = line.partition(':')
+        if key in ('VmRSS', 'VmHWM'):
+            values[key] = float(value.split()[0]) / 1024.0
+
+    return values['VmRSS'], values['VmHWM']
+
+
+def _reset_peak():
+    """
+    Reset the peak resident set size of this process, if the OS allows it.
+
+    Returns
+    -------
+    bool
+        True if the peak was reset.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as outfile:
+            outfile.write('5')
+    except (IOError, OSError):
+        return False
+
+    return True
+
+
+class MemoryProbe(object):
+    """
+    Record peak resident set size and its change over each benchmark phase.
+
+    When the OS can't reset the peak between phases (anything but Linux), the peak recorded for a
+    phase is the peak of the process up to the end of that phase.
+
+    Attributes
+    ----------
+    deltas : OrderedDict
+        Change in resident set size over each phase, in MB.
+    peaks : OrderedDict
+        Peak resident set size during each phase, in MB.
+    _phase : str or None
+        Phase currently being probed.
+    _start : float
+        Resident set size at the start of the current phase.
+    """
+
+    def __init__(self):
+        """
+        Initialize the probe.
+        """
+        self.peaks = OrderedDict((phase, 0.0) for phase in MEMORY_PHASES)
+        self.deltas = OrderedDict((phase, 0.0) for phase in MEMORY_PHASES)
+        self._phase = None
+        self._start = 0.0
+
+    def start(self, phase):
+        """
+        Start probing a phase.
+
+        Parameters
+        ----------
+        phase : str
+            Name of the phase.
+        """
+        _reset_peak()
+        self._phase = phase
+        self._start, _ = _read_status()
+
+    def stop(self):
+        """
+        Stop probing the current phase and record its memory use.
+        """
+        rss, peak = _read_status()
+        self.peaks[self._phase] = peak
+        self.deltas[self._phase] = rss - self._start
+        self._phase = None
+
+    def values(self):
+        """
+        Return the peaks and deltas recorded on this rank.
+
+        Returns
+        -------
+        list of float
+            Values in the order given by memory_columns.
+        """
+        values = []
+        for phase in MEMORY_PHASES:
+            values.extend([self.peaks[phase], self.deltas[phase]])
+
+        return values
+
+
+def memory_columns():
+    """
+    Return the names of the memory columns written for each point.
+
+    For every phase, the peak and delta of a single rank. Under MPI, their minimum, maximum, mean
+    and total over all ranks are saved along with the timings' rank statistics.
+
+    Returns
+    -------
+    list of str
+        Column names.
+    """
+    columns = []
+    for phase in MEMORY_PHASES:
+        columns.extend(['mem_%s_peak' % phase, 'mem_%s_delta' % phase])
+
+    return columns
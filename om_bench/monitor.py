@@ -0,0 +1,285 @@
+"""
+Monitor for an mpi campaign: tracks its jobs, resubmits failures and assembles the results.
+
+Usage:
+
+    python -m om_bench.monitor _beam_state_nl_ln_manifest.json [--interval 300] [--max-retries 2]
+        [--walltime-factor 2] [--title 'Beam Problem'] [--once]
+
+The monitor polls the campaign manifest, the results files and the scheduler. A job that has left
+the queue without writing the results of all of its points is failed, and is submitted again
+(with its walltime multiplied by walltime-factor) until it has been retried max-retries times.
+Jobs whose scripts were written but never submitted are submitted. Once every point has results,
+the results are assembled into a result store, and plotted with BenchPost if a title is given.
+
+The exit status is 0 when the campaign is complete, and 1 if points are still missing after every
+retry.
+"""
+import argparse
+import os
+import sys
+import time
+
+from om_bench.manifest import COMPLETED, FAILED, QUEUED, RUNNING, SUBMITTED, WRITTEN, Manifest
+from om_bench.scheduler import LocalScheduler, PBSScheduler, SlurmScheduler
+from om_bench.store import STORE_EXT
+
+
+# Scheduler classes that can be named in a manifest.
+SCHEDULERS = {
+    'PBSScheduler': PBSScheduler,
+    'SlurmScheduler': SlurmScheduler,
+    'LocalScheduler': LocalScheduler,
+}
+
+
+class CampaignMonitor(object):
+    """
+    Follow the jobs of a campaign to completion.
+
+    Attributes
+    ----------
+    manifest : <Manifest>
+        Manifest of the campaign.
+    max_retries : int
+        Largest number of times a failed job is submitted again.
+    scheduler : <Scheduler>
+        Scheduler that the jobs are submitted to.
+    title : str or None
+        Title given to BenchPost once the results are assembled. If None, nothing is plotted.
+    walltime_factor : float
+        Factor applied to the walltime of a job every time it is submitted again.
+    """
+
+    def __init__(self, manifest_file, scheduler=None, max_retries=2, walltime_factor=1.0,
+                 title=None):
+        """
+        Initialize the monitor.
+
+        Parameters
+        ----------
+        manifest_file : str
+            Name of the campaign manifest.
+        scheduler : <Scheduler> or None
+            Scheduler that the jobs are submitted to. Default is None, which uses the class named
+            in the manifest, with its default settings.
+        max_retries : int
+            Largest number of times a failed job is submitted again.
+        walltime_factor : float
+            Factor applied to the walltime of a job every time it is submitted again.
+        title : str or None
+            Title given to BenchPost once the results are assembled.
+        """
+        self.manifest = Manifest(manifest_file)
+        self.max_retries = max_retries
+        self.walltime_factor = walltime_factor
+        self.title = title
+
+        if scheduler is None:
+            names = set(entry['scheduler'] for entry in self.manifest.jobs.values())
+            scheduler = SCHEDULERS[names.pop() if names else 'PBSScheduler']()
+        self.scheduler = scheduler
+
+    def update(self, query=True):
+        """
+        Bring the status of every job up to date.
+
+        Jobs whose points all have results are completed. A submitted job that has left the queue
+        without them is failed. If the scheduler can't be asked, queued and running jobs keep
+        their status.
+
+        Parameters
+        ----------
+        query : bool
+            If False, only look at the results, and don't ask the scheduler.
+        """
+        states = None
+        if query:
+            active = [entry['job_id'] for name, entry in
+                      self.manifest.with_status(SUBMITTED, QUEUED, RUNNING)]
+            states = self.scheduler.job_states(active)
+
+        for name, entry in self.manifest.jobs.items():
+            missing = self.manifest.missing_points(name)
+
+            if not missing:
+                entry['status'] = COMPLETED
+
+            elif entry['status'] == COMPLETED:
+                # Results were removed since the last check.
+                entry['status'] = FAILED
+                entry['message'] = 'results of %d points are missing' % len(missing)
+
+            elif entry['status'] in (SUBMITTED, QUEUED, RUNNING) and states is not None:
+                if entry['job_id'] in states:
+                    entry['status'] = states[entry['job_id']]
+                else:
+                    entry['status'] = FAILED
+                    entry['message'] = 'left the queue without results for %d points' % \
+                        len(missing)
+
+    def resubmit(self):
+        """
+        Submit the jobs that failed and have retries left, and the jobs that were never submitted.
+
+        Returns
+        -------
+        int
+            Number of jobs submitted.
+        """
+        jobs = []
+        for name, entry in self.manifest.jobs.items():
+            if entry['status'] == WRITTEN:
+                jobs.append(name)
+
+            elif entry['status'] == FAILED and entry.get('retries', 0) < self.max_retries:
+                print('Retrying:', name, '(%s)' % entry['message'])
+                entry['retries'] = entry.get('retries', 0) + 1
+                if self.walltime_factor != 1.0:
+                    self.scheduler.extend_walltime(name, self.walltime_factor)
+                jobs.append(name)
+
+        if not jobs:
+            return 0
+
+        results = self.scheduler.submit([(name, self.manifest.jobs[name]['nproc'])
+                                         for name in jobs])
+
+        for name, (job_id, status, attempts, message) in results.items():
+            entry = self.manifest.jobs[name]
+            self.manifest.record(name, entry['nproc'], entry['points'],
+                                 type(self.scheduler).__name__, job_id, status,
+                                 attempts=attempts, message=message,
+                                 retries=entry.get('retries', 0))
+
+        return len(jobs)
+
+    def poll(self):
+        """
+        Update the campaign once, and submit whatever needs to be.
+
+        Returns
+        -------
+        str
+            'complete' if every point has results, 'failed' if points are missing and no job
+            can be retried, and otherwise 'running'.
+        """
+        self.update()
+        self.resubmit()
+
+        # Jobs that LocalScheduler just ran have their results already.
+        self.update(query=False)
+        self.manifest.save()
+
+        counts = {}
+        for entry in self.manifest.jobs.values():
+            counts[entry['status']] = counts.get(entry['status'], 0) + 1
+        print(time.strftime('%H:%M:%S'),
+              ', '.join('%s: %d' % item for item in sorted(counts.items())))
+
+        if counts.get(COMPLETED, 0) == len(self.manifest.jobs):
+            return 'complete'
+
+        waiting = [name for name, entry in self.manifest.jobs.items()
+                   if entry['status'] in (SUBMITTED, QUEUED, RUNNING, WRITTEN) or
+                   (entry['status'] == FAILED and entry.get('retries', 0) < self.max_retries)]
+        if not waiting:
+            return 'failed'
+
+        return 'running'
+
+    def finish(self):
+        """
+        Assemble the results of the campaign, and plot them if a title was given.
+
+        Returns
+        -------
+        str
+            Name of the result store.
+        """
+        from om_bench.post import BenchPost, assemble_mpi_results
+
+        assemble_mpi_results(stem=self.manifest.stem)
+
+        store = self.manifest.stem.lstrip('_') + STORE_EXT
+        if self.title is not None:
+            BenchPost(self.title).post_process(store)
+
+        return store
+
+    def run(self, interval=300.0, once=False):
+        """
+        Poll the campaign until it is complete or stuck, then assemble the results.
+
+        Parameters
+        ----------
+        interval : float
+            Seconds between polls.
+        once : bool
+            If True, poll once and return, assembling only if the campaign is complete.
+
+        Returns
+        -------
+        str
+            Final state: 'complete', 'failed', or 'running' (with once=True).
+        """
+        while True:
+            state = self.poll()
+
+            if state == 'complete':
+                self.finish()
+                return state
+
+            if state == 'failed':
+                for name, entry in self.manifest.with_status(FAILED):
+                    print('Failed:', name, '(%s)' % entry['message'])
+                return state
+
+            if once:
+                return state
+
+            time.sleep(interval)
+
+
+def main(argv=None):
+    """
+    Monitor the campaign named on the command line.
+
+    Parameters
+    ----------
+    argv : list of str or None
+        Command line arguments. Default is sys.argv[1:].
+
+    Returns
+    -------
+    int
+        Exit status: 1 if the campaign failed, otherwise 0.
+    """
+    parser = argparse.ArgumentParser(description='Follow an mpi benchmark campaign, resubmit '
+                                                 'failed jobs, and assemble the results.')
+    parser.add_argument('manifest', help='Campaign manifest.')
+    parser.add_argument('--interval', type=float, default=300.0,
+                        help='Seconds between polls (default 300).')
+    parser.add_argument('--max-retries', type=int, default=2,
+                        help='Times a failed job is submitted again (default 2).')
+    parser.add_argument('--walltime-factor', type=float, default=1.0,
+                        help='Factor applied to the walltime of a retried job (default 1).')
+    parser.add_argument('--title', default=None,
+                        help='Plot the assembled results with this title.')
+    parser.add_argument('--once', action='store_true',
+                        help='Poll once and exit.')
+    args = parser.parse_args(argv)
+
+    # Job scripts and results are relative to the campaign directory.
+    directory = os.path.dirname(os.path.abspath(args.manifest))
+    os.chdir(directory)
+
+    monitor = CampaignMonitor(os.path.basename(args.manifest), max_retries=args.max_retries,
+                              walltime_factor=args.walltime_factor, title=args.title)
+    state = monitor.run(interval=args.interval, once=args.once)
+
+    return 1 if state == 'failed' else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
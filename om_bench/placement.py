@@ -0,0 +1,142 @@
+"""
+Placement of mpi ranks on the cores of a node, and the affinity that the ranks end up with.
+
+A placement policy is turned into the binding options of the launcher:
+
+    compact : ranks fill the cores of a node in order, so neighbouring ranks share a socket.
+    scatter : ranks are dealt round robin over the sockets, each bound to its own cores.
+    socket  : ranks are dealt round robin over the sockets, each free to run on its whole socket.
+
+The affinity that each rank actually got is read back from the operating system, so results can
+be checked against the policy that was asked for.
+"""
+import os
+import platform
+
+
+# Placement policies.
+PLACEMENTS = ('compact', 'scatter', 'socket')
+
+# Binding options of each launcher for each policy. '%(pe)d' is the number of cores per rank.
+BINDING_OPTIONS = {
+    'openmpi': {
+        'compact': '--map-by core:PE=%(pe)d --bind-to core',
+        'scatter': '--map-by socket:PE=%(pe)d --bind-to core',
+        'socket': '--map-by socket --bind-to socket',
+    },
+    'mpich': {
+        'compact': '-map-by core -bind-to core:%(pe)d',
+        'scatter': '-map-by socket -bind-to core:%(pe)d',
+        'socket': '-map-by socket -bind-to socket',
+    },
+    'srun': {
+        'compact': '--cpu-bind=cores --distribution=block:block',
+        'scatter': '--cpu-bind=cores --distribution=block:cyclic',
+        'socket': '--cpu-bind=sockets --distribution=block:cyclic',
+    },
+}
+
+# Columns written for each point when affinity is recorded. The first four are this rank's; the
+# last two count the sockets and NUMA nodes used by all ranks together.
+AFFINITY_COLUMNS = ('cpu_first', 'ncpu_bound', 'socket', 'numa_node', 'nsocket_used',
+                    'nnuma_used')
+
+
+def binding_options(mpi, placement, nthread=None):
+    """
+    Return the launcher options that place ranks according to a policy.
+
+    Parameters
+    ----------
+    mpi : str
+        Launcher family: 'openmpi', 'mpich', or 'srun'.
+    placement : str
+        Placement policy: 'compact', 'scatter', or 'socket'.
+    nthread : int or None
+        Number of threads per rank, each of which gets a core. Default is None, which means 1.
+
+    Returns
+    -------
+    str
+        Options, to follow the launcher and its process count.
+    """
+    if mpi not in BINDING_OPTIONS:
+        msg = "Unknown mpi launcher '%s'. Known launchers are: %s." % \
+            (mpi, ', '.join(sorted(BINDING_OPTIONS)))
+        raise ValueError(msg)
+
+    if placement not in PLACEMENTS:
+        msg = "Unknown placement '%s'. Known placements are: %s." % \
+            (placement, ', '.join(PLACEMENTS))
+        raise ValueError(msg)
+
+    return BINDING_OPTIONS[mpi][placement] % {'pe': 1 if nthread is None else int(nthread)}
+
+
+def _cpu_topology(cpu):
+    """
+    Return the socket and NUMA node of a core, from sysfs.
+
+    Parameters
+    ----------
+    cpu : int
+        Core id.
+
+    Returns
+    -------
+    int
+        Socket (physical package) id, or -1 if unknown.
+    int
+        NUMA node id, or -1 if unknown.
+    """
+    path = '/sys/devices/system/cpu/cpu%d' % cpu
+
+    socket = -1
+    try:
+        with open(os.path.join(path, 'topology', 'physical_package_id')) as infile:
+            socket = int(infile.read())
+    except (IOError, OSError, ValueError):
+        pass
+
+    numa_node = -1
+    try:
+        for entry in os.listdir(path):
+            if entry.startswith('node') and entry[4:].isdigit():
+                numa_node = int(entry[4:])
+                break
+    except (IOError, OSError):
+        pass
+
+    return socket, numa_node
+
+
+def affinity_values(comm=None):
+    """
+    Return the affinity of this rank, and the sockets and NUMA nodes used by all ranks.
+
+    Parameters
+    ----------
+    comm : MPI.Comm or None
+        Communicator for the problem. If given, the sockets and NUMA nodes of every rank are
+        counted, telling ranks on different hosts apart.
+
+    Returns
+    -------
+    list of int
+        Values in the order given by AFFINITY_COLUMNS. Values that can't be read are -1.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = sorted(os.sched_getaffinity(0))
+        socket, numa_node = _cpu_topology(cpus[0])
+        values = [cpus[0], len(cpus), socket, numa_node]
+    else:
+        values = [-1, -1, -1, -1]
+
+    places = [(platform.node(), values[2], values[3])]
+    if comm is not None and comm.size > 1:
+        places = comm.allgather(places[0])
+
+    values.append(len(set((host, socket) for host, socket, _ in places)))
+    values.append(len(set((host, numa_node) for host, _, numa_node in places)))
+
+    return values
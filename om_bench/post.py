@@ -1,7 +1,9 @@
 """
 Function that makes journal quality scaling plots from pre-generated scaling benchmark data.
 """
+from collections import OrderedDict
 import fnmatch
+import json
 import os
 
 import numpy as np
@@ -9,6 +11,16 @@ import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
 
+from om_bench.comm_timing import COMM_CATEGORIES
+from om_bench.memory import MEMORY_PHASES
+from om_bench.profiling import write_profile_tables
+from om_bench.results import read_results, read_job_results, read_rank_results
+from om_bench.runner import LAUNCH_COLUMNS, read_job_spec
+from om_bench.setup_timing import SETUP_STAGES
+from om_bench.stats import fit_power_law, summary_columns, summarize_samples
+from om_bench.store import STORE_EXT, write_store
+from om_bench.sweep import mode_axes
+
 matplotlib.use('Agg')
 
 class BenchPost(object):
@@ -24,35 +36,24 @@ class BenchPost(object):
 
         self.equal_axis = False
 
+        # Fit the scaling exponent of each phase, and overlay reference slopes.
+        self.fit_complexity = True
+
     def post_process(self, filename):
         """
         Read benchmark data and make scaling plots.
         """
         title = self.title
 
-        outfile = open(filename, 'r')
-        data = outfile.readlines()
-
-        name = data[0].strip()
-        mode = data[1].strip()
-        ops = data[2].strip().split(',')
-        nl = 'True' in ops[0]
-        ln = 'True' in ops[1]
-        drv = 'True' in ops[2]
+        name, mode, (nl, ln, drv), cols = read_results(filename)
 
-        data = data[3:]
-        npt = len(data)
-
-        t1u = np.empty((npt, ))
-        t3u = np.empty((npt, ))
-        t5u = np.empty((npt, ))
-        flag = np.empty((npt, ), dtype=np.bool)
-        x_dv = np.empty((npt, ))
-        x_state = np.empty((npt, ))
-        x_proc = np.empty((npt, ))
-
-        for j, line in enumerate(data):
-            x_dv[j], x_state[j], x_proc[j], flag[j], t1u[j], t3u[j], t5u[j] = line.strip().split(',')
+        t1u = cols['t1']
+        t3u = cols['t3']
+        t5u = cols['t5']
+        flag = cols['flag']
+        x_dv = cols['ndv']
+        x_state = cols['nstate']
+        x_proc = cols['nproc']
 
         if np.any(flag):
             use_flag = True
@@ -64,6 +65,24 @@ class BenchPost(object):
         t3 = t3u/t3u[0]
         t5 = t5u/t5u[0]
 
+        if 't_setup' in cols:
+            self._plot_setup(name, mode, cols, use_flag)
+
+        if 'mem_setup_peak' in cols:
+            self._plot_memory(name, mode, cols, use_flag)
+
+        if 'comm_frac' in cols:
+            self._plot_comm(name, mode, cols, use_flag)
+
+        if 't1_rank_imb' in cols and 'proc' in mode:
+            self._plot_ranks(name, mode, (nl, ln, drv), cols, use_flag)
+
+        if '-' in mode:
+            self._post_process_sweep(name, mode, (nl, ln, drv),
+                                     {'ndv': x_dv, 'nstate': x_state, 'nproc': x_proc}, flag,
+                                     (t1, t3, t5), use_flag)
+            return
+
         if mode == 'state':
             x = x_state
             xlab = "Number of states."
@@ -96,13 +115,18 @@ class BenchPost(object):
                 plt.loglog(xF, t1F, 'bo-')
                 plt.loglog(xT, t1T, 'ro-')
 
+                legend = ['Default', flagtxt]
+                if self.fit_complexity:
+                    legend = self._plot_complexity(name, mode, 'nl',
+                                                   [(xF, t1F, 'Default'), (xT, t1T, flagtxt)])
+
                 plt.xlabel(xlab)
                 plt.ylabel('Nonlinear Solve: Normalized Time')
                 plt.title(title)
                 plt.grid(True)
                 if self.equal_axis:
                     plt.axis('equal')
-                plt.legend(['Default', flagtxt], loc=0)
+                plt.legend(legend, loc=0)
                 plt.savefig("%s_%s_%s.png" % (name, mode, 'nl'))
 
             if ln:
@@ -110,13 +134,18 @@ class BenchPost(object):
                 plt.loglog(xF, t3F, 'o-')
                 plt.loglog(xT, t3T, 'ro-')
 
+                legend = ['Default', flagtxt]
+                if self.fit_complexity:
+                    legend = self._plot_complexity(name, mode, 'ln',
+                                                   [(xF, t3F, 'Default'), (xT, t3T, flagtxt)])
+
                 plt.xlabel(xlab)
                 plt.ylabel('Compute Totals: Normalized Time')
                 plt.title(title)
                 plt.grid(True)
                 if self.equal_axis:
                     plt.axis('equal')
-                plt.legend(['Default', flagtxt], loc=0)
+                plt.legend(legend, loc=0)
                 plt.savefig("%s_%s_%s.png" % (name, mode, 'ln'))
 
             if drv:
@@ -124,13 +153,18 @@ class BenchPost(object):
                 plt.loglog(xF, t5F, 'o-')
                 plt.loglog(xT, t5T, 'ro-')
 
+                legend = ['Default', flagtxt]
+                if self.fit_complexity:
+                    legend = self._plot_complexity(name, mode, 'drv',
+                                                   [(xF, t5F, 'Default'), (xT, t5T, flagtxt)])
+
                 plt.xlabel(xlab)
                 plt.ylabel(self.title_driver + ': Normalized Time')
                 plt.title(title)
                 plt.grid(True)
                 if self.equal_axis:
                     plt.axis('equal')
-                plt.legend(['Default', flagtxt], loc=0)
+                plt.legend(legend, loc=0)
                 plt.savefig("%s_%s_%s.png" % (name, mode, 'drv'))
 
             if self.special_plot_driver_on_linear:
@@ -161,6 +195,9 @@ class BenchPost(object):
             if nl:
                 plt.figure(1)
                 plt.loglog(x, t1, 'o-')
+                if self.fit_complexity:
+                    legend = self._plot_complexity(name, mode, 'nl', [(x, t1, 'Measured')])
+                    plt.legend(legend, loc=0)
 
                 plt.xlabel(xlab)
                 plt.ylabel('Nonlinear Solve: Normalized Time')
@@ -173,6 +210,9 @@ class BenchPost(object):
             if ln:
                 plt.figure(2)
                 plt.loglog(x, t3, 'o-')
+                if self.fit_complexity:
+                    legend = self._plot_complexity(name, mode, 'ln', [(x, t3, 'Measured')])
+                    plt.legend(legend, loc=0)
 
                 plt.xlabel(xlab)
                 plt.ylabel('Compute Totals: Normalized Time')
@@ -198,13 +238,387 @@ class BenchPost(object):
         plt.show()
         print('done')
 
+    def _plot_complexity(self, name, mode, op, curves):
+        """
+        Fit the scaling exponent of each curve on the current figure, and add reference slopes.
+
+        The fits are drawn as dashed lines and the exponents are printed. References for O(n),
+        O(n log n) and O(n^2) are anchored at the first point of the first curve; when the number
+        of processors is varied, the ideal O(1/n) strong scaling is drawn instead.
+
+        Parameters
+        ----------
+        name : str
+            Name of the benchmark.
+        mode : str
+            Run mode.
+        op : str
+            Phase being plotted ('nl', 'ln' or 'drv').
+        curves : list of tuple
+            (x, t, label) for every curve that was plotted on the figure, in order.
+
+        Returns
+        -------
+        list of str
+            Legend for the data, the fits, and the references.
+        """
+        legend = [label for x, t, label in curves]
+
+        for x, t, label in curves:
+            p, stderr, coeff = fit_power_law(x, t)
+            if np.isnan(p):
+                continue
+
+            xs = np.sort(x)
+            plt.loglog(xs, coeff * xs ** p, '--')
+            legend.append('%s fit: n^%.2f +/- %.2f' % (label, p, stderr))
+
+            print('%s %s %s, %s: exponent = %.3f +/- %.3f' % (name, mode, op, label, p, stderr))
+
+        x, t, label = curves[0]
+        idx = np.argsort(x)
+        x = x[idx]
+        t = t[idx]
+        if len(x) < 2 or x[0] <= 0.0:
+            return legend
+
+        ratio = x / x[0]
+        if mode_axes(mode)[0] == 'nproc':
+            refs = [('O(1/n)', 1.0 / ratio, '0.3')]
+        else:
+            refs = [('O(n)', ratio, '0.3')]
+            # n log n is 0 at n = 1, so there is nothing to scale from below that.
+            if x[0] > 1.0:
+                refs.append(('O(n log n)', (x * np.log(x)) / (x[0] * np.log(x[0])), '0.5'))
+            refs.append(('O(n^2)', ratio ** 2, '0.7'))
+
+        for ref, scale, color in refs:
+            plt.loglog(x, t[0] * scale, ':', color=color)
+            legend.append(ref)
+
+        return legend
 
-def assemble_mpi_results():
+    def _plot_setup(self, name, mode, cols, use_flag):
+        """
+        Plot setup and final_setup time, and any internal setup stages, against component count.
+
+        Parameters
+        ----------
+        name : str
+            Name of the benchmark.
+        mode : str
+            Run mode.
+        cols : dict
+            Result columns keyed by name.
+        use_flag : bool
+            True if the flag was varied.
+        """
+        flag = cols['flag']
+        ncomp = cols['ncomp']
+
+        groups = [(~flag, 'Default')]
+        if use_flag:
+            groups.append((flag, self.flagtxt))
+
+        phases = [('t_setup', 'Setup'), ('t_final_setup', 'Final Setup')]
+        stages = [('t_setup_%s' % stage, stage.capitalize()) for stage in SETUP_STAGES
+                  if 't_setup_%s' % stage in cols]
+
+        for fig, (series, suffix) in enumerate([(phases, 'setup'), (stages, 'setup_stages')]):
+            if not series:
+                continue
+
+            plt.figure(10 + fig)
+            legend = []
+            for key, label in series:
+                for mask, flagtxt in groups:
+                    idx = np.argsort(ncomp[mask])
+                    plt.loglog(ncomp[mask][idx], cols[key][mask][idx], 'o-')
+                    if use_flag:
+                        legend.append('%s: %s' % (label, flagtxt))
+                    else:
+                        legend.append(label)
+
+            plt.xlabel('Number of components.')
+            plt.ylabel('Time (sec)')
+            plt.title(self.title)
+            plt.grid(True)
+            plt.legend(legend, loc=0)
+            plt.savefig("%s_%s_%s.png" % (name, mode, suffix))
+
+    def _plot_memory(self, name, mode, cols, use_flag):
+        """
+        Plot the peak memory of each phase against the first varying quantity.
+
+        Parameters
+        ----------
+        name : str
+            Name of the benchmark.
+        mode : str
+            Run mode.
+        cols : dict
+            Result columns keyed by name.
+        use_flag : bool
+            True if the flag was varied.
+        """
+        flag = cols['flag']
+        axis = mode_axes(mode)[0]
+        x = cols[axis]
+        xlabels = {'ndv': "Number of design vars.", 'nstate': "Number of states.",
+                   'nproc': "Number of processors."}
+        style = 'o' if '-' in mode else 'o-'
+
+        groups = [(~flag, 'Default')]
+        if use_flag:
+            groups.append((flag, self.flagtxt))
+
+        # Under MPI, plot the largest rank and the sum over ranks; a serial run has one rank.
+        for fig, (stat, ylab) in enumerate([('max', 'Peak Memory per Rank (MB)'),
+                                            ('total', 'Total Peak Memory (MB)')]):
+            plt.figure(20 + fig)
+            legend = []
+            for phase in MEMORY_PHASES:
+                key = 'mem_%s_peak_rank_%s' % (phase, stat)
+                if key not in cols:
+                    key = 'mem_%s_peak' % phase
+                if not np.any(cols[key]):
+                    continue
+
+                for mask, flagtxt in groups:
+                    idx = np.argsort(x[mask])
+                    plt.loglog(x[mask][idx], cols[key][mask][idx], style)
+                    if use_flag:
+                        legend.append('%s: %s' % (phase, flagtxt))
+                    else:
+                        legend.append(phase)
+
+            plt.xlabel(xlabels[axis])
+            plt.ylabel(ylab)
+            plt.title(self.title)
+            plt.grid(True)
+            plt.legend(legend, loc=0)
+            plt.savefig("%s_%s_mem_%s.png" % (name, mode, 'peak' if stat == 'max' else stat))
+
+    def _plot_comm(self, name, mode, cols, use_flag):
+        """
+        Plot communication and computation time, and the communication fraction.
+
+        Parameters
+        ----------
+        name : str
+            Name of the benchmark.
+        mode : str
+            Run mode.
+        cols : dict
+            Result columns keyed by name.
+        use_flag : bool
+            True if the flag was varied.
+        """
+        flag = cols['flag']
+        axis = mode_axes(mode)[0]
+        x = cols[axis]
+        xlabels = {'ndv': "Number of design vars.", 'nstate': "Number of states.",
+                   'nproc': "Number of processors."}
+        style = 'o' if '-' in mode else 'o-'
+
+        groups = [(~flag, 'Default')]
+        if use_flag:
+            groups.append((flag, self.flagtxt))
+
+        t_comm = sum(cols['t_comm_%s' % category] for category in COMM_CATEGORIES)
+        t_compute = cols['t1'] + cols['t3'] + cols['t5'] - t_comm
+
+        plt.figure(25)
+        legend = []
+        for mask, flagtxt in groups:
+            idx = np.argsort(x[mask])
+            curves = [('Compute', t_compute)]
+            curves.extend([(category, cols['t_comm_%s' % category])
+                           for category in COMM_CATEGORIES])
+            for label, y in curves:
+                if not np.any(y[mask]):
+                    continue
+                plt.loglog(x[mask][idx], y[mask][idx], style)
+                if use_flag:
+                    legend.append('%s: %s' % (label, flagtxt))
+                else:
+                    legend.append(label)
+
+        plt.xlabel(xlabels[axis])
+        plt.ylabel('Time (s)')
+        plt.title(self.title)
+        plt.grid(True)
+        plt.legend(legend, loc=0)
+        plt.savefig("%s_%s_comm.png" % (name, mode))
+
+        plt.figure(26)
+        legend = []
+        for mask, flagtxt in groups:
+            idx = np.argsort(x[mask])
+            plt.semilogx(x[mask][idx], cols['comm_frac'][mask][idx], style)
+            legend.append(flagtxt)
+
+        plt.xlabel(xlabels[axis])
+        plt.ylabel('Communication Fraction')
+        plt.title(self.title)
+        plt.grid(True)
+        plt.legend(legend, loc=0)
+        plt.savefig("%s_%s_comm_frac.png" % (name, mode))
+
+    def _plot_ranks(self, name, mode, ops, cols, use_flag):
+        """
+        Plot load imbalance between ranks, and the spread of rank times, against processors.
+
+        Parameters
+        ----------
+        name : str
+            Name of the benchmark.
+        mode : str
+            Run mode.
+        ops : tuple of bool
+            Whether the nonlinear, linear, and driver times were recorded.
+        cols : dict
+            Result columns keyed by name.
+        use_flag : bool
+            True if the flag was varied.
+        """
+        flag = cols['flag']
+        x = cols['nproc']
+        style = 'o' if '-' in mode else 'o-'
+
+        groups = [(~flag, 'Default')]
+        if use_flag:
+            groups.append((flag, self.flagtxt))
+
+        phases = [(key, label, suffix) for key, label, suffix, active in
+                  zip(('t1', 't3', 't5'), ('Nonlinear Solve', 'Compute Totals', self.title_driver),
+                      ('nl', 'ln', 'drv'), ops) if active]
+
+        plt.figure(30)
+        legend = []
+        for key, label, suffix in phases:
+            for mask, flagtxt in groups:
+                idx = np.argsort(x[mask])
+                plt.semilogx(x[mask][idx], cols[key + '_rank_imb'][mask][idx], style)
+                legend.append('%s: %s' % (label, flagtxt) if use_flag else label)
+
+        plt.xlabel("Number of processors.")
+        plt.ylabel('Load Imbalance (max / mean)')
+        plt.title(self.title)
+        plt.grid(True)
+        plt.legend(legend, loc=0)
+        plt.savefig("%s_%s_imbalance.png" % (name, mode))
+
+        for fig, (key, label, suffix) in enumerate(phases):
+            plt.figure(31 + fig)
+            legend = []
+            for mask, flagtxt in groups:
+                idx = np.argsort(x[mask])
+                xs = x[mask][idx]
+                for stat, line in (('min', 'v--'), ('mean', 'o-'), ('max', '^--')):
+                    plt.loglog(xs, cols['%s_rank_%s' % (key, stat)][mask][idx], line)
+                    legend.append('%s %s' % (flagtxt, stat) if use_flag else stat)
+
+            plt.xlabel("Number of processors.")
+            plt.ylabel(label + ': Time over Ranks (sec)')
+            plt.title(self.title)
+            plt.grid(True)
+            plt.legend(legend, loc=0)
+            plt.savefig("%s_%s_%s_ranks.png" % (name, mode, suffix))
+
+    def _post_process_sweep(self, name, mode, ops, coords, flag, times, use_flag):
+        """
+        Make scaling plots for a sweep that varies more than one quantity.
+
+        The first varying quantity is placed on the x axis, and every combination of the others
+        (and the flag) becomes a separate curve.
+
+        Parameters
+        ----------
+        name : str
+            Name of the benchmark.
+        mode : str
+            Run mode, e.g., 'state-proc'.
+        ops : tuple of bool
+            Whether the nonlinear, linear, and driver times were recorded.
+        coords : dict
+            Coordinate arrays keyed by SweepPoint field name.
+        flag : ndarray
+            Flag for each point.
+        times : tuple of ndarray
+            Normalized nonlinear, linear, and driver times.
+        use_flag : bool
+            True if the flag was varied.
+        """
+        axes = mode_axes(mode)
+        x = coords[axes[0]]
+        others = axes[1:]
+        labels = {'ndv': 'dv', 'nstate': 'state', 'nproc': 'proc'}
+        xlabels = {'ndv': "Number of design vars.", 'nstate': "Number of states.",
+                   'nproc': "Number of processors."}
+
+        series = []
+        for j in range(len(x)):
+            key = tuple(coords[axis][j] for axis in others) + (flag[j], )
+            if key not in series:
+                series.append(key)
+
+        ylabels = ('Nonlinear Solve: Normalized Time', 'Compute Totals: Normalized Time',
+                   self.title_driver + ': Normalized Time')
+        suffixes = ('nl', 'ln', 'drv')
+
+        for k, (active, t, ylab, suffix) in enumerate(zip(ops, times, ylabels, suffixes)):
+            if not active:
+                continue
+
+            plt.figure(k + 1)
+            legend = []
+            curves = []
+            for key in series:
+                idx = [j for j in range(len(x))
+                       if tuple(coords[axis][j] for axis in others) + (flag[j], ) == key]
+                plt.loglog(x[idx], t[idx], 'o-')
+
+                txt = ', '.join('%s=%d' % (labels[axis], val) for axis, val in zip(others, key))
+                if use_flag and key[-1]:
+                    txt += ', ' + self.flagtxt
+                legend.append(txt)
+                curves.append((x[idx], t[idx], txt))
+
+            if self.fit_complexity:
+                legend = self._plot_complexity(name, mode, suffix, curves)
+
+            plt.xlabel(xlabels[axes[0]])
+            plt.ylabel(ylab)
+            plt.title(self.title)
+            plt.grid(True)
+            if self.equal_axis:
+                plt.axis('equal')
+            plt.legend(legend, loc=0)
+            plt.savefig("%s_%s_%s.png" % (name, mode, suffix))
+
+        plt.show()
+        print('done')
+
+
+def assemble_mpi_results(confidence=0.95, stem=None, profile_dir=None):
     '''
     Scan current directly for mpi result output files and assemble them together.
+
+    Parameters
+    ----------
+    confidence : float
+        Confidence level for the interval on the mean of each timing.
+    stem : str or None
+        Stem of the campaign to assemble, e.g. '_beam_state_nl_ln'. Default is None, which
+        requires the directory to hold the results of a single campaign.
+    profile_dir : str or None
+        Directory where the jobs saved their profiles. Default is None, which uses the directory
+        recorded in the campaign's job spec, or '<name>_<mode>_profile' if there is no spec.
     '''
     allfiles = os.listdir('.')
-    files = [n for n in allfiles if fnmatch.fnmatch(n, '_*.dat')]
+    pattern = '_*.dat' if stem is None else stem + '_*.dat'
+    files = [n for n in allfiles if fnmatch.fnmatch(n, pattern)]
 
     stem_parts = files[0].split('_')[1:-5]
     stem = '_' + '_'.join(stem_parts)
@@ -232,14 +646,13 @@ def assemble_mpi_results():
     flag = set()
     for fname in files:
 
-        if not fname.startswith(stem):
+        if not fname.startswith(stem + '_'):
             msg = 'Parsing failed because files from multiple independent runs found in the same directory.'
             raise RuntimeError(msg)
 
-        fname = fname.strip('.dat').strip(stem)
-        parts = fname.split('_')
+        parts = fname[len(stem) + 1:-4].split('_')
 
-        #  ndv, nstate, nproc, av
+        #  ndv, nstate, nproc, flag, av
         dv.add(int(parts[0]))
         state.add(int(parts[1]))
         proc.add(int(parts[2]))
@@ -247,83 +660,64 @@ def assemble_mpi_results():
         av.add(int(parts[4]))
 
     data = []
-    for idv in sorted(dv):
+    raw = []
+    ranks = []
+    for iproc in sorted(proc):
         for istate in sorted(state):
-            for iproc in sorted(proc):
+            for idv in sorted(dv):
                 for iflag in sorted(flag):
 
-                    t1_sum = 0.0
-                    t3_sum = 0.0
-                    t5_sum = 0.0
-                    sub_timing = False
-                    for iav in av:
+                    samples = []
+                    for iav in sorted(av):
                         filename = stem + '_%s_%s_%s_%s_%s.dat' % (idv, istate, iproc, iflag, iav)
-                        infile = open(filename, 'r')
-
-                        line = infile.readline()
-                        parts = line.split(',')
-                        t1 = float(parts[0].strip())
-                        t3 = float(parts[1].strip())
-                        t5 = float(parts[2].strip())
-
-                        t1_sum += t1
-                        t3_sum += t3
-                        t5_sum += t5
-
-                        if len(parts) > 3:
-                            if not sub_timing:
-                                t3a_sum = 0.0
-                                t3b_sum = 0.0
-                                t3c_sum = 0.0
-                                t3d_sum = 0.0
-                                t3e_sum = 0.0
-                                sub_timing = True
-
-                            t3a = float(parts[3].strip())
-                            t3b = float(parts[4].strip())
-                            t3c = float(parts[5].strip())
-                            t3d = float(parts[6].strip())
-                            t3e = float(parts[7].strip())
-
-                            t3a_sum += t3a
-                            t3b_sum += t3b
-                            t3c_sum += t3c
-                            t3d_sum += t3d
-                            t3e_sum += t3e
-
-                    t1av = t1_sum / (iav + 1)
-                    t3av = t3_sum / (iav + 1)
-                    t5av = t5_sum / (iav + 1)
-
-                    if sub_timing:
-                        t3aav = t3a_sum / (iav + 1)
-                        t3bav = t3b_sum / (iav + 1)
-                        t3cav = t3c_sum / (iav + 1)
-                        t3dav = t3d_sum / (iav + 1)
-                        t3eav = t3e_sum / (iav + 1)
-
-                    data.append((idv, istate, iproc, iflag, t1av, t3av, t5av,
-                                 t3aav, t3bav, t3cav, t3dav, t3eav))
-
-    filename = '%s_%s_%s.dat' % (name, mode, op)
-
-    outfile = open(filename, 'w')
-    outfile.write(name)
-    outfile.write('\n')
-    outfile.write(mode)
-    outfile.write('\n')
-    outfile.write('%s, %s, %s' % (nl, ln, drv))
-    outfile.write('\n')
-
-    if sub_timing:
-        for ndv, nstate, nproc, nflag, t1, t3, t5, t3a, t3b, t3c, t3d, t3e in data:
-            outfile.write('%d, %d, %d, %s, %f, %f, %f, %f, %f, %f, %f, %f' % (ndv, nstate, nproc, nflag, t1, t3, t5, t3a, t3b, t3c, t3d, t3e))
-            outfile.write('\n')
-    else:
-        for ndv, nstate, nproc, nflag, t1, t3, t5 in data:
-            outfile.write('%d, %d, %d, %s, %f, %f, %f' % (ndv, nstate, nproc, nflag, t1, t3, t5))
-            outfile.write('\n')
-    outfile.close()
+                        columns, values = read_job_results(filename)
+                        samples.append(values)
+                        raw.append((idv, istate, iproc, iflag, iav) + tuple(values))
+
+                        rank_file = filename[:-4] + '.ranks'
+                        if os.path.exists(rank_file):
+                            rank_names, rows = read_rank_results(rank_file)
+                            for row in rows:
+                                ranks.append((idv, istate, iproc, iflag, iav, int(row[0])) +
+                                             tuple(row[1:]))
+
+                    data.append((idv, istate, iproc, iflag) +
+                                summarize_samples(columns, samples, confidence))
+
+    coords = ['ndv', 'nstate', 'nproc', 'flag']
+
+    tables = OrderedDict()
+    tables['points'] = (coords + summary_columns(columns), data)
+    tables['samples'] = (coords + ['rep'] + columns, raw)
+    if ranks:
+        tables['ranks'] = (coords + ['rep'] + rank_names, ranks)
+
+    launches = []
+    for fname in allfiles:
+        if fnmatch.fnmatch(fname, stem + '_*.launch'):
+            with open(fname) as infile:
+                record = json.load(infile)
+            launches.append(tuple(record[column] for column in LAUNCH_COLUMNS))
+    if launches:
+        tables['launches'] = (list(LAUNCH_COLUMNS), sorted(launches))
+
+    # The jobs ran elsewhere, so use the environment that the first one recorded.
+    env = None
+    env_files = sorted(n for n in allfiles if fnmatch.fnmatch(n, stem + '_*.env'))
+    if env_files:
+        with open(env_files[0]) as infile:
+            env = json.load(infile, object_pairs_hook=OrderedDict)
+
+    filename = '%s_%s_%s%s' % (name, mode, op, STORE_EXT)
+    write_store(filename, name, mode, (nl, ln, drv), tables, env=env)
+    print('Results saved in', filename)
+
+    if profile_dir is None:
+        profile_dir = '%s_%s_profile' % (name, mode)
+        if os.path.exists(stem + '.json'):
+            profile_dir = read_job_spec(stem + '.json')['settings']['profile_dir']
+
+    write_profile_tables(profile_dir, name, mode)
 
     print("done")
 
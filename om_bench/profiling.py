@@ -0,0 +1,294 @@
+"""
+Deterministic profiles of the benchmark phases, and hot-function tables across sweep sizes.
+"""
+from collections import OrderedDict
+import cProfile
+import fnmatch
+from itertools import count
+import os
+import pstats
+
+from om_bench.sweep import coordinate_key, SweepPoint
+
+
+# Phases that are profiled, in the order they run.
+PROFILE_PHASES = ('setup', 'run_model', 'run_driver', 'compute_totals')
+
+# Used to give every profile written by this process a unique name.
+_counter = count()
+
+
+class PhaseProfiler(object):
+    """
+    Profile each benchmark phase separately with cProfile.
+
+    Attributes
+    ----------
+    profiles : OrderedDict
+        Profile of each phase that has been run.
+    _phase : str or None
+        Phase currently being profiled.
+    """
+
+    def __init__(self):
+        """
+        Initialize the profiler.
+        """
+        self.profiles = OrderedDict()
+        self._phase = None
+
+    def start(self, phase):
+        """
+        Start profiling a phase.
+
+        Parameters
+        ----------
+        phase : str
+            Name of the phase.
+        """
+        self._phase = phase
+        profile = self.profiles[phase] = cProfile.Profile()
+        profile.enable()
+
+    def stop(self):
+        """
+        Stop profiling the current phase.
+        """
+        self.profiles[self._phase].disable()
+        self._phase = None
+
+    def dump(self, directory, point, rank=0):
+        """
+        Save the profile of every phase that was run.
+
+        Parameters
+        ----------
+        directory : str
+            Directory that holds the profiles of the whole sweep.
+        point : SweepPoint
+            Point that was run.
+        rank : int
+            MPI rank of this process.
+        """
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another rank got there first.
+                pass
+
+        seq = next(_counter)
+        for phase, profile in self.profiles.items():
+            filename = '%d_%d_%d_%s_%s_%d_%d_%d.prof' % (tuple(point) +
+                                                         (phase, rank, os.getpid(), seq))
+            profile.dump_stats(os.path.join(directory, filename))
+
+
+def clear_profiles(directory):
+    """
+    Remove the profiles left in a directory by an earlier sweep.
+
+    Parameters
+    ----------
+    directory : str
+        Directory that holds the profiles of a sweep.
+    """
+    if not os.path.isdir(directory):
+        return
+
+    for filename in fnmatch.filter(os.listdir(directory), '*.prof'):
+        os.remove(os.path.join(directory, filename))
+
+
+def merge_profiles(directory):
+    """
+    Merge the profiles of every repetition and rank for each point and phase.
+
+    Parameters
+    ----------
+    directory : str
+        Directory that holds the profiles of a sweep.
+
+    Returns
+    -------
+    dict
+        (pstats.Stats, number of merged profiles), keyed by (point, phase).
+    """
+    files = {}
+    for filename in fnmatch.filter(os.listdir(directory), '*.prof'):
+        parts = filename[:-5].split('_')
+        point = SweepPoint(int(parts[0]), int(parts[1]), int(parts[2]), parts[3] == 'True')
+        phase = '_'.join(parts[4:-3])
+        files.setdefault((point, phase), []).append(os.path.join(directory, filename))
+
+    merged = {}
+    for key, filenames in files.items():
+        merged[key] = (pstats.Stats(*filenames), len(filenames))
+
+    return merged
+
+
+def _func_label(func):
+    """
+    Return a short label for a function in pstats.
+
+    Parameters
+    ----------
+    func : tuple
+        (filename, line number, function name) as used by pstats.
+
+    Returns
+    -------
+    str
+        Label.
+    """
+    filename, line, name = func
+    if filename == '~':
+        # Builtin
+        return name
+
+    return '%s (%s:%d)' % (name, os.path.basename(filename), line)
+
+
+def _point_label(point, axes):
+    """
+    Return a column label for a point, showing only the quantities that vary.
+
+    Parameters
+    ----------
+    point : SweepPoint
+        Point in the sweep.
+    axes : list of str
+        Names of the varying quantities.
+
+    Returns
+    -------
+    str
+        Label.
+    """
+    abbrev = {'ndv': 'dv', 'nstate': 'st', 'nproc': 'np'}
+    return ','.join('%s=%d' % (abbrev[axis], getattr(point, axis)) for axis in axes)
+
+
+def hot_function_table(merged, phase, flag=False, top=20, growth=1.5):
+    """
+    Return a table of the top functions of a phase, with their cumulative time at each size.
+
+    Cumulative times are averaged over repetitions and ranks. The share is the cumulative time
+    relative to the total time recorded in the phase. A function is marked with '*' when its
+    share at the largest point is at least growth times its share at the smallest point.
+
+    Parameters
+    ----------
+    merged : dict
+        Merged profiles returned by merge_profiles.
+    phase : str
+        Name of the phase.
+    flag : bool
+        Value of the user flag to tabulate.
+    top : int
+        Number of functions taken from each point.
+    growth : float
+        Ratio of the shares that marks a function as growing.
+
+    Returns
+    -------
+    list of str
+        Lines of the table. Empty if the phase wasn't profiled.
+    """
+    points = sorted([point for point, name in merged if name == phase and point.flag == flag],
+                    key=coordinate_key)
+    if not points:
+        return []
+
+    axes = [axis for axis in ('ndv', 'nstate', 'nproc')
+            if len(set(getattr(point, axis) for point in points)) > 1]
+    if not axes:
+        axes = ['nstate']
+
+    # Cumulative time per run, and share of the phase, for every function at every point.
+    cum = []
+    share = []
+    hot = set()
+    for point in points:
+        stats, nprof = merged[point, phase]
+        total = stats.total_tt if stats.total_tt > 0.0 else 1.0
+
+        point_cum = {}
+        for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+            if func[2].startswith("<method 'disable' of '_lsprof"):
+                continue
+            point_cum[func] = ct
+
+        cum.append(dict((func, ct / nprof) for func, ct in point_cum.items()))
+        share.append(dict((func, ct / total) for func, ct in point_cum.items()))
+
+        ranked = sorted(point_cum, key=lambda func: point_cum[func], reverse=True)
+        hot.update(ranked[:top])
+
+    funcs = sorted(hot, key=lambda func: share[-1].get(func, 0.0), reverse=True)
+
+    labels = [_point_label(point, axes) for point in points]
+    width = max(20, max(len(label) for label in labels))
+
+    lines = ['Phase: %s, flag: %s' % (phase, flag),
+             '  '.join(['%-60s' % 'Function'] + ['%*s' % (width, label) for label in labels])]
+
+    for func in funcs:
+        first = share[0].get(func, 0.0)
+        last = share[-1].get(func, 0.0)
+        grows = len(points) > 1 and last > 0.0 and (first == 0.0 or last / first >= growth)
+
+        label = ('* ' if grows else '  ') + _func_label(func)
+        cells = ['%.4g (%4.1f%%)' % (cum[j].get(func, 0.0), 100.0 * share[j].get(func, 0.0))
+                 for j in range(len(points))]
+        lines.append('  '.join(['%-60s' % label[:60]] + ['%*s' % (width, cell)
+                                                       for cell in cells]))
+
+    lines.append('* share of the phase grows by at least %gx from the smallest to the largest '
+                 'point.' % growth)
+
+    return lines
+
+
+def write_profile_tables(directory, name, mode, top=20, growth=1.5):
+    """
+    Print and save the hot-function tables of every profiled phase in a sweep.
+
+    Each table is written to '<name>_<mode>_profile_<phase>.txt' in the current directory.
+
+    Parameters
+    ----------
+    directory : str
+        Directory that holds the profiles of the sweep.
+    name : str
+        Name of the benchmark.
+    mode : str
+        Run mode.
+    top : int
+        Number of functions taken from each point.
+    growth : float
+        Ratio of the shares that marks a function as growing.
+    """
+    if not os.path.isdir(directory):
+        return
+
+    merged = merge_profiles(directory)
+    flags = sorted(set(point.flag for point, phase in merged))
+
+    for phase in PROFILE_PHASES:
+        lines = []
+        for flag in flags:
+            table = hot_function_table(merged, phase, flag=flag, top=top, growth=growth)
+            if table:
+                lines.extend(table)
+                lines.append('')
+
+        if not lines:
+            continue
+
+        print('\n'.join(lines))
+
+        outfile = open('%s_%s_profile_%s.txt' % (name, mode, phase), 'w')
+        outfile.write('\n'.join(lines))
+        outfile.close()
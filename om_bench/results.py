@@ -0,0 +1,265 @@
+"""
+Reading and writing of benchmark results files.
+"""
+from numbers import Integral
+import os
+
+import numpy as np
+
+from om_bench.store import read_store
+
+
+def read_results(filename, table='points'):
+    """
+    Read a benchmark results file or result store.
+
+    Older .dat files are also read. Files written by the oldest versions don't have a line of
+    column names, so the columns are inferred from the number of values on each line.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the result store directory, or of an older results file.
+    table : str
+        For a result store, the table to read.
+
+    Returns
+    -------
+    str
+        Name of the benchmark.
+    str
+        Run mode.
+    tuple of bool
+        Whether the nonlinear, linear, and driver times were recorded.
+    dict
+        Column arrays keyed by name. The flag column is boolean.
+    """
+    if os.path.isdir(filename):
+        meta, array = read_store(filename, table)
+        ops = meta['ops']
+        cols = dict((key, array[key]) for key in array.dtype.names)
+
+        return meta['name'], meta['mode'], (ops['nl'], ops['ln'], ops['drv']), cols
+
+    infile = open(filename, 'r')
+    data = infile.readlines()
+    infile.close()
+
+    name = data[0].strip()
+    mode = data[1].strip()
+    ops = data[2].strip().split(',')
+    nl = 'True' in ops[0]
+    ln = 'True' in ops[1]
+    drv = 'True' in ops[2]
+
+    data = [line.strip().split(',') for line in data[3:] if line.strip()]
+
+    if data[0][0].strip() == 'ndv':
+        names = [item.strip() for item in data[0]]
+        data = data[1:]
+    else:
+        names = legacy_columns(len(data[0]))
+
+    cols = {}
+    for j, key in enumerate(names):
+        values = [line[j].strip() for line in data]
+        if key == 'flag':
+            cols[key] = np.array(['True' in value for value in values])
+        else:
+            cols[key] = np.array([float(value) for value in values])
+
+    if 'flag' not in cols:
+        cols['flag'] = np.zeros(len(data), dtype=bool)
+
+    return name, mode, (nl, ln, drv), cols
+
+
+def legacy_columns(ncol):
+    """
+    Return the column names for a results line written without a line of column names.
+
+    Parameters
+    ----------
+    ncol : int
+        Number of values on the line.
+
+    Returns
+    -------
+    list of str
+        Column names.
+    """
+    sub_timing = ['t3a', 't3b', 't3c', 't3d', 't3e']
+
+    if ncol == 3:
+        # Single mpi job.
+        return ['t1', 't3', 't5']
+    elif ncol == 8:
+        return ['t1', 't3', 't5'] + sub_timing
+    elif ncol == 6:
+        # Written before the flag was added.
+        return ['ndv', 'nstate', 'nproc', 't1', 't3', 't5']
+    elif ncol == 7:
+        return ['ndv', 'nstate', 'nproc', 'flag', 't1', 't3', 't5']
+    elif ncol == 12:
+        return ['ndv', 'nstate', 'nproc', 'flag', 't1', 't3', 't5'] + sub_timing
+
+    msg = 'Unrecognized results line with %d values.' % ncol
+    raise ValueError(msg)
+
+
+def read_job_results(filename):
+    """
+    Read the results of a single mpi job.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the job output file.
+
+    Returns
+    -------
+    list of str
+        Column names.
+    list of float
+        Values.
+    """
+    infile = open(filename, 'r')
+    lines = [line.strip().split(',') for line in infile.readlines() if line.strip()]
+    infile.close()
+
+    if len(lines) > 1:
+        names = [item.strip() for item in lines[0]]
+        values = lines[1]
+    else:
+        values = lines[0]
+        names = legacy_columns(len(values))
+
+    return names, [float(value.strip()) for value in values]
+
+
+def write_results(filename, name, mode, ops, columns, data):
+    """
+    Write a benchmark results file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the results file.
+    name : str
+        Name of the benchmark.
+    mode : str
+        Run mode.
+    ops : tuple of bool
+        Whether the nonlinear, linear, and driver times were recorded.
+    columns : list of str
+        Names of every column, starting with the coordinates.
+    data : list of tuple
+        One row of values per line.
+    """
+    outfile = open(filename, 'w')
+    outfile.write(name)
+    outfile.write('\n')
+    outfile.write(mode)
+    outfile.write('\n')
+    outfile.write('%s, %s, %s' % tuple(ops))
+    outfile.write('\n')
+    outfile.write(', '.join(columns))
+    outfile.write('\n')
+
+    for line in data:
+        outfile.write(', '.join([_format(value) for value in line]))
+        outfile.write('\n')
+
+    outfile.close()
+
+
+def _format(value):
+    """
+    Format a single value for a results file.
+
+    Floats are written with enough digits to be read back exactly.
+
+    Parameters
+    ----------
+    value : bool, str, int or float
+        Value to format.
+
+    Returns
+    -------
+    str
+        Formatted value.
+    """
+    if isinstance(value, (bool, np.bool_, str)):
+        return str(value)
+    elif isinstance(value, Integral):
+        return '%d' % value
+
+    return repr(float(value))
+
+
+def write_job_results(filename, columns, values):
+    """
+    Write the results of a single mpi job.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the job output file.
+    columns : list of str
+        Column names.
+    values : list of float
+        Values.
+    """
+    outfile = open(filename, 'w')
+    outfile.write(', '.join(columns))
+    outfile.write('\n')
+    outfile.write(', '.join([_format(value) for value in values]))
+    outfile.close()
+
+
+def write_rank_results(filename, columns, rank_values):
+    """
+    Write the values recorded on every rank of a single mpi job.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the per-rank output file.
+    columns : list of str
+        Column names.
+    rank_values : list of tuple
+        Values from each rank.
+    """
+    outfile = open(filename, 'w')
+    outfile.write(', '.join(['rank'] + columns))
+    outfile.write('\n')
+    for rank, values in enumerate(rank_values):
+        outfile.write(', '.join([_format(value) for value in (rank, ) + tuple(values)]))
+        outfile.write('\n')
+    outfile.close()
+
+
+def read_rank_results(filename):
+    """
+    Read the values recorded on every rank of a single mpi job.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the per-rank output file.
+
+    Returns
+    -------
+    list of str
+        Column names, starting with 'rank'.
+    list of list of float
+        Values from each rank.
+    """
+    infile = open(filename, 'r')
+    lines = [line.strip().split(',') for line in infile.readlines() if line.strip()]
+    infile.close()
+
+    names = [item.strip() for item in lines[0]]
+    rows = [[float(value.strip()) for value in line] for line in lines[1:]]
+
+    return names, rows
@@ -0,0 +1,387 @@
+"""
+Generic runner for the jobs of an mpi benchmark campaign.
+
+run_benchmark_mpi writes a single job spec per campaign, naming the Bench class, the settings to
+apply to it, and the coordinates of every job. Each job is then started with:
+
+    mpiexec -n <nproc> python -u -m om_bench.runner _beam_state_nl_ln.json <index>
+
+so that no code is generated per job. With Bench.batch_points, all jobs that share a processor
+count run in one launch instead, which pays for the interpreter, imports and MPI initialization
+once:
+
+    mpiexec -n <nproc> python -u -m om_bench.runner _beam_state_nl_ln.json --nproc <nproc>
+
+Each job's results are still written as soon as it finishes. The time spent initializing MPI, and
+importing OpenMDAO and the Bench's module, is written once per launch, to a '.launch' file.
+"""
+from collections import OrderedDict
+import importlib
+import json
+import os
+import sys
+from time import time
+
+from om_bench.startup import mark
+
+
+# Version of the job spec layout.
+SPEC_FORMAT = 1
+
+# Bench attributes that are copied into the job spec and set on the Bench in each job.
+JOB_SETTINGS = ('base_dir', 'resume', 'time_linear', 'time_driver', 'sub_timing', 'setup_stages',
+                'num_warmup', 'memory', 'per_rank', 'comm_timing', 'coloring_cache',
+                'coloring_dir', 'fixture_dir', 'profile', 'profile_dir', 'startup_timing',
+                'threads', 'placement', 'affinity', 'ln_of', 'ln_wrt')
+
+# Columns of the record written for every launch that runs a batch of jobs: t_mpi_init is MPI
+# initialization alone, and t_import is the import of OpenMDAO and the Bench's module.
+LAUNCH_COLUMNS = ('nproc', 'njobs', 't_mpi_init', 't_import', 't_launch')
+
+
+def bench_module(bench):
+    """
+    Return the module that defines a Bench's class, and the directory to import it from.
+
+    A class defined in the script being run belongs to '__main__', so the script is named instead.
+
+    Parameters
+    ----------
+    bench : <Bench>
+        Benchmark instance.
+
+    Returns
+    -------
+    str
+        Name of the module.
+    str or None
+        Directory that must be on sys.path to import the module, or None if it's already
+        importable.
+    """
+    module = bench.__class__.__module__
+    if module not in ('__main__', '__mp_main__'):
+        return module, None
+
+    main_file = os.path.abspath(sys.modules[module].__file__)
+    return os.path.splitext(os.path.basename(main_file))[0], os.path.dirname(main_file)
+
+
+def write_job_spec(bench, filename, jobs):
+    """
+    Write the job spec for an mpi campaign.
+
+    The file is written under a temporary name and moved into place, so that jobs that are
+    already queued never read a partial file.
+
+    Parameters
+    ----------
+    bench : <Bench>
+        Benchmark instance that plans the campaign.
+    filename : str
+        Name of the spec file.
+    jobs : list of tuple
+        (ndv, nstate, nproc, flag, average, name) for every job, where name is the filename of the
+        job's results without extension.
+    """
+    module, path = bench_module(bench)
+
+    spec = OrderedDict()
+    spec['format'] = SPEC_FORMAT
+    spec['module'] = module
+    spec['path'] = path
+    spec['classname'] = bench.__class__.__name__
+    spec['name'] = bench._name
+    spec['mode'] = bench.mode
+    spec['use_flag'] = bench._use_flag
+    spec['nthread'] = bench._nthread
+    spec['settings'] = OrderedDict((key, getattr(bench, key)) for key in JOB_SETTINGS)
+    spec['settings']['coloring_dir'] = bench._coloring_dir()
+    spec['settings']['fixture_dir'] = bench._fixture_dir()
+    spec['settings']['profile_dir'] = bench._profile_dir()
+    spec['jobs'] = [[int(ndv), int(nstate), int(nproc), bool(flag), int(average), name]
+                    for ndv, nstate, nproc, flag, average, name in jobs]
+
+    tmp_name = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmp_name, 'w') as outfile:
+        json.dump(spec, outfile, indent=2)
+    os.rename(tmp_name, filename)
+
+
+def read_job_spec(filename):
+    """
+    Read the job spec for an mpi campaign.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the spec file.
+
+    Returns
+    -------
+    dict
+        Contents of the spec.
+    """
+    with open(filename, 'r') as infile:
+        spec = json.load(infile, object_pairs_hook=OrderedDict)
+
+    if spec.get('format') != SPEC_FORMAT:
+        msg = "Job spec '%s' has format %s, but format %d is required."
+        raise ValueError(msg % (filename, spec.get('format'), SPEC_FORMAT))
+
+    return spec
+
+
+def load_bench_class(spec):
+    """
+    Import the Bench class of a campaign.
+
+    Parameters
+    ----------
+    spec : dict
+        Contents of the job spec.
+
+    Returns
+    -------
+    class
+        Bench subclass.
+    """
+    if spec['path'] is not None and spec['path'] not in sys.path:
+        sys.path.insert(0, spec['path'])
+
+    module = importlib.import_module(spec['module'])
+    return getattr(module, spec['classname'])
+
+
+def make_bench(spec, ndv, nstate, nproc):
+    """
+    Create the Bench for a single job.
+
+    Parameters
+    ----------
+    spec : dict
+        Contents of the job spec.
+    ndv : int
+        Number of design variables requested.
+    nstate : int
+        Number of states requested.
+    nproc : int
+        Number of processors requested.
+
+    Returns
+    -------
+    <Bench>
+        Benchmark instance with the campaign's settings.
+    """
+    bench_class = load_bench_class(spec)
+
+    bench = bench_class([ndv], [nstate], [nproc], mode=spec['mode'], name=spec['name'],
+                        use_flag=spec['use_flag'])
+    for key, value in spec['settings'].items():
+        setattr(bench, key, value)
+    bench._nthread = spec.get('nthread')
+
+    return bench
+
+
+def run_job(filename, index):
+    """
+    Run one job of an mpi campaign and write its results.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the spec file.
+    index : int
+        Index of the job in the spec.
+    """
+    mark('runner')
+
+    spec = read_job_spec(filename)
+    ndv, nstate, nproc, flag, average, name = spec['jobs'][index]
+
+    load_bench_class(spec)
+    mark('imported')
+
+    bench = make_bench(spec, ndv, nstate, nproc)
+
+    print('Running: dv=%d, state=%d, proc=%d, flag=%s, av=%d' % (ndv, nstate, nproc, flag,
+                                                                  average))
+
+    times = bench._sample(ndv, nstate, nproc, flag, 1, False)[0]
+
+    bench._write_job_results(name, times)
+
+
+def _start_mpi():
+    """
+    Import OpenMDAO's MPI module and initialize MPI, timing the two separately.
+
+    mpi4py normally initializes MPI when it is imported, which would count the import of OpenMDAO
+    (and numpy under it) as MPI initialization. Automatic initialization is turned off for the
+    import, and MPI is initialized afterwards.
+
+    Returns
+    -------
+    module or None
+        mpi4py.MPI, or None if not running under MPI.
+    float
+        Time spent importing, in seconds.
+    float
+        Time spent initializing MPI, in seconds.
+    """
+    t0 = time()
+    try:
+        import mpi4py
+    except ImportError:
+        mpi4py = None
+    else:
+        mpi4py.rc.initialize = False
+        mpi4py.rc.finalize = True
+
+    from openmdao.utils.mpi import MPI
+    t_import = time() - t0
+
+    t0 = time()
+    if MPI:
+        if not MPI.Is_initialized():
+            MPI.Init_thread()
+    elif mpi4py is not None:
+        # MPI isn't used, so leave mpi4py as it was.
+        mpi4py.rc.initialize = True
+        mpi4py.rc.finalize = None
+
+    return MPI, t_import, time() - t0
+
+
+def launch_filename(filename, nproc):
+    """
+    Return the name of the file that records a launch of all jobs with one processor count.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the spec file.
+    nproc : int
+        Number of processors of the launch.
+
+    Returns
+    -------
+    str
+        Name of the launch file.
+    """
+    return '%s_%d.launch' % (os.path.splitext(filename)[0], nproc)
+
+
+def run_jobs(filename, nproc):
+    """
+    Run every job of an mpi campaign that uses nproc processors, in this launch.
+
+    When the campaign resumes, jobs whose results already exist are skipped. Results are written
+    after each job. The time spent initializing MPI, and importing OpenMDAO and the Bench's module,
+    which is paid once for all of the jobs, is written to the launch file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the spec file.
+    nproc : int
+        Number of processors of this launch.
+    """
+    t_start = time()
+    mark('runner')
+
+    MPI, t_import, t_mpi_init = _start_mpi()
+
+    spec = read_job_spec(filename)
+
+    t0 = time()
+    load_bench_class(spec)
+    t_import += time() - t0
+    mark('imported')
+
+    jobs = [job for job in spec['jobs'] if job[2] == nproc]
+    if spec['settings']['resume']:
+        done = [os.path.exists('%s.dat' % job[5]) for job in jobs]
+        if MPI:
+            # Every rank must run the same jobs.
+            done = MPI.COMM_WORLD.bcast(done, root=0)
+        jobs = [job for job, skip in zip(jobs, done) if not skip]
+
+    if not jobs:
+        # Keep the record of the launch that did the work.
+        return
+
+    for ndv, nstate, nproc, flag, average, name in jobs:
+        bench = make_bench(spec, ndv, nstate, nproc)
+
+        print('Running: dv=%d, state=%d, proc=%d, flag=%s, av=%d' % (ndv, nstate, nproc, flag,
+                                                                      average))
+
+        times = bench._sample(ndv, nstate, nproc, flag, 1, False)[0]
+
+        bench._write_job_results(name, times)
+
+    values = (t_mpi_init, t_import, time() - t_start)
+    if MPI:
+        # The launch is as slow as its slowest rank.
+        values = MPI.COMM_WORLD.allreduce(values, op=_max_op)
+        if MPI.COMM_WORLD.rank != 0:
+            return
+
+    record = OrderedDict(zip(LAUNCH_COLUMNS, (nproc, len(jobs)) + tuple(values)))
+    with open(launch_filename(filename, nproc), 'w') as outfile:
+        json.dump(record, outfile, indent=2)
+
+
+def _max_op(a, b):
+    """
+    Return the elementwise maximum of two tuples, for reducing launch times over ranks.
+
+    Parameters
+    ----------
+    a : tuple of float
+        Values from one rank.
+    b : tuple of float
+        Values from another rank.
+
+    Returns
+    -------
+    tuple of float
+        Elementwise maximum.
+    """
+    return tuple(max(x, y) for x, y in zip(a, b))
+
+
+def main(argv=None):
+    """
+    Run the job named on the command line.
+
+    Parameters
+    ----------
+    argv : list of str or None
+        Command line arguments. Default is sys.argv[1:].
+
+    Returns
+    -------
+    int
+        Exit status.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if len(argv) == 3 and argv[1] == '--nproc':
+        run_jobs(argv[0], int(argv[2]))
+
+    elif len(argv) == 2:
+        run_job(argv[0], int(argv[1]))
+
+    else:
+        print('Usage: python -m om_bench.runner spec.json index')
+        print('       python -m om_bench.runner spec.json --nproc nproc')
+        return 2
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
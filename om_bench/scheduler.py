@@ -0,0 +1,867 @@
+"""
+Backends that write and submit the batch jobs of an mpi benchmark campaign.
+
+A job is a list of shell commands that run one after another, and the number of processors the
+largest of them needs. Every backend writes each job as a '.sh' script. PBSScheduler and
+SlurmScheduler submit the scripts to a queue, and LocalScheduler runs them on this machine.
+"""
+from collections import OrderedDict
+import getpass
+import math
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import time
+
+from om_bench.hardware import get_profile
+from om_bench.manifest import COMPLETED, FAILED, QUEUED, RUNNING, SUBMITTED
+from om_bench.placement import binding_options
+from om_bench.templates import local_template, pbs_template, slurm_template
+
+
+# PBS job states of a job that waits in the queue, and of a running job.
+PBS_QUEUED = ('Q', 'H', 'W', 'T', 'S')
+PBS_RUNNING = ('R', 'E', 'B')
+
+# Slurm job states of a job that waits in the queue, and of a running job.
+SLURM_QUEUED = ('PD', 'CF', 'RQ', 'RS', 'S')
+SLURM_RUNNING = ('R', 'CG', 'SI', 'SO')
+
+
+def _submit_sequential(commands, transient, concurrency=1, retries=3, retry_delay=2.0):
+    """
+    Run submit commands one after another and return their results in order.
+
+    Used instead of om_bench.submit on interpreters older than Python 3.7, which lack asyncio.run.
+
+    Parameters
+    ----------
+    commands : OrderedDict
+        Submit command for each job, keyed by job name.
+    transient : callable
+        Function of (returncode, output) that returns True if the failure is worth retrying.
+    concurrency : int
+        Ignored; commands always run one at a time.
+    retries : int
+        Largest number of retries of each command.
+    retry_delay : float
+        Seconds to wait before the first retry. The wait doubles after every retry.
+
+    Returns
+    -------
+    OrderedDict
+        (returncode, output, attempts) for each job, keyed by job name.
+    """
+    results = OrderedDict()
+    for name, argv in commands.items():
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                output, _ = proc.communicate()
+                returncode = proc.returncode
+                output = output.decode('utf-8', 'replace').strip()
+            except OSError as err:
+                # The submit command doesn't exist; retrying won't help.
+                returncode, output = -1, str(err)
+                break
+
+            if returncode == 0 or attempt > retries or not transient(returncode, output):
+                break
+
+            time.sleep(retry_delay * 2 ** (attempt - 1))
+
+        results[name] = (returncode, output, attempt)
+
+    return results
+
+
+class Scheduler(object):
+    """
+    Base class for the backends that write and submit batch jobs.
+
+    Attributes
+    ----------
+    launcher : str
+        Command that starts an mpi program, with '%d' in place of the number of processors.
+    mpi : str
+        Family of the launcher, which decides its binding options: 'openmpi', 'mpich', or 'srun'.
+    template : str
+        Template of the job script.
+    """
+
+    mpi = 'openmpi'
+    template = local_template
+
+    def __init__(self, launcher='mpiexec -n %d'):
+        """
+        Initialize the scheduler.
+
+        Parameters
+        ----------
+        launcher : str
+            Command that starts an mpi program, with '%d' in place of the number of processors.
+        """
+        self.launcher = launcher
+
+    def command(self, nproc, args, placement=None, nthread=None):
+        """
+        Return the shell command that runs a program on nproc processors.
+
+        Parameters
+        ----------
+        nproc : int
+            Number of processors.
+        args : str
+            Program and its arguments.
+        placement : str or None
+            Placement policy of the ranks: 'compact', 'scatter', or 'socket'. Default is None,
+            which leaves placement to the launcher.
+        nthread : int or None
+            Number of threads per rank, each of which is given a core.
+
+        Returns
+        -------
+        str
+            Command.
+        """
+        launcher = self.launcher % nproc
+        if placement is not None:
+            launcher = '%s %s' % (launcher, binding_options(self.mpi, placement, nthread))
+
+        return '%s %s' % (launcher, args)
+
+    def write_job(self, name, nproc, commands, walltime, ranks_per_node=None,
+                  nthread=None):
+        """
+        Write the script for one job.
+
+        Parameters
+        ----------
+        name : str
+            Name of the job. The script is written to '<name>.sh'.
+        nproc : int
+            Largest number of processors needed by any of the commands.
+        commands : list of str
+            Commands that the job runs, in order.
+        walltime : int
+            Walltime of the job in hours.
+        ranks_per_node : int or None
+            Largest number of ranks to place on one node. Default is None, which uses every core.
+        nthread : int or None
+            Number of threads per rank. Default is None, which leaves it to the environment.
+
+        Returns
+        -------
+        str
+            Name of the script.
+        """
+        tp = self._fill(self.template, nproc, ranks_per_node, nthread)
+
+        tp = tp.replace('<name>', name)
+        tp = tp.replace('<walltime>', str(walltime))
+        tp = tp.replace('<nproc>', str(nproc))
+        tp = tp.replace('<local>', os.getcwd())
+        tp = tp.replace('<commands>', '\n'.join(commands))
+
+        outname = '%s.sh' % name
+        with open(outname, 'w') as outfile:
+            outfile.write(tp)
+
+        return outname
+
+    def _fill(self, tp, nproc, ranks_per_node=None, nthread=None):
+        """
+        Fill in the parts of the job script that depend on the scheduler's settings.
+
+        Parameters
+        ----------
+        tp : str
+            Job script template.
+        nproc : int
+            Largest number of processors needed by the job.
+        ranks_per_node : int or None
+            Largest number of ranks to place on one node. Default is None, which uses every core.
+        nthread : int or None
+            Number of threads per rank. Default is None, which leaves it to the environment.
+
+        Returns
+        -------
+        str
+            Job script template.
+        """
+        lines = self._options(nproc, ranks_per_node, nthread)
+
+        return tp.replace('<options>', ''.join('%s\n' % line for line in lines))
+
+    def _options(self, nproc, ranks_per_node=None, nthread=None):
+        """
+        Return the directives for a job that depend on the scheduler's settings.
+
+        Parameters
+        ----------
+        nproc : int
+            Largest number of processors needed by the job.
+        ranks_per_node : int or None
+            Largest number of ranks to place on one node. Default is None, which uses every core.
+        nthread : int or None
+            Number of threads per rank. Default is None, which leaves it to the environment.
+
+        Returns
+        -------
+        list of str
+            Lines of the job script.
+        """
+        return []
+
+    def charged_cores(self, nproc, ranks_per_node=None):
+        """
+        Return the number of cores that a job of nproc processors is charged for.
+
+        Parameters
+        ----------
+        nproc : int
+            Largest number of processors needed by the job.
+        ranks_per_node : int or None
+            Largest number of ranks to place on one node. Default is None, which uses every core.
+
+        Returns
+        -------
+        int
+            Number of cores.
+        """
+        return nproc
+
+    def submit(self, jobs):
+        """
+        Submit jobs whose scripts have been written.
+
+        Parameters
+        ----------
+        jobs : list of tuple
+            (name, nproc) for every job.
+
+        Returns
+        -------
+        OrderedDict
+            (job_id, status, attempts, message) for every job, keyed by job name. The status is one
+            of the manifest statuses.
+        """
+        raise NotImplementedError()
+
+    def job_states(self, job_ids):
+        """
+        Return the state of the jobs that are still in the queue.
+
+        Parameters
+        ----------
+        job_ids : list of str
+            IDs of the jobs to look up.
+
+        Returns
+        -------
+        dict or None
+            Manifest status (queued or running) of every job that is still in the queue, keyed by
+            job ID. Jobs that have left the queue are not included. None if the scheduler couldn't
+            be asked.
+        """
+        return {}
+
+    def extend_walltime(self, name, factor):
+        """
+        Multiply the walltime in a job script, e.g., before submitting it again.
+
+        Parameters
+        ----------
+        name : str
+            Name of the job.
+        factor : float
+            Factor applied to the walltime, rounded up to whole hours.
+        """
+        def longer(match):
+            hours = int(math.ceil(int(match.group(2)) * factor))
+            return '%s%d%s' % (match.group(1), hours, match.group(3))
+
+        filename = '%s.sh' % name
+        with open(filename, 'r') as infile:
+            tp = infile.read()
+
+        tp = re.sub(r'(walltime=|--time=)(\d+)(:00:00)', longer, tp)
+
+        with open(filename, 'w') as outfile:
+            outfile.write(tp)
+
+
+class QueueScheduler(Scheduler):
+    """
+    Base class for the backends that submit jobs to a batch queue.
+
+    Submit commands run concurrently from an asyncio queue, and are retried when the scheduler
+    reports a transient error. Before Python 3.7, they run one at a time instead.
+
+    Attributes
+    ----------
+    concurrency : int(4)
+        Largest number of submit commands running at the same time.
+    retries : int(3)
+        Largest number of retries of a submit command that failed with a transient error.
+    retry_delay : float(2.0)
+        Seconds to wait before the first retry. The wait doubles after every retry.
+    submit_command : list of str
+        Command that submits a job script, without the script.
+    transient_errors : tuple of str
+        Lower case fragments of the scheduler's messages for errors that are worth retrying.
+    """
+
+    submit_command = None
+    transient_errors = ()
+
+    def __init__(self, launcher='mpiexec -n %d'):
+        """
+        Initialize the scheduler.
+
+        Parameters
+        ----------
+        launcher : str
+            Command that starts an mpi program, with '%d' in place of the number of processors.
+        """
+        super(QueueScheduler, self).__init__(launcher=launcher)
+        self.concurrency = 4
+        self.retries = 3
+        self.retry_delay = 2.0
+
+    def _query(self, argv):
+        """
+        Run a command that reports on queued jobs.
+
+        Parameters
+        ----------
+        argv : list of str
+            Command.
+
+        Returns
+        -------
+        str or None
+            Standard output of the command, or None if it couldn't be run.
+        """
+        try:
+            proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError:
+            return None
+
+        output, errors = proc.communicate()
+        output = output.decode('utf-8', 'replace')
+        if proc.returncode != 0 and not output.strip():
+            return None
+
+        return output
+
+    def _job_id(self, output):
+        """
+        Return the job ID from the output of a successful submit command.
+
+        Parameters
+        ----------
+        output : str
+            Output of the submit command.
+
+        Returns
+        -------
+        str
+            Job ID.
+        """
+        return output.splitlines()[-1].strip()
+
+    def _transient(self, returncode, output):
+        """
+        Return True if a failed submission is worth retrying.
+
+        Parameters
+        ----------
+        returncode : int
+            Exit status of the submit command.
+        output : str
+            Output of the submit command.
+
+        Returns
+        -------
+        bool
+            True if the error is transient.
+        """
+        output = output.lower()
+        return any(fragment in output for fragment in self.transient_errors)
+
+    def submit(self, jobs):
+        """
+        Submit jobs whose scripts have been written.
+
+        Parameters
+        ----------
+        jobs : list of tuple
+            (name, nproc) for every job.
+
+        Returns
+        -------
+        OrderedDict
+            (job_id, status, attempts, message) for every job, keyed by job name. The status is one
+            of the manifest statuses.
+        """
+        if sys.version_info >= (3, 7):
+            from om_bench.submit import submit_commands
+        else:
+            submit_commands = _submit_sequential
+
+        commands = OrderedDict((name, self.submit_command + ['%s.sh' % name])
+                               for name, nproc in jobs)
+        results = submit_commands(commands, self._transient, concurrency=self.concurrency,
+                                  retries=self.retries, retry_delay=self.retry_delay)
+
+        submitted = OrderedDict()
+        for name, (returncode, output, attempts) in results.items():
+            if returncode == 0 and output:
+                job_id = self._job_id(output)
+                submitted[name] = (job_id, SUBMITTED, attempts, None)
+                print('Submitted:', name, job_id)
+            else:
+                submitted[name] = (None, FAILED, attempts, output)
+                print('Submission failed:', name, '(%s)' % output)
+
+        return submitted
+
+
+class PBSScheduler(QueueScheduler):
+    """
+    Write PBS job scripts and submit them with qsub.
+
+    Attributes
+    ----------
+    account : str or None
+        Group that the jobs are charged to (-W group_list). Default is None, which leaves it to
+        the queue.
+    hardware : <HardwareProfile>
+        Node type that the jobs run on.
+    queue : str or None
+        Queue to submit to.
+    select : str or None
+        Node selection, as given to '-l select='. Default is None, which packs the ranks of each
+        job onto as few nodes of the hardware profile as they fit on.
+    """
+
+    template = pbs_template
+    submit_command = ['qsub']
+    transient_errors = ('connection refused', 'timed out', 'try again', 'temporarily',
+                        'cannot connect', 'communication failure')
+
+    def __init__(self, account=None, queue='normal', hardware='has', select=None,
+                 launcher='mpiexec -n %d'):
+        """
+        Initialize the scheduler.
+
+        Parameters
+        ----------
+        account : str or None
+            Group that the jobs are charged to.
+        queue : str or None
+            Queue to submit to.
+        hardware : str or <HardwareProfile>
+            Node type that the jobs run on, or the name of a registered profile.
+        select : str or None
+            Node selection, as given to '-l select='.
+        launcher : str
+            Command that starts an mpi program, with '%d' in place of the number of processors.
+        """
+        super(PBSScheduler, self).__init__(launcher=launcher)
+        self.account = account
+        self.queue = queue
+        self.hardware = get_profile(hardware)
+        self.select = select
+
+    def _fill(self, tp, nproc, ranks_per_node=None, nthread=None):
+        """
+        Fill in the parts of the job script that depend on the scheduler's settings.
+
+        Parameters
+        ----------
+        tp : str
+            Job script template.
+        nproc : int
+            Largest number of processors needed by the job.
+        ranks_per_node : int or None
+            Largest number of ranks to place on one node. Default is None, which uses every core.
+        nthread : int or None
+            Number of threads per rank. Default is None, which leaves it to the environment.
+
+        Returns
+        -------
+        str
+            Job script template.
+        """
+        select = self.select
+        if select is None:
+            select = self.hardware.select(nproc, ranks_per_node, nthread)
+
+        tp = tp.replace('<select>', select)
+
+        return super(PBSScheduler, self)._fill(tp, nproc, ranks_per_node, nthread)
+
+    def charged_cores(self, nproc, ranks_per_node=None):
+        """
+        Return the number of cores that a job of nproc processors is charged for.
+
+        Nodes are requested whole, so every core of every node is charged.
+
+        Parameters
+        ----------
+        nproc : int
+            Largest number of processors needed by the job.
+        ranks_per_node : int or None
+            Largest number of ranks to place on one node. Default is None, which uses every core.
+
+        Returns
+        -------
+        int
+            Number of cores.
+        """
+        if self.select is not None:
+            chunks = [re.match(r'(\d+):ncpus=(\d+)', chunk) for chunk in self.select.split('+')]
+            return sum(int(match.group(1)) * int(match.group(2)) for match in chunks if match)
+
+        return self.hardware.nodes(nproc, ranks_per_node) * self.hardware.cores_per_node
+
+    def job_states(self, job_ids):
+        """
+        Return the state of the jobs that are still in the queue.
+
+        Parameters
+        ----------
+        job_ids : list of str
+            IDs of the jobs to look up.
+
+        Returns
+        -------
+        dict or None
+            Manifest status (queued or running) of every job that is still in the queue, keyed by
+            job ID. Jobs that have left the queue are not included. None if qstat failed.
+        """
+        if not job_ids:
+            return {}
+
+        output = self._query(['qstat', '-x'] + list(job_ids))
+        if output is None:
+            return None
+
+        # qstat may shorten the server name, so match on the job number.
+        numbers = dict((job_id.split('.')[0], job_id) for job_id in job_ids)
+
+        states = {}
+        for line in output.splitlines():
+            fields = line.split()
+            if len(fields) < 5 or fields[0].split('.')[0] not in numbers:
+                continue
+
+            state = fields[-2]
+            if state in PBS_QUEUED:
+                states[numbers[fields[0].split('.')[0]]] = QUEUED
+            elif state in PBS_RUNNING:
+                states[numbers[fields[0].split('.')[0]]] = RUNNING
+
+        return states
+
+    def _options(self, nproc, ranks_per_node=None, nthread=None):
+        """
+        Return the directives for a job that depend on the scheduler's settings.
+
+        Parameters
+        ----------
+        nproc : int
+            Largest number of processors needed by the job.
+        ranks_per_node : int or None
+            Largest number of ranks to place on one node. Default is None, which uses every core.
+        nthread : int or None
+            Number of threads per rank. Default is None, which leaves it to the environment.
+
+        Returns
+        -------
+        list of str
+            Lines of the job script.
+        """
+        lines = []
+        if self.account is not None:
+            lines.append('#PBS -W group_list=%s' % self.account)
+        if self.queue is not None:
+            lines.append('#PBS -q %s' % self.queue)
+
+        return lines
+
+
+class SlurmScheduler(QueueScheduler):
+    """
+    Write Slurm job scripts and submit them with sbatch.
+
+    Attributes
+    ----------
+    account : str or None
+        Account that the jobs are charged to.
+    constraint : str or None
+        Node features to request. Default is None, which requests the model of the hardware
+        profile, if there is one.
+    hardware : <HardwareProfile> or None
+        Node type that the jobs run on. Default is None, which lets Slurm place the tasks.
+    partition : str or None
+        Partition to submit to.
+    """
+
+    mpi = 'srun'
+    template = slurm_template
+    submit_command = ['sbatch', '--parsable']
+    transient_errors = ('socket timed out', 'unable to contact', 'temporarily unavailable',
+                        'try again', 'connection refused')
+
+    def __init__(self, account=None, partition=None, constraint=None, hardware=None,
+                 launcher='srun -n %d'):
+        """
+        Initialize the scheduler.
+
+        Parameters
+        ----------
+        account : str or None
+            Account that the jobs are charged to.
+        partition : str or None
+            Partition to submit to.
+        constraint : str or None
+            Node features to request.
+        hardware : str or <HardwareProfile> or None
+            Node type that the jobs run on, or the name of a registered profile.
+        launcher : str
+            Command that starts an mpi program, with '%d' in place of the number of processors.
+        """
+        super(SlurmScheduler, self).__init__(launcher=launcher)
+        self.account = account
+        self.partition = partition
+        self.constraint = constraint
+        self.hardware = None if hardware is None else get_profile(hardware)
+
+    def _options(self, nproc, ranks_per_node=None, nthread=None):
+        """
+        Return the directives for a job that depend on the scheduler's settings.
+
+        Parameters
+        ----------
+        nproc : int
+            Largest number of processors needed by the job.
+        ranks_per_node : int or None
+            Largest number of ranks to place on one node. Default is None, which uses every core.
+        nthread : int or None
+            Number of threads per rank. Default is None, which leaves it to the environment.
+
+        Returns
+        -------
+        list of str
+            Lines of the job script.
+        """
+        lines = []
+        constraint = self.constraint
+        if self.hardware is not None:
+            layout = self.hardware.layout(nproc, ranks_per_node)
+            lines.append('#SBATCH --nodes=%d' % self.hardware.nodes(nproc, ranks_per_node))
+            lines.append('#SBATCH --ntasks-per-node=%d' % layout[0][1])
+            if constraint is None:
+                constraint = self.hardware.model
+        elif ranks_per_node is not None:
+            lines.append('#SBATCH --ntasks-per-node=%d' % ranks_per_node)
+        if nthread is not None:
+            lines.append('#SBATCH --cpus-per-task=%d' % nthread)
+        if self.account is not None:
+            lines.append('#SBATCH --account=%s' % self.account)
+        if self.partition is not None:
+            lines.append('#SBATCH --partition=%s' % self.partition)
+        if constraint is not None:
+            lines.append('#SBATCH --constraint=%s' % constraint)
+
+        return lines
+
+    def _job_id(self, output):
+        """
+        Return the job ID from the output of a successful submit command.
+
+        Parameters
+        ----------
+        output : str
+            Output of 'sbatch --parsable', which is the job ID and possibly the cluster name.
+
+        Returns
+        -------
+        str
+            Job ID.
+        """
+        return output.splitlines()[-1].split(';')[0].strip()
+
+    def job_states(self, job_ids):
+        """
+        Return the state of the jobs that are still in the queue.
+
+        Parameters
+        ----------
+        job_ids : list of str
+            IDs of the jobs to look up.
+
+        Returns
+        -------
+        dict or None
+            Manifest status (queued or running) of every job that is still in the queue, keyed by
+            job ID. Jobs that have left the queue are not included. None if squeue failed.
+        """
+        if not job_ids:
+            return {}
+
+        # Listing the user's jobs still works when some of the IDs have been purged.
+        output = self._query(['squeue', '-h', '-o', '%i %t', '-u', getpass.getuser()])
+        if output is None:
+            return None
+
+        states = {}
+        for line in output.splitlines():
+            fields = line.split()
+            if len(fields) != 2 or fields[0] not in job_ids:
+                continue
+
+            if fields[1] in SLURM_QUEUED:
+                states[fields[0]] = QUEUED
+            elif fields[1] in SLURM_RUNNING:
+                states[fields[0]] = RUNNING
+
+        return states
+
+
+class LocalScheduler(Scheduler):
+    """
+    Run job scripts on this machine, without a queue.
+
+    Jobs run concurrently as long as the ranks they use fit on the machine. A job that needs more
+    ranks than the machine has runs alone. submit returns when every job has finished.
+
+    Once a command with a placement policy has been written, jobs run one at a time instead. Every
+    launch binds its ranks starting from the first core, so concurrent jobs would share cores.
+
+    Attributes
+    ----------
+    exclusive : bool
+        If True, jobs run one at a time. Set when a command with a placement policy is written.
+    max_ranks : int
+        Largest number of ranks that run at the same time.
+    poll : float
+        Seconds between checks for finished jobs.
+    """
+
+    template = local_template
+
+    def __init__(self, max_ranks=None, launcher='mpiexec -n %d', poll=0.1):
+        """
+        Initialize the scheduler.
+
+        Parameters
+        ----------
+        max_ranks : int or None
+            Largest number of ranks that run at the same time. Default is None, which uses the
+            number of cores.
+        launcher : str
+            Command that starts an mpi program, with '%d' in place of the number of processors.
+        poll : float
+            Seconds between checks for finished jobs.
+        """
+        super(LocalScheduler, self).__init__(launcher=launcher)
+        if max_ranks is None:
+            max_ranks = multiprocessing.cpu_count()
+        self.max_ranks = max_ranks
+        self.poll = poll
+        self.exclusive = False
+
+    def command(self, nproc, args, placement=None, nthread=None):
+        """
+        Return the shell command that runs a program on nproc processors.
+
+        Parameters
+        ----------
+        nproc : int
+            Number of processors.
+        args : str
+            Program and its arguments.
+        placement : str or None
+            Placement policy of the ranks: 'compact', 'scatter', or 'socket'. Default is None,
+            which leaves placement to the launcher. If given, jobs run one at a time.
+        nthread : int or None
+            Number of threads per rank, each of which is given a core.
+
+        Returns
+        -------
+        str
+            Command.
+        """
+        if placement is not None:
+            self.exclusive = True
+
+        return super(LocalScheduler, self).command(nproc, args, placement=placement,
+                                                   nthread=nthread)
+
+    def submit(self, jobs):
+        """
+        Run jobs whose scripts have been written, and wait for them to finish.
+
+        The output of each job is written to 'stdout_<name>.out'.
+
+        Parameters
+        ----------
+        jobs : list of tuple
+            (name, nproc) for every job.
+
+        Returns
+        -------
+        OrderedDict
+            (job_id, status, attempts, message) for every job, keyed by job name. The job ID is
+            'local:<pid>' and the status is completed or failed.
+        """
+        pending = list(jobs)
+        running = []
+        finished = {}
+        used = 0
+
+        while pending or running:
+
+            # Start every waiting job that fits, in order.
+            for name, nproc in list(pending):
+                ranks = min(nproc, self.max_ranks)
+                if running and (self.exclusive or used + ranks > self.max_ranks):
+                    continue
+
+                outfile = open('stdout_%s.out' % name, 'w')
+                proc = subprocess.Popen(['bash', '%s.sh' % name], stdout=outfile,
+                                        stderr=subprocess.STDOUT)
+                running.append((name, ranks, proc, outfile))
+                pending.remove((name, nproc))
+                used += ranks
+                print('Started:', name)
+
+            time.sleep(self.poll)
+
+            for job in list(running):
+                name, ranks, proc, outfile = job
+                if proc.poll() is None:
+                    continue
+
+                outfile.close()
+                running.remove(job)
+                used -= ranks
+
+                job_id = 'local:%d' % proc.pid
+                if proc.returncode != 0:
+                    message = 'exit status %d' % proc.returncode
+                    finished[name] = (job_id, FAILED, 1, message)
+                    print('Failed:', name, '(%s)' % message)
+                else:
+                    finished[name] = (job_id, COMPLETED, 1, None)
+                    print('Finished:', name)
+
+        return OrderedDict((name, finished[name]) for name, nproc in jobs)
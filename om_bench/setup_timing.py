@@ -0,0 +1,100 @@
+"""
+Timing of the internal stages of OpenMDAO setup and final_setup.
+"""
+from collections import OrderedDict
+from time import time
+
+
+# Private System methods that make up each stage, in the order they run. Methods that don't exist
+# in the installed version of OpenMDAO are skipped.
+SETUP_STAGES = OrderedDict([
+    ('tree', ('_setup_procs', '_configure')),
+    ('vars', ('_setup_var_data', '_setup_vec_names', '_setup_vars', '_setup_var_index_ranges',
+              '_setup_var_index_maps', '_setup_var_sizes')),
+    ('connections', ('_setup_global_connections', '_setup_relevance', '_setup_connections')),
+    ('vectors', ('_setup_global', '_setup_vectors', '_setup_bounds', '_setup_transfers')),
+    ('solvers', ('_setup_solvers', '_setup_partials', '_setup_jacobians')),
+])
+
+
+class SetupStageTimer(object):
+    """
+    Accumulate the time spent in each internal setup stage of a model.
+
+    Only the calls made on the top level model are wrapped. Those recurse into every subsystem, so
+    the recorded time covers the whole tree without counting anything twice.
+
+    Attributes
+    ----------
+    times : OrderedDict
+        Accumulated time for each stage, in seconds.
+    _model : <System>
+        Model whose methods are wrapped.
+    _wrapped : list of str
+        Names of the methods that were wrapped on the model instance.
+    """
+
+    def __init__(self):
+        """
+        Initialize the timer.
+        """
+        self.times = OrderedDict((stage, 0.0) for stage in SETUP_STAGES)
+        self._model = None
+        self._wrapped = []
+
+    def install(self, model):
+        """
+        Wrap the setup stage methods on the given model.
+
+        Parameters
+        ----------
+        model : <System>
+            Top level model of the problem, before setup is called.
+        """
+        self._model = model
+
+        for stage, methods in SETUP_STAGES.items():
+            for method_name in methods:
+                method = getattr(model, method_name, None)
+                if method is None:
+                    continue
+
+                setattr(model, method_name, self._wrap(stage, method))
+                self._wrapped.append(method_name)
+
+    def remove(self):
+        """
+        Restore the original methods on the model.
+        """
+        for method_name in self._wrapped:
+            delattr(self._model, method_name)
+
+        self._wrapped = []
+        self._model = None
+
+    def _wrap(self, stage, method):
+        """
+        Return a version of method that adds its runtime to the given stage.
+
+        Parameters
+        ----------
+        stage : str
+            Name of the stage.
+        method : callable
+            Bound method to wrap.
+
+        Returns
+        -------
+        callable
+            Wrapped method.
+        """
+        times = self.times
+
+        def timed(*args, **kwargs):
+            t0 = time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                times[stage] += time() - t0
+
+        return timed
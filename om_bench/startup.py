@@ -0,0 +1,88 @@
+"""
+Measurement of the cost of starting a benchmark process, from interpreter start to Problem ready.
+"""
+import os
+from time import time
+
+
+# Result columns added when startup timing is on.
+STARTUP_COLUMNS = ('t_interp', 't_import', 't_ready')
+
+# Times at which the runner reached each step of startup.
+_marks = {}
+
+# Startup times of this process, once its first Problem is ready.
+_startup = None
+
+
+def process_start_time():
+    """
+    Return the time at which this process started.
+
+    Returns
+    -------
+    float or None
+        Start time in seconds since the epoch, or None if the platform doesn't report it.
+    """
+    try:
+        with open('/proc/self/stat') as infile:
+            # The command name may contain spaces, so split after it.
+            fields = infile.read().rpartition(')')[2].split()
+        with open('/proc/uptime') as infile:
+            uptime = float(infile.read().split()[0])
+    except (IOError, OSError, IndexError, ValueError):
+        return None
+
+    age = uptime - float(fields[19]) / os.sysconf('SC_CLK_TCK')
+
+    return time() - age
+
+
+def mark(step):
+    """
+    Record that the runner has reached a step of startup.
+
+    Parameters
+    ----------
+    step : str
+        Either 'runner' (the runner has started) or 'imported' (the Bench's module is imported).
+    """
+    _marks[step] = time()
+
+
+def startup_times(t_ready):
+    """
+    Return the startup times of this process.
+
+    They are measured when the first Problem is ready, and every later run in the same process
+    reports the same values, since they all shared that startup.
+
+    Parameters
+    ----------
+    t_ready : float
+        Time at which the Problem of the current run finished final_setup.
+
+    Returns
+    -------
+    tuple of float
+        Time from interpreter start to the runner starting, time spent importing the Bench's
+        module (and OpenMDAO with it), and time from interpreter start to Problem ready. The first
+        two are zero unless the process was started by om_bench.runner.
+    """
+    global _startup
+
+    if _startup is None:
+        t_start = process_start_time()
+        if t_start is None:
+            t_start = _marks.get('runner', t_ready)
+
+        t_interp = 0.0
+        t_import = 0.0
+        if 'runner' in _marks:
+            t_interp = _marks['runner'] - t_start
+            if 'imported' in _marks:
+                t_import = _marks['imported'] - _marks['runner']
+
+        _startup = (t_interp, t_import, t_ready - t_start)
+
+    return _startup
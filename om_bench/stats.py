@@ -0,0 +1,342 @@
+"""
+Statistics for repeated benchmark timings.
+"""
+from time import time
+
+import numpy as np
+
+from scipy.stats import t as student_t
+
+
+# Statistics saved next to the mean of every timing column.
+STATS = ('median', 'std', 'ci_low', 'ci_high')
+
+# Statistics over all MPI ranks saved for every timing column.
+RANK_STATS = ('min', 'max', 'mean', 'imb')
+
+# Statistics over all MPI ranks saved for every memory column.
+MEMORY_RANK_STATS = ('min', 'max', 'mean', 'total')
+
+
+def is_timing(name):
+    """
+    Return True if the named column holds a time.
+
+    Timing columns are named 't<phase>' (e.g., t1, t_setup, t_comm_p2p) or '<name>_t' (e.g.,
+    comm_Allreduce_t).
+
+    Parameters
+    ----------
+    name : str
+        Column name.
+
+    Returns
+    -------
+    bool
+        True for timing columns, not counting the statistics over MPI ranks.
+    """
+    return (name.startswith('t') or name.endswith('_t')) and '_rank_' not in name
+
+
+def is_memory(name):
+    """
+    Return True if the named column holds a memory measurement.
+
+    Parameters
+    ----------
+    name : str
+        Column name.
+
+    Returns
+    -------
+    bool
+        True for memory columns, not counting the statistics over MPI ranks.
+    """
+    return name.startswith('mem_') and '_rank_' not in name
+
+
+def summarize(samples, confidence=0.95):
+    """
+    Return the mean, median, standard deviation, and confidence interval of some samples.
+
+    Parameters
+    ----------
+    samples : ndarray
+        1D array of samples.
+    confidence : float
+        Confidence level for the interval on the mean.
+
+    Returns
+    -------
+    dict
+        Statistics keyed by 'mean' and the names in STATS. With fewer than two samples, the
+        standard deviation and confidence interval are nan.
+    """
+    samples = np.asarray(samples, dtype=float)
+    n = len(samples)
+    mean = np.mean(samples)
+
+    if n > 1:
+        std = np.std(samples, ddof=1)
+        half = student_t.ppf(0.5 + 0.5 * confidence, n - 1) * std / np.sqrt(n)
+    else:
+        std = half = np.nan
+
+    return {
+        'mean': mean,
+        'median': np.median(samples),
+        'std': std,
+        'ci_low': mean - half,
+        'ci_high': mean + half,
+    }
+
+
+def relative_ci(samples, confidence=0.95):
+    """
+    Return the half width of the confidence interval on the mean, relative to the mean.
+
+    Parameters
+    ----------
+    samples : ndarray
+        1D array of samples.
+    confidence : float
+        Confidence level for the interval on the mean.
+
+    Returns
+    -------
+    float
+        Relative half width. Zero if the mean is zero, inf if there are fewer than two samples.
+    """
+    samples = np.asarray(samples, dtype=float)
+    n = len(samples)
+    mean = np.mean(samples)
+
+    if mean == 0.0:
+        return 0.0
+    if n < 2:
+        return np.inf
+
+    std = np.std(samples, ddof=1)
+    half = student_t.ppf(0.5 + 0.5 * confidence, n - 1) * std / np.sqrt(n)
+
+    return half / abs(mean)
+
+
+def repeat(run, num_averages, num_warmup=0, adaptive=False, ci_target=0.05, time_budget=None,
+           max_averages=100, confidence=0.95, watch=None):
+    """
+    Run a benchmark repeatedly and return the raw samples.
+
+    Warm-up runs are made first and discarded. After num_averages timed runs, adaptive mode keeps
+    going until the confidence interval of every watched column is narrower than ci_target, the
+    time budget runs out, or max_averages samples have been taken.
+
+    Parameters
+    ----------
+    run : callable
+        Function with no arguments that runs the benchmark once and returns a tuple of values.
+    num_averages : int
+        Number of timed runs. In adaptive mode, this is the minimum.
+    num_warmup : int
+        Number of discarded runs made before the timed runs.
+    adaptive : bool
+        If True, keep repeating until the confidence interval target is met.
+    ci_target : float
+        Target half width of the confidence interval, relative to the mean.
+    time_budget : float or None
+        In adaptive mode, stop once the timed runs have taken this many seconds.
+    max_averages : int
+        In adaptive mode, never take more than this many samples.
+    confidence : float
+        Confidence level for the interval on the mean.
+    watch : list of int or None
+        Indices of the values that must meet the target. Default is all of them.
+
+    Returns
+    -------
+    list of tuple
+        Return value of every timed run.
+    """
+    for j in range(num_warmup):
+        run()
+
+    samples = []
+    t0 = time()
+
+    while True:
+        samples.append(tuple(run()))
+
+        if len(samples) < num_averages:
+            continue
+        if not adaptive or len(samples) >= max_averages:
+            break
+        if time_budget is not None and time() - t0 > time_budget:
+            break
+
+        values = np.array(samples)
+        cols = range(values.shape[1]) if watch is None else watch
+        if len(samples) > 1 and \
+           all(relative_ci(values[:, j], confidence) <= ci_target for j in cols):
+            break
+
+    return samples
+
+
+def fit_power_law(x, y):
+    """
+    Fit y = c * x**p by least squares in log space.
+
+    Non-positive values can't be placed in log space, so those points are ignored.
+
+    Parameters
+    ----------
+    x : ndarray
+        Problem sizes.
+    y : ndarray
+        Measured values, e.g., times.
+
+    Returns
+    -------
+    float
+        Exponent p. nan if fewer than two points remain.
+    float
+        Standard error of the exponent. nan if fewer than three points remain.
+    float
+        Coefficient c.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = (x > 0.0) & (y > 0.0) & np.isfinite(y)
+    logx = np.log(x[keep])
+    logy = np.log(y[keep])
+    n = len(logx)
+
+    if n < 2 or np.ptp(logx) == 0.0:
+        return np.nan, np.nan, np.nan
+
+    xbar = np.mean(logx)
+    sxx = np.sum((logx - xbar) ** 2)
+    slope = np.sum((logx - xbar) * (logy - np.mean(logy))) / sxx
+    intercept = np.mean(logy) - slope * xbar
+
+    if n > 2:
+        resid = logy - (intercept + slope * logx)
+        stderr = np.sqrt(np.sum(resid ** 2) / (n - 2) / sxx)
+    else:
+        stderr = np.nan
+
+    return slope, stderr, np.exp(intercept)
+
+
+def summary_columns(columns):
+    """
+    Return the column names for the summary of samples with the given columns.
+
+    Parameters
+    ----------
+    columns : list of str
+        Names of the sampled values.
+
+    Returns
+    -------
+    list of str
+        The sampled names (which hold the mean), the statistics for each timing column, and the
+        number of samples.
+    """
+    names = list(columns)
+    for name in columns:
+        if is_timing(name):
+            names.extend(['%s_%s' % (name, stat) for stat in STATS])
+    names.append('nsample')
+
+    return names
+
+
+def summarize_samples(columns, samples, confidence=0.95):
+    """
+    Reduce the samples for one point to a row of summary values.
+
+    Parameters
+    ----------
+    columns : list of str
+        Names of the sampled values.
+    samples : list of tuple
+        Sampled values from each repetition.
+    confidence : float
+        Confidence level for the interval on the mean.
+
+    Returns
+    -------
+    tuple
+        Values in the order given by summary_columns.
+    """
+    values = np.array(samples, dtype=float)
+
+    row = list(np.mean(values, axis=0))
+    for j, name in enumerate(columns):
+        if is_timing(name):
+            stats = summarize(values[:, j], confidence)
+            row.extend([stats[stat] for stat in STATS])
+    row.append(len(samples))
+
+    return tuple(row)
+
+
+def rank_columns(columns):
+    """
+    Return the column names for the statistics over MPI ranks.
+
+    Parameters
+    ----------
+    columns : list of str
+        Names of the values recorded on each rank.
+
+    Returns
+    -------
+    list of str
+        Names of the minimum, maximum, mean and imbalance ratio of each timing column, and of the
+        minimum, maximum, mean and total of each memory column.
+    """
+    names = []
+    for name in columns:
+        if is_timing(name):
+            names.extend('%s_rank_%s' % (name, stat) for stat in RANK_STATS)
+        elif is_memory(name):
+            names.extend('%s_rank_%s' % (name, stat) for stat in MEMORY_RANK_STATS)
+
+    return names
+
+
+def summarize_ranks(columns, rank_values):
+    """
+    Reduce the values recorded on every MPI rank.
+
+    The imbalance ratio is the slowest rank's time divided by the mean time, so a perfectly
+    balanced phase has a ratio of 1.
+
+    Parameters
+    ----------
+    columns : list of str
+        Names of the values recorded on each rank.
+    rank_values : list of tuple
+        Values from each rank.
+
+    Returns
+    -------
+    list of float
+        Values in the order given by rank_columns.
+    """
+    values = np.array(rank_values, dtype=float)
+
+    row = []
+    for j, name in enumerate(columns):
+        if is_timing(name):
+            col = values[:, j]
+            mean = np.mean(col)
+            imbalance = np.max(col) / mean if mean > 0.0 else 1.0
+            row.extend([np.min(col), np.max(col), mean, imbalance])
+        elif is_memory(name):
+            col = values[:, j]
+            row.extend([np.min(col), np.max(col), np.mean(col), np.sum(col)])
+
+    return row
@@ -0,0 +1,335 @@
+"""
+Columnar, self-describing storage for benchmark results.
+
+A result store is a directory holding one numpy structured array per table, plus a meta.json file
+that describes the run and the environment it ran in:
+
+    beam_state_nl_ln.bench/
+        meta.json       name, mode, ops, table columns and environment fingerprint
+        points.npy      summary of every point
+        samples.npy     raw samples of every repetition
+        ranks.npy       values recorded on every mpi rank (mpi runs with per_rank only)
+        launches.npy    startup cost of every mpi launch (mpi runs with batch_points only)
+
+Coordinates are stored as integers (the flag as a boolean) and everything else as float64. Tables
+are loaded memory-mapped.
+"""
+from collections import OrderedDict
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+# Extension of a result store directory.
+STORE_EXT = '.bench'
+
+# Version of the store layout.
+STORE_FORMAT = 1
+
+# Parts of the environment fingerprint that must match for saved results to be resumed.
+RESUME_ENV_KEYS = ('python', 'openmdao', 'numpy', 'scipy', 'git_om_bench', 'git_openmdao')
+
+# Parts of the environment fingerprint that are only reported when they differ on resume. Jobs of
+# one campaign run on different nodes, and may be started from another directory.
+INFO_ENV_KEYS = ('host', 'git_cwd')
+
+# Largest .npy header read back. Each column adds about 30 bytes to the header, and wide tables
+# (e.g., with per-call communication timing) pass numpy's default limit of 10000.
+MAX_HEADER_SIZE = 1 << 20
+
+# Columns that are stored as integers.
+INT_COLUMNS = ('ndv', 'nstate', 'nproc', 'rep', 'rank', 'nsample', 'njobs', 'nthread',
+               'nthread_blas')
+
+
+def _dtype(columns):
+    """
+    Return the structured dtype for a table with the given columns.
+
+    Parameters
+    ----------
+    columns : list of str
+        Column names.
+
+    Returns
+    -------
+    numpy.dtype
+        Structured dtype.
+    """
+    fields = []
+    for name in columns:
+        if name == 'flag':
+            fields.append((name, '?'))
+        elif name in INT_COLUMNS:
+            fields.append((name, '<i8'))
+        else:
+            fields.append((name, '<f8'))
+
+    return np.dtype(fields)
+
+
+def _coerce(value):
+    """
+    Convert a value read from an older file into something numpy can store.
+
+    Parameters
+    ----------
+    value : object
+        Value to convert.
+
+    Returns
+    -------
+    object
+        Converted value.
+    """
+    if isinstance(value, str):
+        return value.strip() == 'True'
+
+    return value
+
+
+def _cpu_model():
+    """
+    Return a description of the processor.
+
+    Returns
+    -------
+    str
+        Processor model name, or whatever the platform module reports.
+    """
+    try:
+        with open('/proc/cpuinfo') as infile:
+            for line in infile:
+                if line.startswith('model name'):
+                    return line.partition(':')[2].strip()
+    except (IOError, OSError):
+        pass
+
+    return platform.processor()
+
+
+def _git_hash(path):
+    """
+    Return the git commit of the repository that contains a path.
+
+    Parameters
+    ----------
+    path : str
+        Any path inside the repository.
+
+    Returns
+    -------
+    str or None
+        Commit hash, or None if path isn't in a git repository.
+    """
+    try:
+        with open(os.devnull, 'w') as devnull:
+            output = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=path,
+                                             stderr=devnull)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return output.decode('ascii').strip()
+
+
+def _version(module_name):
+    """
+    Return the version of an installed module.
+
+    Parameters
+    ----------
+    module_name : str
+        Name of the module.
+
+    Returns
+    -------
+    str or None
+        Version, or None if the module isn't installed.
+    """
+    try:
+        module = __import__(module_name)
+    except ImportError:
+        return None
+
+    return getattr(module, '__version__', None)
+
+
+def env_fingerprint():
+    """
+    Return a description of the machine and software that produced a set of results.
+
+    Returns
+    -------
+    OrderedDict
+        Host, processor, python and package versions, and git commits.
+    """
+    env = OrderedDict()
+    env['date'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    env['host'] = platform.node()
+    env['platform'] = platform.platform()
+    env['cpu'] = _cpu_model()
+    env['ncpu'] = multiprocessing.cpu_count()
+    env['python'] = platform.python_version()
+
+    for module_name in ('openmdao', 'numpy', 'scipy', 'mpi4py', 'petsc4py'):
+        env[module_name] = _version(module_name)
+
+    env['git_om_bench'] = _git_hash(os.path.dirname(os.path.abspath(__file__)))
+    env['git_cwd'] = _git_hash(os.getcwd())
+
+    openmdao = sys.modules.get('openmdao')
+    if openmdao is not None:
+        env['git_openmdao'] = _git_hash(os.path.dirname(os.path.abspath(openmdao.__file__)))
+
+    return env
+
+
+def recover_store(path):
+    """
+    Put back a store that was moved aside by write_store if the new one was never put in place.
+
+    write_store moves the old store to '<path>.old' before renaming the new one to path. If the
+    process dies between the two, only the old store is left.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the store.
+
+    Returns
+    -------
+    bool
+        True if a store exists at path.
+    """
+    old_path = path + '.old'
+    if not os.path.exists(path) and os.path.isdir(old_path):
+        os.rename(old_path, path)
+
+    return os.path.isdir(path)
+
+
+def write_store(path, name, mode, ops, tables, env=None, config=None):
+    """
+    Write a result store.
+
+    The store is written next to its final location and moved into place when complete, so an
+    interrupted write never leaves a partial store behind.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the store.
+    name : str
+        Name of the benchmark.
+    mode : str
+        Run mode.
+    ops : tuple of bool
+        Whether the nonlinear, linear, and driver times were recorded.
+    tables : OrderedDict
+        (columns, rows) for each table, keyed by table name.
+    env : dict or None
+        Environment fingerprint. Default is the fingerprint of this process.
+    config : dict or None
+        Settings of the benchmark that produced the results.
+    """
+    if env is None:
+        env = env_fingerprint()
+
+    recover_store(path)
+
+    meta = OrderedDict()
+    meta['format'] = STORE_FORMAT
+    meta['name'] = name
+    meta['mode'] = mode
+    meta['ops'] = OrderedDict(zip(('nl', 'ln', 'drv'), [bool(op) for op in ops]))
+    meta['tables'] = OrderedDict()
+    meta['env'] = env
+    if config is not None:
+        meta['config'] = config
+
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    for table, (columns, rows) in tables.items():
+        array = np.array([tuple(_coerce(value) for value in row) for row in rows],
+                         dtype=_dtype(columns))
+        np.save(os.path.join(tmp_path, '%s.npy' % table), array)
+        meta['tables'][table] = list(columns)
+
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as outfile:
+        json.dump(meta, outfile, indent=2)
+
+    if os.path.exists(path):
+        old_path = path + '.old'
+        if os.path.exists(old_path):
+            shutil.rmtree(old_path)
+        os.rename(path, old_path)
+        os.rename(tmp_path, path)
+        shutil.rmtree(old_path)
+    else:
+        os.rename(tmp_path, path)
+
+
+def read_meta(path):
+    """
+    Read the description of a result store.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the store.
+
+    Returns
+    -------
+    dict
+        Contents of meta.json.
+    """
+    recover_store(path)
+
+    with open(os.path.join(path, 'meta.json')) as infile:
+        return json.load(infile, object_pairs_hook=OrderedDict)
+
+
+def read_store(path, table='points', mmap=True):
+    """
+    Read one table of a result store.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the store.
+    table : str
+        Name of the table.
+    mmap : bool
+        If True, the table is memory-mapped instead of read into memory.
+
+    Returns
+    -------
+    dict
+        Contents of meta.json.
+    ndarray
+        Structured array with one field per column.
+    """
+    meta = read_meta(path)
+    if table not in meta['tables']:
+        msg = "Result store '%s' has no table named '%s'." % (path, table)
+        raise KeyError(msg)
+
+    filename = os.path.join(path, '%s.npy' % table)
+    mmap_mode = 'r' if mmap else None
+    try:
+        array = np.load(filename, mmap_mode=mmap_mode, max_header_size=MAX_HEADER_SIZE)
+    except TypeError:
+        # Versions of numpy that don't limit the header size.
+        array = np.load(filename, mmap_mode=mmap_mode)
+
+    return meta, array
@@ -0,0 +1,122 @@
+"""
+Asynchronous submission of batch jobs to a queue, with retries on transient scheduler errors.
+
+Requires Python 3.7. QueueScheduler submits one job at a time on older interpreters, without
+importing this module.
+"""
+import asyncio
+from collections import OrderedDict
+
+
+async def _submit_one(argv, transient, retries, retry_delay):
+    """
+    Run one submit command, retrying when it fails with a transient error.
+
+    Parameters
+    ----------
+    argv : list of str
+        Submit command, e.g., ['qsub', 'job.sh'].
+    transient : callable
+        Function of (returncode, output) that returns True if the failure is worth retrying.
+    retries : int
+        Largest number of retries.
+    retry_delay : float
+        Seconds to wait before the first retry. The wait doubles after every retry.
+
+    Returns
+    -------
+    int
+        Exit status of the last attempt (-1 if the command couldn't be started).
+    str
+        Standard output of the last attempt, or its error message.
+    int
+        Number of attempts.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            proc = await asyncio.create_subprocess_exec(*argv, stdout=asyncio.subprocess.PIPE,
+                                                        stderr=asyncio.subprocess.STDOUT)
+            output, _ = await proc.communicate()
+            returncode = proc.returncode
+            output = output.decode('utf-8', 'replace').strip()
+        except OSError as err:
+            # The submit command doesn't exist; retrying won't help.
+            return -1, str(err), attempt
+
+        if returncode == 0 or attempt > retries or not transient(returncode, output):
+            return returncode, output, attempt
+
+        await asyncio.sleep(retry_delay * 2 ** (attempt - 1))
+
+
+async def _submit_all(commands, transient, concurrency, retries, retry_delay):
+    """
+    Run submit commands from a queue, with a limited number running at the same time.
+
+    Parameters
+    ----------
+    commands : OrderedDict
+        Submit command for each job, keyed by job name.
+    transient : callable
+        Function of (returncode, output) that returns True if the failure is worth retrying.
+    concurrency : int
+        Largest number of submit commands running at the same time.
+    retries : int
+        Largest number of retries of each command.
+    retry_delay : float
+        Seconds to wait before the first retry.
+
+    Returns
+    -------
+    dict
+        (returncode, output, attempts) for each job, keyed by job name.
+    """
+    queue = asyncio.Queue()
+    for name in commands:
+        queue.put_nowait(name)
+
+    results = {}
+
+    async def worker():
+        while True:
+            try:
+                name = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results[name] = await _submit_one(commands[name], transient, retries, retry_delay)
+
+    await asyncio.gather(*[worker() for _ in range(max(1, min(concurrency, len(commands))))])
+
+    return results
+
+
+def submit_commands(commands, transient, concurrency=4, retries=3, retry_delay=2.0):
+    """
+    Run submit commands concurrently and return their results in order.
+
+    Parameters
+    ----------
+    commands : OrderedDict
+        Submit command for each job, keyed by job name.
+    transient : callable
+        Function of (returncode, output) that returns True if the failure is worth retrying.
+    concurrency : int
+        Largest number of submit commands running at the same time.
+    retries : int
+        Largest number of retries of each command.
+    retry_delay : float
+        Seconds to wait before the first retry. The wait doubles after every retry.
+
+    Returns
+    -------
+    OrderedDict
+        (returncode, output, attempts) for each job, keyed by job name.
+    """
+    if not commands:
+        return OrderedDict()
+
+    results = asyncio.run(_submit_all(commands, transient, concurrency, retries, retry_delay))
+
+    return OrderedDict((name, results[name]) for name in commands)
@@ -0,0 +1,110 @@
+"""
+Planning of the points that make up a benchmark sweep.
+"""
+from collections import namedtuple
+from itertools import product
+
+
+# Full coordinate of a single benchmark point.
+SweepPoint = namedtuple('SweepPoint', ['ndv', 'nstate', 'nproc', 'flag'])
+
+# Sweep axes in the order they are named in the run mode.
+AXES = (('desvar', 'ndv'), ('state', 'nstate'), ('proc', 'nproc'))
+
+
+def sweep_mode(desvars, states, procs):
+    """
+    Return the run mode string for a sweep.
+
+    The run mode names every axis that has more than one value, joined with '-' so that it can
+    be safely embedded in the underscore-delimited result filenames.
+
+    Parameters
+    ----------
+    desvars : list
+        List of design variable counts.
+    states : list
+        List of state counts.
+    procs : list
+        List of processor counts.
+
+    Returns
+    -------
+    str
+        Run mode, e.g., 'state', 'proc', or 'state-proc'.
+    """
+    varying = [axis for (axis, _), values in zip(AXES, (desvars, states, procs))
+               if len(values) > 1]
+
+    if not varying:
+        return 'state'
+
+    return '-'.join(varying)
+
+
+def mode_axes(mode):
+    """
+    Return the SweepPoint field names that vary for a given run mode.
+
+    Parameters
+    ----------
+    mode : str
+        Run mode string, as returned by sweep_mode.
+
+    Returns
+    -------
+    list of str
+        Names of the SweepPoint fields, in run mode order.
+    """
+    fields = dict(AXES)
+    return [fields[axis] for axis in mode.split('-')]
+
+
+def plan_sweep(desvars, states, procs, flags, cost=None):
+    """
+    Return the full-factorial list of points for a sweep.
+
+    Parameters
+    ----------
+    desvars : list
+        List of design variable counts.
+    states : list
+        List of state counts.
+    procs : list
+        List of processor counts.
+    flags : list
+        List of flag values.
+    cost : callable or None
+        Function that takes a SweepPoint and returns its expected cost. When given, points are
+        ordered so that the cheapest run first. Points of equal cost keep their natural order.
+
+    Returns
+    -------
+    list of SweepPoint
+        Points to run.
+    """
+    points = [SweepPoint(ndv, nstate, nproc, flag)
+              for nproc, nstate, ndv, flag in product(procs, states, desvars, flags)]
+
+    if cost is not None:
+        points = sorted(points, key=cost)
+
+    return points
+
+
+def coordinate_key(point):
+    """
+    Return a sort key that puts points back in their natural sweep order.
+
+    Parameters
+    ----------
+    point : tuple
+        Sequence that starts with (ndv, nstate, nproc, flag).
+
+    Returns
+    -------
+    tuple
+        Sort key.
+    """
+    ndv, nstate, nproc, flag = point[:4]
+    return (nproc, nstate, ndv, flag)
@@ -0,0 +1,134 @@
+"""
+Control and measurement of the number of threads that each rank's BLAS and OpenMP runtimes use.
+
+The thread count is set through the environment variables that the common BLAS libraries and
+OpenMP read when they are loaded. If threadpoolctl is installed, the thread pools of libraries that
+are already loaded are limited as well, and the count that BLAS actually uses is read back from
+them. Without it, the count only takes effect in processes started after it is set, and can't be
+confirmed.
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import os
+
+try:
+    import threadpoolctl
+except ImportError:
+    threadpoolctl = None
+
+
+# Environment variables that set the thread count of OpenMP and the common BLAS libraries.
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                   'VECLIB_MAXIMUM_THREADS', 'BLIS_NUM_THREADS')
+
+# Columns written for each point when threads are swept.
+THREAD_COLUMNS = ('nthread', 'nthread_blas')
+
+
+def thread_env(nthread):
+    """
+    Return the environment variables that set the thread count.
+
+    Parameters
+    ----------
+    nthread : int
+        Number of threads per rank.
+
+    Returns
+    -------
+    OrderedDict
+        Value of each variable.
+    """
+    return OrderedDict((name, str(int(nthread))) for name in THREAD_ENV_VARS)
+
+
+def export_line(nthread):
+    """
+    Return the shell command that sets the thread count for the commands after it.
+
+    Parameters
+    ----------
+    nthread : int
+        Number of threads per rank.
+
+    Returns
+    -------
+    str
+        Command.
+    """
+    return 'export %s' % ' '.join('%s=%s' % item for item in thread_env(nthread).items())
+
+
+@contextmanager
+def thread_limits(nthread):
+    """
+    Set the thread count in this process for the duration of the context.
+
+    The environment is restored afterwards. Libraries loaded before the context only follow the
+    new count if threadpoolctl is installed.
+
+    Parameters
+    ----------
+    nthread : int or None
+        Number of threads per rank. If None, nothing is changed.
+
+    Yields
+    ------
+    None
+    """
+    if nthread is None:
+        yield
+        return
+
+    saved = dict((name, os.environ.get(name)) for name in THREAD_ENV_VARS)
+    os.environ.update(thread_env(nthread))
+
+    limiter = None
+    if threadpoolctl is not None:
+        limiter = threadpoolctl.threadpool_limits(limits=int(nthread))
+
+    try:
+        yield
+    finally:
+        if limiter is not None:
+            limiter.restore_original_limits()
+
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def can_limit_loaded():
+    """
+    Return whether the thread count of libraries already loaded in this process can be changed.
+
+    Returns
+    -------
+    bool
+        True if threadpoolctl is installed.
+    """
+    return threadpoolctl is not None
+
+
+def blas_threads():
+    """
+    Return the number of threads that BLAS uses in this process.
+
+    Returns
+    -------
+    int
+        Largest thread count of the loaded BLAS libraries. -1 if it is unknown, which is always the
+        case without threadpoolctl: the count requested in the environment is not proof that BLAS
+        follows it.
+    """
+    if threadpoolctl is None:
+        return -1
+
+    counts = [info['num_threads'] for info in threadpoolctl.threadpool_info()
+              if info.get('user_api') == 'blas']
+    if counts:
+        return max(counts)
+
+    return -1
@@ -29,10 +29,48 @@ from amd_om.utils.pyoptsparse_setup import get_pyoptsparse_driver
 
 
 from om_bench.bench import Bench
+from om_bench.fixtures import fixture
+from om_bench.scheduler import PBSScheduler
 
 
 class MyBench(Bench):
 
+    @fixture(persist=True)
+    def optimum_data(self, this_dir, num_routes):
+        # Optimum design, allocation, and per-route missions from an earlier optimization.
+        initial_dvs = {}
+
+        optimum_design_filename = '_design_outputs/optimum_design.pkl'
+        optimum_design_data = pickle.load(open(os.path.join(this_dir, optimum_design_filename), 'rb'))
+        for key in ['shape', 'twist', 'sweep', 'area']:
+            initial_dvs[key] = optimum_design_data[key]
+
+        optimum_alloc_filename = '_allocation_outputs/optimum_alloc.pkl'
+        optimum_alloc_data = pickle.load(open(os.path.join(this_dir, optimum_alloc_filename), 'rb'))
+        for key in ['pax_flt', 'flt_day']:
+            initial_dvs[key] = optimum_alloc_data[key]
+
+        initial_mission_vars = {}
+
+        for ind in range(num_routes):
+            optimum_mission_filename = '_mission_outputs/optimum_msn_{:03}.pkl'.format(ind)
+            optimum_mission_data = pickle.load(open(os.path.join(this_dir, optimum_mission_filename), 'rb'))
+            for key in ['h_km_cp', 'M0']:
+                initial_mission_vars[ind, key] = optimum_mission_data[key]
+
+        return initial_dvs, initial_mission_vars
+
+    @fixture
+    def surrogates(self):
+        # Trained SMT models don't need to be retrained for every point.
+        propulsion_model = get_prop_smt_model()
+        aerodynamics_model = get_aero_smt_model()
+
+        xt, yt, xlimits = get_rans_crm_wing()
+        aerodynamics_model.xt = xt
+
+        return propulsion_model, aerodynamics_model
+
     def setup(self, problem, ndv, nstate, nproc, flag):
 
         par_derivs = flag
@@ -56,26 +94,7 @@ class MyBench(Bench):
 
         design_variables = ['shape', 'twist', 'sweep', 'area']
 
-        initial_dvs = {}
-
-        optimum_design_filename = '_design_outputs/optimum_design.pkl'
-        optimum_design_data = pickle.load(open(os.path.join(this_dir, optimum_design_filename), 'rb'))
-        for key in ['shape', 'twist', 'sweep', 'area']:
-            initial_dvs[key] = optimum_design_data[key]
-
-        optimum_alloc_filename = '_allocation_outputs/optimum_alloc.pkl'
-        optimum_alloc_data = pickle.load(open(os.path.join(this_dir, optimum_alloc_filename), 'rb'))
-        for key in ['pax_flt', 'flt_day']:
-            initial_dvs[key] = optimum_alloc_data[key]
-
-        initial_mission_vars = {}
-
-        num_routes = allocation_data['num']
-        for ind in range(num_routes):
-            optimum_mission_filename = '_mission_outputs/optimum_msn_{:03}.pkl'.format(ind)
-            optimum_mission_data = pickle.load(open(os.path.join(this_dir, optimum_mission_filename), 'rb'))
-            for key in ['h_km_cp', 'M0']:
-                initial_mission_vars[ind, key] = optimum_mission_data[key]
+        initial_dvs, initial_mission_vars = self.optimum_data(this_dir, allocation_data['num'])
 
         aircraft_data = get_aircraft_data()
 
@@ -83,11 +102,7 @@ class MyBench(Bench):
         Wac_1e6_N = aircraft_data['Wac_1e6_N']
         Mach_mode = 'TAS'
 
-        propulsion_model = get_prop_smt_model()
-        aerodynamics_model = get_aero_smt_model()
-
-        xt, yt, xlimits = get_rans_crm_wing()
-        aerodynamics_model.xt = xt
+        propulsion_model, aerodynamics_model = self.surrogates()
 
         problem.model = AllocationMissionDesignGroup(
             flight_conditions=flight_conditions, aircraft_data=aircraft_data,
@@ -129,6 +144,9 @@ if __name__ == "__main__":
     bench.single_batch = True
     bench.auto_queue_submit = False
 
+    # Five Broadwell nodes for the 140 ranks.
+    bench.scheduler = PBSScheduler(account='a1607', hardware='bro')
+
     bench.run_benchmark_mpi(walltime=10)
 
 
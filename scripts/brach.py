@@ -77,10 +77,6 @@ class MyBench(Bench):
         prob['phase0.controls:theta'] = phase.interpolate(ys=[0, 100], nodes='control_input')
         prob['phase0.design_parameters:g'] = 9.80665
 
-        # Clean out coloring
-        #if os.path.exists('coloring.json'):
-        #    os.remove('coloring.json')
-
     def post_run(self, prob, ndv, nstate, nproc, flag):
         # Check stuff here.
         pass
@@ -100,6 +96,7 @@ if __name__ == "__main__":
     bench.single_batch = True
     bench.auto_queue_submit = False
     bench.sub_timing = True
+    bench.coloring_cache = True
 
     # Hardcode of/wrt to remove linear constraints form consideration.
     bench.ln_of  = ['phase0.time', 'phase0.collocation_constraint.defects:y', 'phase0.collocation_constraint.defects:x', 'phase0.collocation_constraint.defects:v', 'phase0.continuity_comp.defect_controls:theta', 'phase0.continuity_comp.defect_control_rates:theta_rate']
@@ -101,10 +101,6 @@ class MyBench(Bench):
         prob['phase0.states:m'] = phase.interpolate(ys=[19030.468, 16841.431], nodes='state_input')
         prob['phase0.controls:alpha'] = phase.interpolate(ys=[0.0, 0.0], nodes='control_input')
 
-        # Clean out coloring
-        #if os.path.exists('coloring.json'):
-        #    os.remove('coloring.json')
-
     def post_run(self, prob, ndv, nstate, nproc, flag):
         # Check stuff here.
         pass
@@ -124,6 +120,7 @@ if __name__ == "__main__":
     bench.single_batch = True
     bench.auto_queue_submit = False
     bench.sub_timing = True
+    bench.coloring_cache = True
 
     # Hardcode of/wrt to remove linear constraints form consideration.
     bench.ln_of = ['phase0.time', 'phase0.collocation_constraint.defects:h', 'phase0.collocation_constraint.defects:gam', 'phase0.collocation_constraint.defects:r', 'phase0.collocation_constraint.defects:m', 'phase0.collocation_constraint.defects:v', 'phase0.continuity_comp.defect_control_rates:alpha_rate', 'phase0.boundary_constraints.final_value:h', 'phase0.boundary_constraints.final_value:gam', 'phase0.boundary_constraints.final_value:mach', 'phase0.path_constraints.path:h', 'phase0.path_constraints.path:mach']